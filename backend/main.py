@@ -12,12 +12,18 @@ SIMPLIFIED VERSION: Non-parameterized contracts
 import os
 import sys
 import json
-from typing import Optional, Dict, Any, List
+import time
+import asyncio
+import random
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, List, Sequence, Tuple
 from datetime import datetime
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -43,7 +49,6 @@ from pycardano import (
     UTxO,
     Transaction,
     TransactionWitnessSet,
-    RawCBOR,
     plutus_script_hash,
     min_lovelace,
 )
@@ -61,25 +66,73 @@ from offchain.cip68_utils import (
     CIP68Datum,
     create_cip68_asset_names,
     create_cip68_datum,
-    get_fixed_policy_id,
-    get_fixed_store_address,
-    load_mint_script,
-    load_store_script,
+    load_script_registry,
     extract_owner_from_datum,
 )
+from offchain.cip68_index import (
+    ReferenceTokenIndex,
+    get_reference_index,
+    utxo_ref,
+)
+from offchain.cip68_indexer import (
+    ChainFollower,
+    BlockFrostDataSource,
+    FixtureDataSource,
+)
+from offchain.cip68_snapshot import IndexSnapshot, SnapshotReplica
+from offchain.cip68_shared import LeaderLock, SharedCache
+from offchain.cip68_cache import get_datum_cache
+from offchain.cip68_context import CachedChainContext, ChainInvalidated
+from offchain.cip68_async_context import AsyncBlockFrostChainContext
+from offchain.cip68_submit import QueueFull, SubmissionQueue, blockfrost_confirmed
+from offchain.cip68_refscripts import ReferenceScripts, get_reference_scripts, script_source
+from offchain.cip68_batch import (
+    BatchPlan,
+    bind_batch_reservations,
+    build_burn_batch,
+    build_mint_batch,
+    build_update_batch,
+    check_mint_items,
+    pack_batches,
+    reserve_batch_entries,
+    resolve_burn_entries,
+)
+from offchain.cip68_reservations import (
+    ReservationConflict,
+    get_reservation_manager,
+    get_wallet_leases,
+    reserve_reference_entry,
+)
 
 
 # Load environment variables
 load_dotenv()
 
 # Global variables
-chain_context: Optional[BlockFrostChainContext] = None
+chain_context: Optional[CachedChainContext] = None
 blueprint_path: Optional[str] = None
 network: Network = Network.TESTNET
 mint_script: Optional[PlutusV3Script] = None
 store_script: Optional[PlutusV3Script] = None
+# Reference-script UTxO của mint / store (None -> script inline trong mỗi tx)
+reference_scripts: Optional[ReferenceScripts] = None
 policy_id: Optional[ScriptHash] = None
 store_address: Optional[Address] = None
+token_index: Optional[ReferenceTokenIndex] = None
+chain_follower: Optional[ChainFollower] = None
+index_snapshot: Optional[IndexSnapshot] = None
+# Multi-worker: cache dùng chung giữa các process, follower chỉ chạy ở leader
+shared_cache: Optional[SharedCache] = None
+leader_lock: Optional[LeaderLock] = None
+index_replica: Optional[SnapshotReplica] = None
+background_tasks: Optional["BackgroundTaskGroup"] = None
+startup_metrics: Dict[str, Any] = {}
+blocking_executor: Optional["BlockingExecutor"] = None
+# Thời gian (giây) một update / burn chờ tx khác đang giữ cùng reference UTxO
+reservation_wait: float = 0.0
+# Hàng đợi submit (retry + backpressure) và thời gian /api/submit chờ kết quả submit
+submission_queue: Optional[SubmissionQueue] = None
+submit_wait: float = 30.0
 
 
 # ============================================================================
@@ -115,6 +168,58 @@ class TransactionResponse(BaseModel):
     token_name: Optional[str] = None
 
 
+class BatchMintItem(BaseModel):
+    """Một cặp CIP-68 trong batch mint."""
+    token_name: str = Field(..., min_length=1, max_length=28, description="Tên token")
+    description: str = Field(..., min_length=1, max_length=256, description="Mô tả của NFT")
+
+
+class BatchMintRequest(BaseModel):
+    """Request model for minting many CIP-68 tokens."""
+    wallet_address: str = Field(..., description="Địa chỉ ví của người dùng")
+    items: List[BatchMintItem] = Field(..., min_length=1, max_length=500, description="Các token cần mint")
+
+
+class BatchUpdateItem(BaseModel):
+    """Một token trong batch update."""
+    token_name: str = Field(..., min_length=1, description="Tên token")
+    new_description: str = Field(..., min_length=1, max_length=256, description="Mô tả mới")
+
+
+class BatchUpdateRequest(BaseModel):
+    """Request model for updating metadata of many tokens."""
+    wallet_address: str = Field(..., description="Địa chỉ ví của owner")
+    items: List[BatchUpdateItem] = Field(..., min_length=1, max_length=500, description="Các token cần update")
+
+
+class BatchBurnRequest(BaseModel):
+    """Request model for burning many CIP-68 tokens."""
+    wallet_address: str = Field(..., description="Địa chỉ ví của owner")
+    token_names: List[str] = Field(..., min_length=1, max_length=500, description="Các token cần burn")
+
+
+class BatchTransaction(BaseModel):
+    """Một unsigned transaction của batch."""
+    tx_cbor: str
+    tx_id: str
+    token_names: List[str]
+    size: int
+    ex_mem: int
+    ex_steps: int
+
+
+class BatchResponse(BaseModel):
+    """Response model for batch operations: các tx (ký và submit từng tx qua /api/submit)."""
+    success: bool
+    message: str
+    policy_id: Optional[str] = None
+    transactions: List[BatchTransaction] = []
+    rejected: Dict[str, str] = {}  # token_name -> lý do bị loại
+    deferred: List[str] = []  # chưa build được (vd. ví hết UTxO) - gửi lại sau khi submit
+    results: Dict[str, Dict[str, Any]] = {}  # token_name -> status (built / rejected / deferred), tx_id, ...
+    missing: List[str] = []  # token không tìm thấy (store hoặc ví)
+
+
 class SubmitRequest(BaseModel):
     """Request model for submitting signed transaction."""
     tx_cbor: str = Field(..., description="CBOR hex của unsigned transaction")
@@ -126,6 +231,10 @@ class SubmitResponse(BaseModel):
     success: bool
     message: str
     tx_hash: Optional[str] = None
+    # Trạng thái trong hàng đợi submit (queued / retrying / submitted / failed ...)
+    status: Optional[str] = None
+    # Tx đã submit bị hủy theo tx cha bị loại (transaction chaining) - cần build lại
+    invalidated: Optional[List[str]] = None
 
 
 class MetadataResponse(BaseModel):
@@ -136,6 +245,19 @@ class MetadataResponse(BaseModel):
     version: Optional[int] = None
 
 
+class BatchMetadataRequest(BaseModel):
+    """Request model for metadata of many tokens."""
+    token_names: List[str] = Field(..., min_length=1, max_length=1000, description="Tên các token")
+
+
+class BatchMetadataResponse(BaseModel):
+    """Response model for batch metadata query."""
+    success: bool
+    message: str
+    results: Dict[str, MetadataResponse] = {}  # token_name -> metadata
+    missing: List[str] = []
+
+
 class WalletInfoResponse(BaseModel):
     """Response model for wallet info."""
     success: bool
@@ -145,18 +267,444 @@ class WalletInfoResponse(BaseModel):
     assets: List[Dict[str, Any]]
 
 
+# ============================================================================
+# BLOCKING I/O EXECUTOR
+# ============================================================================
+
+class BlockingExecutor:
+    """
+    Thread pool có giới hạn cho các lời gọi blocking trong handler async:
+    chain I/O (BlockFrost), build transaction, refresh index.
+
+    Handler `await run_blocking(...)` thay vì gọi trực tiếp nên event loop
+    không bị chặn bởi một request chậm.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chain-io"
+        )
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Số task đang chờ thread rảnh."""
+        return self.pending
+
+    def _call(self, fn, args, kwargs):
+        with self._lock:
+            self.pending -= 1
+            self.running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _done(self, future: Future) -> None:
+        # Client ngắt kết nối -> handler bị cancel, task còn trong hàng đợi
+        # bị hủy và _call không bao giờ chạy
+        if future.cancelled():
+            with self._lock:
+                self.pending -= 1
+                self.cancelled += 1
+
+    async def run(self, fn, *args, **kwargs):
+        with self._lock:
+            self.submitted += 1
+            self.pending += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.pending)
+        try:
+            future = self._executor.submit(self._call, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "running": self.running,
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Chạy một hàm blocking trên BlockingExecutor của backend."""
+    global blocking_executor
+    if blocking_executor is None:
+        blocking_executor = BlockingExecutor(int(os.getenv("CHAIN_IO_WORKERS", "16")))
+    return await blocking_executor.run(fn, *args, **kwargs)
+
+
+async def build_leased(builder: TransactionBuilder, owner_address: Address):
+    """
+    Build tx với inputs của ví không trùng các tx đang chờ ký / submit.
+
+    Returns:
+        (tx_body, lease) - lease được commit / release qua /api/submit
+
+    Raises:
+        HTTPException(409): UTxO chứa user token đang thuộc tx khác
+    """
+    try:
+        return await run_blocking(
+            get_wallet_leases().build, builder, owner_address, change_address=owner_address
+        )
+    except ReservationConflict:
+        raise HTTPException(
+            status_code=409,
+            detail="Wallet UTxO is used by another pending transaction, retry after it is submitted",
+        )
+
+
+def batch_response(
+    plan: BatchPlan,
+    rejected: Dict[str, str],
+    names: Callable,
+    details: Optional[Callable] = None,
+    missing: Sequence[str] = (),
+) -> BatchResponse:
+    """
+    BatchResponse từ kết quả packing, kèm kết quả theo từng token.
+
+    Args:
+        plan: BatchPlan (các nhóm đã build và lease)
+        rejected: token_name -> lý do bị loại trước khi build
+        names: item -> token_name
+        details: item -> dict thông tin thêm cho results (vd. version mới)
+        missing: Token không tìm thấy (store hoặc ví), từ reserve / resolve
+    """
+    transactions = []
+    results: Dict[str, Dict[str, Any]] = {}
+    for group in plan.groups:
+        token_names = [names(item) for item in group.items]
+        transactions.append(BatchTransaction(
+            tx_cbor=group.transaction().to_cbor().hex(),
+            tx_id=group.tx_id,
+            token_names=token_names,
+            size=group.size,
+            ex_mem=group.ex_units.mem,
+            ex_steps=group.ex_units.steps,
+        ))
+        for name, item in zip(token_names, group.items):
+            results[name] = {"status": "built", "tx_id": group.tx_id, **(details(item) if details else {})}
+    for item in plan.deferred:
+        results[names(item)] = {"status": "deferred", "reason": plan.error}
+    for name, reason in rejected.items():
+        results[name] = {"status": "rejected", "reason": reason}
+
+    items = sum(len(t.token_names) for t in transactions)
+    message = f"{len(transactions)} unsigned transaction(s) for {items} token(s)"
+    if plan.error:
+        message += f"; {len(plan.deferred)} deferred: {plan.error}"
+    return BatchResponse(
+        success=bool(transactions),
+        message=message,
+        policy_id=FIXED_POLICY_ID,
+        transactions=transactions,
+        rejected=rejected,
+        deferred=[names(item) for item in plan.deferred],
+        results=results,
+        missing=list(missing),
+    )
+
+
+# ============================================================================
+# BACKGROUND TASKS
+# ============================================================================
+
+class BackgroundTaskGroup:
+    """
+    Các task nền của backend, chạy trên event loop của app.
+
+    - Warm-up: các bước chạy tuần tự lúc khởi động (thử lại tới khi thành
+      công); `ready` khi mọi bước đã xong
+    - Job định kỳ: chạy sau warm-up, mỗi `interval` ± `jitter` giây (nhiều
+      worker không refresh cùng lúc)
+    - `stop()`: cancel và chờ mọi task kết thúc
+
+    Hàm của warm-up / job là hàm blocking, được chạy qua run_blocking.
+    `status` ghi lại lần chạy thành công gần nhất của mỗi tên - /api/ready.
+    """
+
+    def __init__(self, retry_interval: float = 5.0):
+        self.retry_interval = retry_interval
+        self._warm_ups: List[Tuple[str, Callable]] = []
+        self._jobs: List[Tuple[str, Callable, float, float]] = []
+        self._tasks: List[asyncio.Task] = []
+        self._ready = asyncio.Event()
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.status: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def warm_up(self, name: str, fn: Callable) -> None:
+        """Thêm một bước warm-up (chạy theo thứ tự thêm vào)."""
+        self._warm_ups.append((name, fn))
+        self.status.setdefault(name, {"runs": 0, "failures": 0, "last_success": None})
+
+    def every(self, name: str, fn: Callable, interval: float, jitter: float = 0.1) -> None:
+        """Thêm một job chạy định kỳ sau khi warm-up xong."""
+        self._jobs.append((name, fn, interval, jitter))
+        entry = self.status.setdefault(name, {"runs": 0, "failures": 0, "last_success": None})
+        entry["interval"] = interval
+
+    async def _call(self, name: str, fn: Callable) -> bool:
+        entry = self.status[name]
+        started = time.perf_counter()
+        try:
+            await run_blocking(fn)
+        except Exception as e:
+            entry["failures"] += 1
+            entry["last_error"] = str(e)
+            print(f"Background task {name} failed: {e}")
+            return False
+        finally:
+            entry["runs"] += 1
+            entry["seconds"] = round(time.perf_counter() - started, 3)
+        entry["last_success"] = time.time()
+        entry["last_error"] = None
+        return True
+
+    async def _run_warm_ups(self) -> None:
+        for name, fn in self._warm_ups:
+            while not await self._call(name, fn):
+                await asyncio.sleep(self.retry_interval)
+        self.ready_at = time.time()
+        self._ready.set()
+        print(f"Warm-up done in {self.ready_at - self.started_at:.2f}s")
+        for name, fn, interval, jitter in self._jobs:
+            self._tasks.append(asyncio.create_task(self._run_job(name, fn, interval, jitter)))
+
+    async def _run_job(self, name: str, fn: Callable, interval: float, jitter: float) -> None:
+        while True:
+            await asyncio.sleep(interval * random.uniform(1 - jitter, 1 + jitter))
+            await self._call(name, fn)
+
+    def start(self) -> None:
+        self.started_at = time.time()
+        self._tasks.append(asyncio.create_task(self._run_warm_ups()))
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Chờ warm-up xong tối đa `timeout` giây."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def freshness(self) -> Dict[str, Dict[str, Any]]:
+        """Tuổi (giây) của lần chạy thành công gần nhất cho mỗi task."""
+        now = time.time()
+        result = {}
+        for name, entry in self.status.items():
+            age = None if entry["last_success"] is None else round(now - entry["last_success"], 3)
+            interval = entry.get("interval")
+            result[name] = {
+                **entry,
+                "age": age,
+                # Job bỏ lỡ hơn một chu kỳ -> không còn fresh
+                "fresh": age is not None and (interval is None or age <= 2 * interval),
+            }
+        return result
+
+
 # ============================================================================
 # APPLICATION LIFECYCLE
 # ============================================================================
 
+def record_startup_metrics(mode: str, seconds: float, caught_up_events: int):
+    """
+    Ghi lại thời gian khởi động index (warm hoặc cold).
+    
+    Thời gian của lần warm/cold gần nhất được lưu trong snapshot meta
+    để so sánh giữa các lần restart.
+    """
+    startup_metrics.clear()
+    startup_metrics.update({
+        "mode": mode,
+        "seconds": round(seconds, 3),
+        "entries": len(token_index) if token_index else 0,
+        "caught_up_events": caught_up_events,
+    })
+    if index_snapshot:
+        index_snapshot.set_meta(f"last_{mode}_start_seconds", str(startup_metrics["seconds"]))
+        for other in ("warm", "cold"):
+            value = index_snapshot.get_meta(f"last_{other}_start_seconds")
+            startup_metrics[f"last_{other}_start_seconds"] = float(value) if value else None
+
+
+def start_chain_follower(source, snapshot_interval: float) -> None:
+    """
+    Warm start (snapshot + catch-up delta) hoặc cold start (quét store),
+    rồi chạy chain follower ở background.
+
+    Được gọi lúc khởi động, hoặc từ SnapshotReplica khi worker này được
+    promote thành leader.
+    """
+    global chain_follower
+    chain_follower = ChainFollower(
+        source,
+        token_index,
+        poll_interval=float(os.getenv("INDEXER_POLL_INTERVAL", "5")),
+        snapshot=index_snapshot,
+        snapshot_interval=snapshot_interval,
+    )
+    
+    started = time.perf_counter()
+    warm = chain_follower.restore()
+    try:
+        caught_up = chain_follower.poll_once()
+    except Exception as e:
+        print(f"Warning: initial index sync failed: {e}")
+        caught_up = 0
+    record_startup_metrics(
+        "warm" if warm else "cold",
+        time.perf_counter() - started,
+        caught_up,
+    )
+    print(
+        f"Index ready ({startup_metrics['mode']} start): "
+        f"{startup_metrics['entries']} tokens in {startup_metrics['seconds']}s"
+    )
+    
+    chain_follower.start()
+
+
+def refresh_script_registry() -> None:
+    """
+    Load scripts từ blueprint vào globals; blueprint đổi (vd. sau `aiken
+    build`) thì lần gọi định kỳ tiếp theo nạp lại.
+
+    Raises:
+        FileNotFoundError: Chưa có plutus.json
+    """
+    global mint_script, store_script, policy_id, store_address, token_index, reference_scripts
+    registry = load_script_registry(blueprint_path)
+    # Reference scripts: chỉ đọc lại chain khi file deploy đổi (REFERENCE_SCRIPTS_PATH)
+    reference_scripts = get_reference_scripts(chain_context)
+    if registry.mint_script is mint_script:
+        return
+    mint_script = registry.mint_script
+    store_script = registry.store_script
+    policy_id = registry.policy_id
+    store_address = registry.store_address(network)
+    if token_index is None:
+        token_index = get_reference_index(chain_context, store_address, policy_id)
+        token_index.negative_cache.ttl = float(os.getenv("NEGATIVE_CACHE_TTL", "30"))
+    print(f"Scripts loaded from {blueprint_path}")
+    print(f"Fixed Policy ID: {FIXED_POLICY_ID}")
+    print(f"Fixed Store Address: {store_address}")
+
+
+def start_index() -> None:
+    """
+    Warm-up store index: chain follower (leader), snapshot replica (worker
+    khác khi chạy nhiều worker), hoặc quét store một lần (INDEXER_SOURCE=poll).
+    """
+    global index_snapshot, leader_lock, index_replica
+    
+    # Chain follower: "blockfrost" (mặc định), "poll" (tắt follower),
+    # hoặc đường dẫn tới file fixture JSONL (test offline)
+    indexer_source = os.getenv("INDEXER_SOURCE", "blockfrost")
+    if indexer_source.lower() == "poll":
+        started = time.perf_counter()
+        token_index.refresh()
+        record_startup_metrics("cold", time.perf_counter() - started, 0)
+        return
+    
+    if indexer_source.lower() == "blockfrost":
+        source = BlockFrostDataSource(chain_context, store_address)
+    else:
+        source = FixtureDataSource(indexer_source)
+    # Snapshot SQLite để warm restart (INDEX_SNAPSHOT_PATH="" để tắt)
+    snapshot_path = os.getenv(
+        "INDEX_SNAPSHOT_PATH",
+        os.path.join(os.path.dirname(__file__), 'index_snapshot.sqlite3')
+    )
+    if snapshot_path and index_snapshot is None:
+        index_snapshot = IndexSnapshot(snapshot_path)
+    
+    # Multi-worker: leader ghi snapshot (chỉ các UTxO thay đổi) sau mỗi lần poll có thay đổi
+    snapshot_interval = float(
+        os.getenv("INDEX_SNAPSHOT_INTERVAL", "0" if shared_cache else "60")
+    )
+    if shared_cache and index_snapshot and leader_lock is None:
+        leader_lock = LeaderLock(snapshot_path + ".lock")
+    
+    if leader_lock is None or leader_lock.acquire():
+        start_chain_follower(source, snapshot_interval)
+        print(f"Chain follower started (source: {indexer_source})")
+    else:
+        # Worker khác đang chạy follower -> đồng bộ index từ snapshot;
+        # leader chết thì worker này giành lock và chạy follower
+        index_replica = SnapshotReplica(
+            index_snapshot,
+            token_index,
+            interval=float(os.getenv("INDEX_REPLICA_INTERVAL", "1")),
+            leader_lock=leader_lock,
+            on_promote=lambda: start_chain_follower(source, snapshot_interval),
+        )
+        started = time.perf_counter()
+        index_replica.sync_once()
+        record_startup_metrics("replica", time.perf_counter() - started, 0)
+        index_replica.start()
+        print(
+            f"Index replica started: {startup_metrics['entries']} tokens "
+            f"from snapshot {snapshot_path}"
+        )
+
+
+def purge_shared_cache() -> None:
+    shared_cache.purge_expired()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler."""
-    global chain_context, mint_script, store_script, network, policy_id, store_address
+    global chain_context, mint_script, store_script, network, policy_id, store_address, token_index
+    global chain_follower, index_snapshot, blocking_executor, reservation_wait
+    global shared_cache, background_tasks, submission_queue, submit_wait
     
     # Startup
     print("Starting CIP-68 Backend API (Simplified)...")
     
+    # Thread pool cho chain I/O + build tx (handler async không bị chặn)
+    blocking_executor = BlockingExecutor(int(os.getenv("CHAIN_IO_WORKERS", "16")))
+    
+    # Reference UTxO reservations: một tx đang chờ ký / submit cho mỗi token
+    get_reservation_manager().ttl = float(os.getenv("RESERVATION_TTL", "120"))
+    reservation_wait = float(os.getenv("RESERVATION_WAIT", "0"))
+    # Lease inputs của ví: các tx song song từ cùng một ví có inputs rời nhau
+    get_wallet_leases().manager.ttl = float(os.getenv("LEASE_TTL", "120"))
+    
     # Initialize chain context
     network_str = os.getenv("NETWORK", "Preprod")
     blockfrost_url = os.getenv("BLOCKFROST_URL", "https://cardano-preprod.blockfrost.io/api")
@@ -164,10 +712,51 @@ async def lifespan(app: FastAPI):
     
     network = Network.TESTNET if network_str.lower() == "preprod" else Network.MAINNET
     
-    chain_context = BlockFrostChainContext(
-        project_id=blockfrost_key,
-        base_url=blockfrost_url,
+    # CHAIN_CONTEXT=async: pooled keep-alive HTTP client, UTxO nhiều trang fetch song song
+    if os.getenv("CHAIN_CONTEXT", "blockfrost").lower() == "async":
+        base_context = AsyncBlockFrostChainContext(
+            project_id=blockfrost_key,
+            base_url=blockfrost_url,
+            max_connections=int(os.getenv("CHAIN_HTTP_CONNECTIONS", "20")),
+            page_concurrency=int(os.getenv("CHAIN_PAGE_CONCURRENCY", "5")),
+        )
+    else:
+        base_context = BlockFrostChainContext(
+            project_id=blockfrost_key,
+            base_url=blockfrost_url,
+        )
+    
+    # Multi-worker (uvicorn --workers N): SHARED_CACHE_PATH bật cache SQLite
+    # dùng chung - UTxO / ex-units fetch bởi một worker được worker khác dùng lại
+    shared_cache_path = os.getenv("SHARED_CACHE_PATH", "")
+    if shared_cache_path:
+        shared_cache = SharedCache(shared_cache_path)
+        # Reservation / lease inputs của ví phải thấy được giữa các worker
+        get_reservation_manager().use_shared(shared_cache)
+        get_wallet_leases().use_shared(shared_cache)
+    
+    # Wallet UTxO cache: TTL ngắn + cập nhật optimistic khi /api/submit thành công
+    # Ex-unit cache: bỏ qua evaluate_tx khi redeemer shape đã được evaluate
+    chain_context = CachedChainContext(
+        base_context,
+        utxo_ttl=float(os.getenv("UTXO_CACHE_TTL", "10")),
+        ex_units_margin=float(os.getenv("EX_UNITS_MARGIN", "0")),
+        shared=shared_cache,
+    )
+    
+    # Submit qua hàng đợi có giới hạn: retry lỗi tạm thời (rate limit / 5xx) với
+    # backoff, 429 khi đầy, theo dõi trạng thái tx tới khi lên chain
+    submission_queue = SubmissionQueue(
+        chain_context,
+        max_size=int(os.getenv("SUBMIT_QUEUE_SIZE", "256")),
+        concurrency=int(os.getenv("SUBMIT_CONCURRENCY", "4")),
+        retries=int(os.getenv("SUBMIT_RETRIES", "5")),
+        confirm=blockfrost_confirmed(chain_context),
+        confirm_interval=float(os.getenv("SUBMIT_CONFIRM_INTERVAL", "10")),
+        on_dropped=chain_context.on_rejected,
     )
+    submission_queue.start()
+    submit_wait = float(os.getenv("SUBMIT_WAIT", "30"))
     
     # Set blueprint path
     global blueprint_path
@@ -177,19 +766,44 @@ async def lifespan(app: FastAPI):
         'smart_contract',
         'plutus.json'
     )
+    if not os.path.exists(blueprint_path):
+        print(f"Warning: Blueprint not found at {blueprint_path}, waiting for it")
     
-    if os.path.exists(blueprint_path):
-        print(f"Blueprint found at {blueprint_path}")
-        # Load scripts (non-parameterized)
-        mint_script = load_mint_script(blueprint_path)
-        store_script = load_store_script(blueprint_path)
-        policy_id = get_fixed_policy_id()
-        store_address = get_fixed_store_address(network)
-        print(f"Fixed Policy ID: {FIXED_POLICY_ID}")
-        print(f"Fixed Store Address: {store_address}")
-    else:
-        print(f"Warning: Blueprint not found at {blueprint_path}")
-        blueprint_path = None
+    # Warm-up (tuần tự) rồi refresh định kỳ có jitter: request đầu tiên
+    # không phải tự fetch store UTxOs / protocol params / chain tip
+    background_tasks = BackgroundTaskGroup()
+    background_tasks.warm_up("script_registry", refresh_script_registry)
+    # Protocol params / genesis: fetch một lần, refresh ở background khi sang epoch
+    background_tasks.warm_up("protocol_params", chain_context.params.start)
+    background_tasks.warm_up("chain_tip", chain_context.refresh_tip)
+    background_tasks.warm_up("store_index", start_index)
+    
+    background_tasks.every(
+        "script_registry", refresh_script_registry,
+        float(os.getenv("SCRIPT_REGISTRY_INTERVAL", "30")),
+    )
+    tip_interval = float(os.getenv("CHAIN_TIP_INTERVAL", "5"))
+    chain_context.tip_ttl = 2 * tip_interval
+    background_tasks.every("chain_tip", chain_context.refresh_tip, tip_interval)
+    if os.getenv("INDEXER_SOURCE", "blockfrost").lower() == "poll":
+        # Không có follower: refresh store index trước khi request thấy index cũ
+        background_tasks.every(
+            "store_index",
+            lambda: token_index.refresh(),
+            float(os.getenv("INDEX_REFRESH_INTERVAL", "10")),
+        )
+    if shared_cache:
+        background_tasks.every("shared_cache", purge_shared_cache, 300)
+    
+    background_tasks.start()
+    # Chờ warm-up tối đa WARM_UP_TIMEOUT giây; quá hạn (hoặc chưa có blueprint)
+    # thì vẫn nhận request, warm-up tiếp tục ở background và /api/ready trả về
+    # 503 tới khi xong
+    warm_up_timeout = float(os.getenv("WARM_UP_TIMEOUT", "30"))
+    if not os.path.exists(blueprint_path):
+        warm_up_timeout = 0
+    if not await background_tasks.wait_ready(warm_up_timeout):
+        print("Warning: warm-up not finished, serving requests while it continues")
     
     print(f"Connected to {network_str} network")
     
@@ -197,6 +811,24 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("Shutting down CIP-68 Backend API...")
+    await background_tasks.stop()
+    submission_queue.stop(timeout=5)
+    chain_context.params.stop(timeout=5)
+    if index_replica:
+        index_replica.stop(timeout=5)
+    if chain_follower:
+        chain_follower.stop(timeout=10)
+    if leader_lock:
+        leader_lock.release()
+    if index_snapshot:
+        index_snapshot.close()
+    if shared_cache:
+        get_reservation_manager().use_shared(None)
+        get_wallet_leases().use_shared(None)
+        shared_cache.close()
+    blocking_executor.shutdown()
+    if isinstance(chain_context.context, AsyncBlockFrostChainContext):
+        chain_context.context.close()
 
 
 # ============================================================================
@@ -281,6 +913,84 @@ async def convert_address(hex_address: str = Query(..., description="Hex-encoded
             }
 
 
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    Metrics của backend: thời gian khởi động index, trạng thái chain follower.
+    """
+    return {
+        "startup": startup_metrics,
+        "index": {
+            "tokens": len(token_index) if token_index else 0,
+            **(token_index.lookup_stats() if token_index else {}),
+        },
+        "datum_cache": get_datum_cache().stats(),
+        "utxo_cache": chain_context.cache_stats() if chain_context else None,
+        "protocol_params": chain_context.params.cache_stats() if chain_context else None,
+        "indexer": chain_follower.stats if chain_follower else None,
+        "snapshot": index_snapshot.stats() if index_snapshot else None,
+        "index_leader": leader_lock.is_leader if leader_lock else None,
+        "index_replica": index_replica.stats if index_replica else None,
+        "executor": blocking_executor.stats() if blocking_executor else None,
+        "reservations": get_reservation_manager().cache_stats(),
+        "wallet_leases": get_wallet_leases().cache_stats(),
+        "submit_queue": submission_queue.queue_stats() if submission_queue else None,
+    }
+
+
+@app.get("/api/ready")
+async def get_readiness():
+    """
+    Readiness: 200 khi warm-up đã xong, 503 nếu chưa.
+
+    Kèm tuổi (giây) của từng cache để biết dữ liệu đang fresh tới đâu.
+    """
+    now = time.time()
+    params = chain_context.params.cache_stats() if chain_context else {}
+    if chain_follower:
+        index_source = "follower"
+    elif index_replica:
+        index_source = "replica"
+    else:
+        index_source = "poll"
+    # Replica: snapshot không đổi nghĩa là index vẫn khớp với leader
+    if index_replica and index_replica.stats["last_check"]:
+        index_age = round(now - index_replica.stats["last_check"], 3)
+    elif token_index is not None and token_index.age is not None:
+        index_age = round(token_index.age, 3)
+    else:
+        index_age = None
+    ready = background_tasks is not None and background_tasks.ready
+    body = {
+        "ready": ready,
+        "started_at": background_tasks.started_at if background_tasks else None,
+        "ready_at": background_tasks.ready_at if background_tasks else None,
+        "caches": {
+            "script_registry": {
+                "loaded": mint_script is not None,
+                "blueprint_path": blueprint_path,
+                "reference_scripts": reference_scripts is not None,
+            },
+            "protocol_params": {
+                "epoch": params.get("epoch"),
+                "age": round(now - params["last_refresh"], 3) if params.get("last_refresh") else None,
+                "expires_in": round(params["expires_at"] - now, 3) if params.get("expires_at") else None,
+                "background": params.get("background"),
+            },
+            "chain_tip": {
+                "age": round(chain_context.tip_age, 3) if chain_context and chain_context.tip_age is not None else None,
+            },
+            "store_index": {
+                "source": index_source,
+                "tokens": len(token_index) if token_index is not None else 0,
+                "age": index_age,
+            },
+        },
+        "tasks": background_tasks.freshness() if background_tasks else {},
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
 @app.get("/api/script-info")
 async def get_script_info():
     """
@@ -291,6 +1001,8 @@ async def get_script_info():
         "store_hash": FIXED_STORE_HASH,
         "store_address": str(store_address) if store_address else None,
         "network": os.getenv("NETWORK", "Preprod"),
+        "script_mode": "reference" if reference_scripts else "inline",
+        "reference_scripts": reference_scripts.to_dict() if reference_scripts else None,
         "message": "Using non-parameterized contracts (fixed policy ID)"
     }
 
@@ -300,7 +1012,7 @@ async def get_wallet_info(address: str):
     """Lấy thông tin ví."""
     try:
         addr = Address.from_primitive(address)
-        utxos = chain_context.utxos(addr)
+        utxos = await run_blocking(chain_context.utxos, addr)
         
         total_lovelace = sum(utxo.output.amount.coin for utxo in utxos)
         
@@ -334,6 +1046,7 @@ async def create_mint_transaction(request: MintRequest):
     
     SIMPLIFIED: Uses fixed policy ID, policy_id/asset_name/owner stored in datum.
     """
+    lease = None
     try:
         if not mint_script or not store_script:
             raise HTTPException(status_code=500, detail="Scripts not loaded")
@@ -343,7 +1056,7 @@ async def create_mint_transaction(request: MintRequest):
         owner_pkh = owner_address.payment_part.to_primitive()
         
         # Get UTxOs
-        utxos = chain_context.utxos(owner_address)
+        utxos = await run_blocking(chain_context.utxos, owner_address)
         if not utxos:
             raise HTTPException(status_code=400, detail="Ví không có UTxO nào!")
         
@@ -393,7 +1106,9 @@ async def create_mint_transaction(request: MintRequest):
         
         # Mint tokens
         builder.mint = mint_assets
-        builder.add_minting_script(mint_script, redeemer=redeemer)
+        builder.add_minting_script(
+            script_source(builder, mint_script, reference_scripts), redeemer=redeemer
+        )
         
         # Output: Reference token to store script
         builder.add_output(
@@ -410,7 +1125,7 @@ async def create_mint_transaction(request: MintRequest):
         builder.required_signers = [owner_address.payment_part]
         
         # Build transaction body
-        tx_body = builder.build(change_address=owner_address)
+        tx_body, lease = await build_leased(builder, owner_address)
         
         # Build witness set (without vkey - wallet provides signature)
         witness_set = builder.build_witness_set()
@@ -427,8 +1142,10 @@ async def create_mint_transaction(request: MintRequest):
         )
         
     except HTTPException:
+        get_wallet_leases().release(lease)
         raise
     except Exception as e:
+        get_wallet_leases().release(lease)
         import traceback
         traceback.print_exc()
         return TransactionResponse(
@@ -437,6 +1154,53 @@ async def create_mint_transaction(request: MintRequest):
         )
 
 
+@app.post("/api/mint/batch", response_model=BatchResponse)
+async def create_batch_mint_transactions(request: BatchMintRequest):
+    """
+    Tạo các unsigned transaction mint nhiều CIP-68 NFT.
+    
+    Các cặp được đóng gói thành ít tx nhất vừa max_tx_size và ex-unit budget;
+    các tx có inputs rời nhau (wallet leases) nên ví ký và submit từng tx qua
+    /api/submit theo thứ tự bất kỳ. Token không hợp lệ / đã tồn tại nằm trong
+    `rejected`; ví không đủ UTxO cho mọi tx -> phần còn lại nằm trong `deferred`.
+    """
+    if not mint_script or not store_script:
+        raise HTTPException(status_code=500, detail="Scripts not loaded")
+    
+    try:
+        owner_address = Address.from_primitive(request.wallet_address)
+        items = [(item.token_name, item.description) for item in request.items]
+        accepted, rejected = await run_blocking(check_mint_items, items, token_index)
+        if not accepted:
+            return BatchResponse(
+                success=False,
+                message="No valid items to mint",
+                rejected=rejected,
+                results={name: {"status": "rejected", "reason": r} for name, r in rejected.items()},
+            )
+        
+        leases = get_wallet_leases()
+        plan = await run_blocking(
+            pack_batches,
+            accepted,
+            lambda chunk: build_mint_batch(
+                chain_context, owner_address, chunk, mint_script, store_address, policy_id,
+                reference_scripts,
+            ),
+            lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+            release=lambda tx_body: leases.release_tx(tx_body.id),
+        )
+        return batch_response(plan, rejected, lambda item: item[0])
+        
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return BatchResponse(
+            success=False,
+            message=f"Error creating transactions: {str(e)}"
+        )
+
+
 @app.post("/api/update", response_model=TransactionResponse)
 async def create_update_transaction(request: UpdateRequest):
     """
@@ -445,6 +1209,8 @@ async def create_update_transaction(request: UpdateRequest):
     SIMPLIFIED: Uses fixed policy ID, verifies owner from datum.
     Giữ nguyên policy_id, asset_name, owner trong datum mới.
     """
+    reservation = None
+    lease = None
     try:
         if not store_script:
             raise HTTPException(status_code=500, detail="Store script not loaded")
@@ -460,21 +1226,26 @@ async def create_update_transaction(request: UpdateRequest):
         token_name_bytes = request.token_name.encode('utf-8')
         ref_asset_name = AssetName(CIP68_REFERENCE_PREFIX + token_name_bytes)
         
-        # Find reference token UTxO
-        utxos = chain_context.utxos(store_address)
-        ref_utxo = None
-        for utxo in utxos:
-            if utxo.output.amount.multi_asset:
-                for pid, assets in utxo.output.amount.multi_asset.items():
-                    if pid == policy_id and ref_asset_name in assets:
-                        ref_utxo = utxo
-                        break
-        
-        if not ref_utxo:
+        # Find reference token UTxO (indexed lookup) và giữ nó cho tx này
+        try:
+            entry, reservation = await run_blocking(
+                reserve_reference_entry,
+                token_index,
+                token_name_bytes,
+                holder=request.wallet_address,
+                wait=reservation_wait,
+            )
+        except ReservationConflict:
+            raise HTTPException(
+                status_code=409,
+                detail="Token has another pending transaction, retry after it is submitted",
+            )
+        if not entry:
             raise HTTPException(status_code=404, detail="Reference token not found")
+        ref_utxo = entry.utxo
         
         # Get current datum and verify owner
-        current_datum = ref_utxo.output.datum
+        current_datum = entry.datum
         new_version = 2
         if isinstance(current_datum, CIP68Datum):
             current_owner = extract_owner_from_datum(current_datum)
@@ -501,7 +1272,7 @@ async def create_update_transaction(request: UpdateRequest):
         # Spend reference token UTxO
         builder.add_script_input(
             ref_utxo,
-            store_script,
+            script_source(builder, store_script, reference_scripts),
             redeemer=redeemer
         )
         
@@ -520,7 +1291,7 @@ async def create_update_transaction(request: UpdateRequest):
         builder.required_signers = [owner_address.payment_part]
         
         # Build transaction body
-        tx_body = builder.build(change_address=owner_address)
+        tx_body, lease = await build_leased(builder, owner_address)
         
         # Build witness set (without vkey - wallet provides signature)
         witness_set = builder.build_witness_set()
@@ -528,6 +1299,9 @@ async def create_update_transaction(request: UpdateRequest):
         tx = Transaction(tx_body, witness_set)
         tx_cbor = tx.to_cbor().hex()
         
+        # Reservation được commit / release khi tx này được submit qua /api/submit
+        get_reservation_manager().bind(reservation, tx.id)
+        
         return TransactionResponse(
             success=True,
             message="Update transaction created successfully",
@@ -537,14 +1311,79 @@ async def create_update_transaction(request: UpdateRequest):
         )
         
     except HTTPException:
+        get_reservation_manager().release(reservation)
+        get_wallet_leases().release(lease)
         raise
     except Exception as e:
+        get_reservation_manager().release(reservation)
+        get_wallet_leases().release(lease)
         return TransactionResponse(
             success=False,
             message=f"Error creating update transaction: {str(e)}"
         )
 
 
+@app.post("/api/update/batch", response_model=BatchResponse)
+async def create_batch_update_transactions(request: BatchUpdateRequest):
+    """
+    Tạo các unsigned transaction update metadata của nhiều token.
+    
+    Reference UTxO của các token được tra index một lần và reserve; mỗi tx
+    spend nhiều reference UTxO (mỗi input một redeemer UpdateMetadata, version
+    + 1) trong giới hạn max_tx_size và ex-unit budget. Reservation của các token
+    cùng tx được commit / release khi tx đó đi qua /api/submit.
+    """
+    if not store_script:
+        raise HTTPException(status_code=500, detail="Store script not loaded")
+    
+    accepted = []
+    try:
+        owner_address = Address.from_primitive(request.wallet_address)
+        owner_pkh = owner_address.payment_part.to_primitive()
+        items = [(item.token_name, item.new_description) for item in request.items]
+        accepted, rejected, missing = await run_blocking(
+            reserve_batch_entries, token_index, items, owner_pkh, holder=request.wallet_address
+        )
+        if not accepted:
+            return BatchResponse(
+                success=False,
+                message="No tokens to update",
+                rejected=rejected,
+                results={name: {"status": "rejected", "reason": r} for name, r in rejected.items()},
+                missing=missing,
+            )
+        
+        leases = get_wallet_leases()
+        plan = await run_blocking(
+            pack_batches,
+            accepted,
+            lambda chunk: build_update_batch(
+                chain_context, owner_address, chunk, store_script, store_address, policy_id,
+                reference_scripts,
+            ),
+            lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+            release=lambda tx_body: leases.release_tx(tx_body.id),
+        )
+        bind_batch_reservations(plan)
+        return batch_response(
+            plan,
+            rejected,
+            lambda item: item.token_name,
+            lambda item: {"new_version": item.new_version},
+            missing=missing,
+        )
+        
+    except Exception as e:
+        for item in accepted:
+            get_reservation_manager().release(item.reservation)
+        import traceback
+        traceback.print_exc()
+        return BatchResponse(
+            success=False,
+            message=f"Error creating update transactions: {str(e)}"
+        )
+
+
 @app.post("/api/burn", response_model=TransactionResponse)
 async def create_burn_transaction(request: BurnRequest):
     """
@@ -552,6 +1391,8 @@ async def create_burn_transaction(request: BurnRequest):
     
     SIMPLIFIED: Uses fixed policy ID, verifies owner from datum.
     """
+    reservation = None
+    lease = None
     try:
         if not mint_script or not store_script:
             raise HTTPException(status_code=500, detail="Scripts not loaded")
@@ -564,28 +1405,33 @@ async def create_burn_transaction(request: BurnRequest):
         token_name_bytes = request.token_name.encode('utf-8')
         ref_asset_name, user_asset_name = create_cip68_asset_names(token_name_bytes)
         
-        # Find reference token UTxO
-        store_utxos = chain_context.utxos(store_address)
-        ref_utxo = None
-        for utxo in store_utxos:
-            if utxo.output.amount.multi_asset:
-                for pid, assets in utxo.output.amount.multi_asset.items():
-                    if pid == policy_id and ref_asset_name in assets:
-                        ref_utxo = utxo
-                        break
-        
-        if not ref_utxo:
+        # Find reference token UTxO (indexed lookup) và giữ nó cho tx này
+        try:
+            entry, reservation = await run_blocking(
+                reserve_reference_entry,
+                token_index,
+                token_name_bytes,
+                holder=request.wallet_address,
+                wait=reservation_wait,
+            )
+        except ReservationConflict:
+            raise HTTPException(
+                status_code=409,
+                detail="Token has another pending transaction, retry after it is submitted",
+            )
+        if not entry:
             raise HTTPException(status_code=404, detail="Reference token not found")
+        ref_utxo = entry.utxo
         
         # Verify owner from datum
-        current_datum = ref_utxo.output.datum
+        current_datum = entry.datum
         if isinstance(current_datum, CIP68Datum):
             current_owner = extract_owner_from_datum(current_datum)
             if current_owner != owner_pkh:
                 raise HTTPException(status_code=403, detail="You are not the owner of this NFT")
         
         # Find user token UTxO
-        owner_utxos = chain_context.utxos(owner_address)
+        owner_utxos = await run_blocking(chain_context.utxos, owner_address)
         user_utxo = None
         for utxo in owner_utxos:
             if utxo.output.amount.multi_asset:
@@ -616,7 +1462,7 @@ async def create_burn_transaction(request: BurnRequest):
         # Spend reference token
         builder.add_script_input(
             ref_utxo,
-            store_script,
+            script_source(builder, store_script, reference_scripts),
             redeemer=spend_redeemer
         )
         
@@ -625,13 +1471,15 @@ async def create_burn_transaction(request: BurnRequest):
         
         # Burn tokens
         builder.mint = burn_assets
-        builder.add_minting_script(mint_script, redeemer=mint_redeemer)
+        builder.add_minting_script(
+            script_source(builder, mint_script, reference_scripts), redeemer=mint_redeemer
+        )
         
         # Required signers
         builder.required_signers = [owner_address.payment_part]
         
         # Build transaction body
-        tx_body = builder.build(change_address=owner_address)
+        tx_body, lease = await build_leased(builder, owner_address)
         
         # Build witness set (without vkey - wallet provides signature)
         witness_set = builder.build_witness_set()
@@ -639,6 +1487,9 @@ async def create_burn_transaction(request: BurnRequest):
         tx = Transaction(tx_body, witness_set)
         tx_cbor = tx.to_cbor().hex()
         
+        # Reservation được commit / release khi tx này được submit qua /api/submit
+        get_reservation_manager().bind(reservation, tx.id)
+        
         return TransactionResponse(
             success=True,
             message="Burn transaction created successfully",
@@ -648,8 +1499,12 @@ async def create_burn_transaction(request: BurnRequest):
         )
         
     except HTTPException:
+        get_reservation_manager().release(reservation)
+        get_wallet_leases().release(lease)
         raise
     except Exception as e:
+        get_reservation_manager().release(reservation)
+        get_wallet_leases().release(lease)
         import traceback
         traceback.print_exc()
         return TransactionResponse(
@@ -658,12 +1513,76 @@ async def create_burn_transaction(request: BurnRequest):
         )
 
 
+@app.post("/api/burn/batch", response_model=BatchResponse)
+async def create_batch_burn_transactions(request: BatchBurnRequest):
+    """
+    Tạo các unsigned transaction burn nhiều CIP-68 NFT.
+    
+    Token name được resolve trong một lượt: reference UTxO qua index, user
+    token qua một lần đọc UTxO của ví. Mỗi tx burn nhiều cặp trong giới hạn
+    max_tx_size và ex-unit budget; token không tìm thấy nằm trong `missing`.
+    """
+    if not mint_script or not store_script:
+        raise HTTPException(status_code=500, detail="Scripts not loaded")
+    
+    accepted = []
+    try:
+        owner_address = Address.from_primitive(request.wallet_address)
+        owner_pkh = owner_address.payment_part.to_primitive()
+        leases = get_wallet_leases()
+        wallet_utxos = await run_blocking(chain_context.utxos, owner_address)
+        accepted, rejected, missing = await run_blocking(
+            resolve_burn_entries,
+            token_index,
+            wallet_utxos,
+            request.token_names,
+            owner_pkh,
+            policy_id,
+            holder=request.wallet_address,
+            leased=leases.manager.is_reserved,
+        )
+        if not accepted:
+            return BatchResponse(
+                success=False,
+                message="No tokens to burn",
+                rejected=rejected,
+                results={name: {"status": "rejected", "reason": r} for name, r in rejected.items()},
+                missing=missing,
+            )
+        
+        plan = await run_blocking(
+            pack_batches,
+            accepted,
+            lambda chunk: build_burn_batch(
+                chain_context, owner_address, chunk, mint_script, store_script, policy_id,
+                reference_scripts,
+            ),
+            lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+            release=lambda tx_body: leases.release_tx(tx_body.id),
+            inputs_of=lambda item: [utxo_ref(item.user_utxo.input)],
+        )
+        bind_batch_reservations(plan)
+        return batch_response(plan, rejected, lambda item: item.token_name, missing=missing)
+        
+    except Exception as e:
+        for item in accepted:
+            get_reservation_manager().release(item.reservation)
+        import traceback
+        traceback.print_exc()
+        return BatchResponse(
+            success=False,
+            message=f"Error creating burn transactions: {str(e)}"
+        )
+
+
 @app.post("/api/submit", response_model=SubmitResponse)
 async def submit_transaction(request: SubmitRequest):
     """
     Submit signed transaction to blockchain.
     Merge witnesses using proper PyCardano types with NonEmptyOrderedSet.
+    Tx đi qua hàng đợi submit: đầy -> 429 (Retry-After), lỗi tạm thời được thử lại.
     """
+    backend_tx = None
     try:
        # 1. Load lại Transaction gốc từ CBOR (chứa Body + Scripts/Redeemers do Backend tạo)
         # Lưu ý: backend_tx này chưa có chữ ký ví (vkey_witnesses)
@@ -691,22 +1610,165 @@ async def submit_transaction(request: SubmitRequest):
         # 4. Gán ngược lại vào Transaction
         backend_tx.transaction_witness_set = final_witness_set
         
-        # 5. Submit
-        # Quan trọng: Dùng backend_tx.to_cbor() để đảm bảo cấu trúc Body giữ nguyên
-        tx_hash = chain_context.submit_tx_cbor(backend_tx.to_cbor())
+        # 5. Đưa vào hàng đợi submit (retry lỗi tạm thời); lease, reservation và
+        # index được cập nhật khi worker submit xong, kể cả sau khi request trả về
+        tx_id = backend_tx.id
+
+        def on_submitted(tx_hash):
+            # Cập nhật index ngay (không chờ refresh), rồi trả reference UTxO đã spend
+            if token_index:
+                token_index.apply_transaction(backend_tx)
+            get_reservation_manager().commit_tx(tx_id)
+            get_wallet_leases().commit_tx(tx_id)
+
+        def on_failed(error):
+            # Submit lỗi -> reference UTxO và inputs của ví được trả lại cho builder khác
+            get_reservation_manager().release_tx(tx_id)
+            get_wallet_leases().release_tx(tx_id)
+            if isinstance(error, ChainInvalidated):
+                drop_invalidated_entries(error.tx_ids)
+
+        try:
+            job = submission_queue.submit(
+                backend_tx, on_submitted=on_submitted, on_failed=on_failed
+            )
+        except QueueFull as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        
+        # 6. Chờ kết quả submit (không chờ confirm) tối đa SUBMIT_WAIT giây;
+        # quá hạn -> tx vẫn nằm trong hàng đợi, client theo dõi qua /api/submit/{tx_id}
+        try:
+            tx_hash = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(job.future)), submit_wait
+            )
+        except asyncio.TimeoutError:
+            return SubmitResponse(
+                success=True,
+                message="Transaction queued",
+                tx_hash=job.tx_id,
+                status=job.state,
+            )
         
         return SubmitResponse(
             success=True,
             message="Transaction submitted successfully",
-            tx_hash=str(tx_hash)
+            tx_hash=str(tx_hash),
+            status=job.state,
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
+        if backend_tx is not None:
+            get_reservation_manager().release_tx(backend_tx.id)
+            get_wallet_leases().release_tx(backend_tx.id)
+        if isinstance(e, ChainInvalidated):
+            return SubmitResponse(
+                success=False,
+                message=f"Error submitting transaction: {str(e)}",
+                status="failed",
+                invalidated=e.tx_ids,
+            )
         import traceback
         traceback.print_exc()
         return SubmitResponse(
             success=False,
-            message=f"Error submitting transaction: {str(e)}"
+            message=f"Error submitting transaction: {str(e)}",
+            status="failed",
+        )
+
+
+@app.get("/api/submit/{tx_id}")
+async def get_submit_status(tx_id: str):
+    """
+    Trạng thái của một tx đã gửi qua /api/submit: queued, submitting, retrying,
+    submitted, confirmed, failed (kèm error) hoặc dropped (không lên chain).
+    """
+    status = submission_queue.status(tx_id) if submission_queue else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Transaction not tracked")
+    return status
+
+
+def drop_invalidated_entries(tx_ids: List[str]) -> None:
+    """Tx cha bị loại -> reference token optimistic của cả chuỗi không còn hợp lệ."""
+    if not token_index:
+        return
+    invalidated = set(tx_ids)
+    for entry in token_index.entries():
+        if entry.ref.split("#", 1)[0] in invalidated:
+            token_index.remove_ref(entry.ref)
+
+
+def metadata_from_datum(datum: CIP68Datum) -> Dict[str, str]:
+    """Convert metadata trong datum (bytes keys / values) sang strings."""
+    metadata = {}
+    for k, v in datum.metadata.items():
+        # Decode key
+        key = k.decode('utf-8') if isinstance(k, bytes) else str(k)
+        
+        # Decode value - handle various types
+        if isinstance(v, bytes):
+            value = v.decode('utf-8')
+        elif hasattr(v, 'to_primitive'):
+            # PlutusData object
+            prim = v.to_primitive()
+            if isinstance(prim, bytes):
+                value = prim.decode('utf-8')
+            else:
+                value = str(prim)
+        else:
+            value = str(v)
+            
+        metadata[key] = value
+    return metadata
+
+
+@app.post("/api/metadata/batch", response_model=BatchMetadataResponse)
+async def get_metadata_batch(request: BatchMetadataRequest):
+    """
+    Lấy metadata của nhiều CIP-68 NFT trong một request.
+    
+    Một lượt tra index (một lần kiểm tra freshness) cho mọi token thay vì
+    một request `/api/metadata/{token_name}` cho mỗi NFT.
+    """
+    try:
+        if not store_address:
+            raise HTTPException(status_code=500, detail="Store address not initialized")
+        
+        entries = await run_blocking(token_index.lookup_many, request.token_names)
+        results: Dict[str, MetadataResponse] = {}
+        missing = []
+        for token_name in dict.fromkeys(request.token_names):
+            entry = entries.get(token_name.encode('utf-8'))
+            if entry and entry.datum:
+                results[token_name] = MetadataResponse(
+                    success=True,
+                    message="Metadata found",
+                    metadata=metadata_from_datum(entry.datum),
+                    version=entry.datum.version,
+                )
+            else:
+                missing.append(token_name)
+                results[token_name] = MetadataResponse(success=False, message="NFT not found")
+        
+        return BatchMetadataResponse(
+            success=True,
+            message=f"{len(results) - len(missing)} of {len(results)} NFTs found",
+            results=results,
+            missing=missing,
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        return BatchMetadataResponse(
+            success=False,
+            message=f"Error fetching metadata: {str(e)}"
         )
 
 
@@ -721,69 +1783,25 @@ async def get_metadata(token_name: str):
         if not store_address:
             raise HTTPException(status_code=500, detail="Store address not initialized")
         
-        # Create asset name
-        token_name_bytes = token_name.encode('utf-8')
-        ref_asset_name = AssetName(CIP68_REFERENCE_PREFIX + token_name_bytes)
-        
         print(f"\n=== METADATA FETCH DEBUG ===")
         print(f"Token name: {token_name}")
-        print(f"Looking for ref asset: {ref_asset_name.payload.hex()}")
         
-        # Find reference token UTxO
-        utxos = chain_context.utxos(store_address)
-        print(f"Found {len(utxos)} UTxOs at store address")
-        
-        for utxo in utxos:
-            if utxo.output.amount.multi_asset:
-                for p, assets in utxo.output.amount.multi_asset.items():
-                    print(f"Policy: {p.payload.hex()}")
-                    for asset_name, qty in assets.items():
-                        print(f"  Asset: {asset_name.payload.hex()} = {qty}")
-                    
-                    if p == policy_id and ref_asset_name in assets:
-                        print(f"✅ Found matching NFT!")
-                        datum = utxo.output.datum
-                        print(f"Datum type: {type(datum)}")
-                        
-                        # If datum is RawCBOR, deserialize it
-                        if isinstance(datum, RawCBOR):
-                            try:
-                                datum = CIP68Datum.from_cbor(datum.cbor)
-                                print(f"Deserialized to CIP68Datum")
-                            except Exception as e:
-                                print(f"Failed to deserialize datum: {e}")
-                                continue
-                        
-                        if isinstance(datum, CIP68Datum):
-                            # Convert bytes keys and values to strings
-                            metadata = {}
-                            for k, v in datum.metadata.items():
-                                # Decode key
-                                key = k.decode('utf-8') if isinstance(k, bytes) else str(k)
-                                
-                                # Decode value - handle various types
-                                if isinstance(v, bytes):
-                                    value = v.decode('utf-8')
-                                elif hasattr(v, 'to_primitive'):
-                                    # PlutusData object
-                                    prim = v.to_primitive()
-                                    if isinstance(prim, bytes):
-                                        value = prim.decode('utf-8')
-                                    else:
-                                        value = str(prim)
-                                else:
-                                    value = str(v)
-                                    
-                                metadata[key] = value
-                            
-                            print(f"Metadata extracted: {metadata}")
-                            
-                            return MetadataResponse(
-                                success=True,
-                                message="Metadata found",
-                                metadata=metadata,
-                                version=datum.version
-                            )
+        # Find reference token UTxO (indexed lookup, datum đã decode sẵn)
+        entry = await run_blocking(token_index.lookup, token_name)
+        if entry and entry.datum:
+            print(f"✅ Found matching NFT at {entry.ref}")
+            datum = entry.datum
+            
+            metadata = metadata_from_datum(datum)
+            
+            print(f"Metadata extracted: {metadata}")
+            
+            return MetadataResponse(
+                success=True,
+                message="Metadata found",
+                metadata=metadata,
+                version=datum.version
+            )
         
         print(f"❌ NFT not found")
         return MetadataResponse(
@@ -798,38 +1816,74 @@ async def get_metadata(token_name: str):
         )
 
 
+def parse_owner_pkh(owner: str) -> bytes:
+    """
+    Parse owner từ query: public key hash (hex, 28 bytes) hoặc bech32 address.
+    """
+    if len(owner) == 56:
+        try:
+            return bytes.fromhex(owner)
+        except ValueError:
+            pass
+    return Address.from_primitive(owner).payment_part.to_primitive()
+
+
+def held_token_names(address: Address) -> List[bytes]:
+    """Tên gốc của các user token (222) thuộc policy của dự án trong ví."""
+    names = []
+    for utxo in chain_context.utxos(address):
+        multi_asset = utxo.output.amount.multi_asset
+        if not multi_asset or policy_id not in multi_asset:
+            continue
+        for asset_name, quantity in multi_asset[policy_id].items():
+            payload = asset_name.payload
+            if payload.startswith(CIP68_USER_PREFIX) and quantity > 0:
+                names.append(payload[len(CIP68_USER_PREFIX):])
+    return names
+
+
 @app.get("/api/tokens")
-async def list_all_tokens():
+async def list_all_tokens(
+    owner: Optional[str] = Query(None, description="Lọc theo owner trong datum (pkh hex hoặc address)"),
+    holder: Optional[str] = Query(None, description="Lọc theo ví đang giữ user token (address)"),
+):
     """
-    List all CIP-68 tokens.
+    List CIP-68 tokens.
+    
+    - Không có filter: toàn bộ reference token tại store
+    - owner=: token có owner trong datum (secondary index owner -> tokens)
+    - holder=: token mà ví đang giữ user token (222)
     """
     try:
         if not store_address:
             raise HTTPException(status_code=500, detail="Store address not initialized")
         
-        tokens = []
-        utxos = chain_context.utxos(store_address)
+        # Đọc từ reference token index (không quét store address)
+        if owner:
+            entries = await run_blocking(token_index.lookup_owner, parse_owner_pkh(owner))
+        else:
+            entries = await run_blocking(token_index.entries)
+        
+        if holder:
+            held_names = await run_blocking(held_token_names, Address.from_primitive(holder))
+            held = await run_blocking(token_index.lookup_many, held_names)
+            if owner:
+                entries = [entry for entry in entries if entry.token_name in held]
+            else:
+                entries = list(held.values())
         
-        for utxo in utxos:
-            if utxo.output.amount.multi_asset:
-                for pid, assets in utxo.output.amount.multi_asset.items():
-                    if pid == policy_id:
-                        for asset_name in assets.keys():
-                            # Check if it's a reference token
-                            if asset_name.payload.startswith(CIP68_REFERENCE_PREFIX):
-                                token_name = asset_name.payload[4:].decode('utf-8')
-                                datum = utxo.output.datum
-                                
-                                token_info = {
-                                    'token_name': token_name,
-                                    'policy_id': FIXED_POLICY_ID,
-                                }
-                                
-                                if isinstance(datum, CIP68Datum):
-                                    token_info['owner'] = datum.owner.hex()
-                                    token_info['version'] = datum.version
-                                
-                                tokens.append(token_info)
+        tokens = []
+        for entry in entries:
+            token_info = {
+                'token_name': entry.token_name.decode('utf-8'),
+                'policy_id': FIXED_POLICY_ID,
+            }
+            
+            if entry.datum:
+                token_info['owner'] = entry.datum.owner.hex()
+                token_info['version'] = entry.datum.version
+            
+            tokens.append(token_info)
         
         return {
             "success": True,
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Bulk Mint CIP-68 Collection
+===========================
+Mint nhiều CIP-68 Dynamic NFT từ một manifest CSV / JSONL.
+
+    python bulk_mint.py collection.csv
+    python bulk_mint.py collection.jsonl --checkpoint drop1.checkpoint.jsonl
+
+Manifest:
+- CSV: header `token_name,description`
+- JSONL: mỗi dòng `{"token_name": "...", "description": "..."}`
+
+Tiến trình được ghi vào checkpoint (mặc định <manifest>.checkpoint.jsonl);
+chạy lại cùng lệnh sau khi bị ngắt -> tiếp tục, không mint trùng.
+"""
+
+import argparse
+import os
+import sys
+import json
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from offchain.cip68_operations import (
+    get_chain_context,
+    get_wallet_from_seed,
+    mint_cip68_bulk,
+)
+from offchain.cip68_batch import DEFAULT_MAX_BATCH_ITEMS
+from offchain.cip68_bulk import DEFAULT_CHUNK_SIZE
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk mint CIP-68 tokens from a CSV / JSONL manifest")
+    parser.add_argument("manifest", help="File .csv hoặc .jsonl (token_name, description)")
+    parser.add_argument("--checkpoint", help="File checkpoint (mặc định: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--max-items", type=int, default=DEFAULT_MAX_BATCH_ITEMS,
+                        help="Số cặp token tối đa mỗi transaction")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Số item đọc từ manifest mỗi lượt")
+    parser.add_argument("--report", help="Ghi report (JSON) ra file")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("BULK MINT: CIP-68 Dynamic NFT")
+    print("=" * 60)
+
+    # Load wallet
+    seed_phrase = os.getenv("SEED_PHRASE")
+    if not seed_phrase:
+        print("ERROR: SEED_PHRASE không tìm thấy trong .env")
+        return 1
+
+    payment_skey, payment_vkey, stake_skey, stake_vkey, address = get_wallet_from_seed(seed_phrase)
+    print(f"\nWallet address: {address}")
+    print(f"Manifest: {args.manifest}")
+    print("-" * 60)
+
+    context = get_chain_context()
+
+    def on_submitted(tx_hash, token_names):
+        print(f"  {tx_hash}  {len(token_names)} tokens ({token_names[0]} .. {token_names[-1]})")
+
+    report = mint_cip68_bulk(
+        context=context,
+        payment_skey=payment_skey,
+        payment_vkey=payment_vkey,
+        owner_address=address,
+        manifest_path=args.manifest,
+        checkpoint_path=args.checkpoint,
+        max_items=args.max_items,
+        chunk_size=args.chunk_size,
+        on_submitted=on_submitted,
+    )
+
+    print("\n" + "=" * 60)
+    print(f"Items in manifest: {report['items']}")
+    print(f"Minted:            {report['minted']} in {report['transactions']} transactions")
+    print(f"Skipped (done):    {report['skipped']}")
+    print(f"Resubmitted:       {report['resubmitted']}")
+    print(f"Rejected:          {len(report['rejected'])}")
+    print(f"Failed:            {len(report['failed'])}")
+    if report["unconfirmed"]:
+        print(f"Unconfirmed:       {len(report['unconfirmed'])} (kiểm tra trên explorer trước khi mint lại)")
+    print(f"Elapsed:           {report['elapsed']:.1f}s")
+    print(f"Throughput:        {report['tx_per_s']:.2f} tx/s, {report['items_per_s']:.2f} items/s")
+    print("=" * 60)
+
+    for name, reason in list(report["rejected"].items()) + list(report["failed"].items()):
+        print(f"  {name}: {reason}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.report}")
+
+    return 0 if not report["failed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Deploy CIP-68 Reference Scripts
+===============================
+Khóa cip68_mint và cip68_store trong reference-script UTxO, sau đó mint /
+update / burn (off-chain và backend) dùng reference inputs thay vì đính kèm
+script trong mỗi tx.
+
+    python deploy_reference_scripts.py
+    python deploy_reference_scripts.py --report-only --token MyNFT001
+
+Vị trí UTxO được ghi vào smart_contract/reference_scripts.json (hoặc
+REFERENCE_SCRIPTS_PATH). Sau khi deploy, script in size và phí của mỗi loại
+tx khi build với script inline và với reference scripts.
+"""
+
+import argparse
+import os
+import sys
+import json
+from dotenv import load_dotenv
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from offchain.cip68_operations import (
+    deploy_reference_scripts,
+    get_chain_context,
+    get_wallet_from_seed,
+    reference_script_savings,
+)
+
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deploy CIP-68 scripts as reference scripts")
+    parser.add_argument("--path", help="File deploy (mặc định: smart_contract/reference_scripts.json)")
+    parser.add_argument("--report-only", action="store_true",
+                        help="Không deploy, chỉ so sánh với reference scripts đã deploy")
+    parser.add_argument("--token", help="Token của ví để đo update và burn")
+    parser.add_argument("--report", help="Ghi report (JSON) ra file")
+    args = parser.parse_args()
+    if args.path:
+        os.environ["REFERENCE_SCRIPTS_PATH"] = args.path
+
+    print("=" * 60)
+    print("DEPLOY: CIP-68 Reference Scripts")
+    print("=" * 60)
+
+    # Load wallet
+    seed_phrase = os.getenv("SEED_PHRASE")
+    if not seed_phrase:
+        print("ERROR: SEED_PHRASE không tìm thấy trong .env")
+        return 1
+
+    payment_skey, payment_vkey, stake_skey, stake_vkey, address = get_wallet_from_seed(seed_phrase)
+    print(f"\nWallet address: {address}")
+    print("-" * 60)
+
+    context = get_chain_context()
+
+    if not args.report_only:
+        result = deploy_reference_scripts(
+            context=context,
+            payment_skey=payment_skey,
+            payment_vkey=payment_vkey,
+            owner_address=address,
+        )
+        print(f"\nLock address:  {result['lock_address']}")
+        print(f"Mint script:   {result['mint']['ref']} ({result['mint']['script_bytes']} bytes)")
+        print(f"Store script:  {result['store']['ref']} ({result['store']['script_bytes']} bytes)")
+        print(f"Locked:        {result['locked_lovelace'] / 1_000_000:.2f} ADA")
+        print(f"Saved to:      {result['path']}")
+
+    report = reference_script_savings(context, address, token_name=args.token)
+
+    print("\n" + "=" * 60)
+    print(f"{'tx type':<8} {'inline':>16} {'reference':>16} {'saved':>16}")
+    for tx_type, row in report.items():
+        inline, reference = row["inline"], row["reference"]
+        print(f"{tx_type:<8} {inline['size']:>10} bytes {reference['size']:>10} bytes "
+              f"{row['size_saved']:>10} bytes")
+        print(f"{'':<8} {inline['fee']:>9} lovelace {reference['fee']:>9} lovelace "
+              f"{row['fee_saved']:>9} lovelace")
+    print("=" * 60)
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to: {args.report}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
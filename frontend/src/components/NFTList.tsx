@@ -33,6 +33,8 @@ export default function NFTList({ walletAddress, scriptInfo, setTxStatus }: NFTL
   const [isLoadingMetadata, setIsLoadingMetadata] = useState(false);
 
   const CIP68_REFERENCE_PREFIX = '000643b0';
+  // Số token tối đa mỗi request /api/metadata/batch (max_length của backend)
+  const METADATA_BATCH_SIZE = 1000;
   const CIP68_USER_PREFIX = '000de140';
   
   // Fixed Policy ID from platform (from cip68_utils.py)
@@ -99,16 +101,47 @@ export default function NFTList({ walletAddress, scriptInfo, setTxStatus }: NFTL
     const userTokens = assetList.filter(a => a.type === 'user');
     if (userTokens.length === 0) return;
     
+    const missing = userTokens.filter(a => !metadataCache[`${a.policy_id}-${a.token_name}`]);
+    if (missing.length === 0) return;
+    
     setIsLoadingMetadata(true);
-    const metadataPromises = userTokens.map(async (asset) => {
-      const cacheKey = `${asset.policy_id}-${asset.token_name}`;
-      if (!metadataCache[cacheKey]) {
-        return fetchMetadata(asset.policy_id, asset.token_name || '');
+    try {
+      // Một request cho mỗi METADATA_BATCH_SIZE NFT thay vì một request
+      // /api/metadata/{tokenName} mỗi NFT
+      const tokenNames = Array.from(new Set(missing.map(a => a.token_name || '')));
+      const chunks: string[][] = [];
+      for (let i = 0; i < tokenNames.length; i += METADATA_BATCH_SIZE) {
+        chunks.push(tokenNames.slice(i, i + METADATA_BATCH_SIZE));
       }
-    });
-    
-    await Promise.all(metadataPromises);
-    setIsLoadingMetadata(false);
+      const responses = await Promise.all(chunks.map(async (chunk) => {
+        const response = await fetch('http://localhost:8000/api/metadata/batch', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ token_names: chunk }),
+        });
+        return response.json();
+      }));
+      const results: Record<string, any> = {};
+      for (const data of responses) {
+        if (data.success) Object.assign(results, data.results);
+      }
+      
+      const loaded: Record<string, NFTMetadata> = {};
+      for (const asset of missing) {
+        const result = results[asset.token_name || ''];
+        if (result && result.success && result.metadata) {
+          loaded[`${asset.policy_id}-${asset.token_name}`] = {
+            description: result.metadata.description || 'No description',
+            version: result.version || 0,
+          };
+        }
+      }
+      setMetadataCache(prev => ({ ...prev, ...loaded }));
+    } catch (error) {
+      console.error('Error fetching metadata:', error);
+    } finally {
+      setIsLoadingMetadata(false);
+    }
   };
 
   useEffect(() => {
@@ -25,19 +25,117 @@ from .cip68_utils import (
     get_fixed_store_address,
     load_mint_script,
     load_store_script,
+    load_script_registry,
+    ScriptRegistry,
     extract_owner_from_datum,
 )
 
+from .cip68_cache import (
+    BloomFilter,
+    DatumCache,
+    NegativeCache,
+    get_datum_cache,
+)
+
+from .cip68_context import (
+    CachedChainContext,
+    ChainInvalidated,
+    ExUnitsCache,
+    ProtocolParamProvider,
+    SingleFlight,
+)
+
+from .cip68_async_context import AsyncBlockFrostChainContext
+
+from .cip68_index import (
+    IndexEntry,
+    ReferenceTokenIndex,
+    decode_cip68_datum,
+    get_reference_index,
+)
+
+from .cip68_indexer import (
+    ChainPoint,
+    ChainEvent,
+    ChainDataSource,
+    FixtureDataSource,
+    BlockFrostDataSource,
+    ChainFollower,
+)
+
+from .cip68_snapshot import IndexSnapshot, SnapshotReplica
+
+from .cip68_shared import LeaderLock, SharedCache
+
+from .cip68_reservations import (
+    Reservation,
+    ReservationConflict,
+    ReservationManager,
+    WalletInputLeases,
+    get_reservation_manager,
+    get_wallet_leases,
+    reserve_reference_entry,
+)
+
+from .cip68_batch import (
+    BatchEntry,
+    BatchGroup,
+    BatchPlan,
+    bind_batch_reservations,
+    build_burn_batch,
+    build_mint_batch,
+    build_update_batch,
+    check_mint_items,
+    pack_batches,
+    reserve_batch_entries,
+    resolve_burn_entries,
+    user_token_utxos,
+)
+
+from .cip68_refscripts import (
+    ReferenceScripts,
+    build_deploy_tx,
+    compare_script_modes,
+    get_reference_scripts,
+    reference_script_address,
+    script_source,
+)
+
+from .cip68_submit import (
+    QueueFull,
+    QueueStopped,
+    SubmissionQueue,
+    SubmitJob,
+    get_submission_queue,
+    is_transient,
+    submit_and_wait,
+)
+
+from .cip68_bulk import (
+    BulkMinter,
+    MintCheckpoint,
+    read_manifest,
+)
+
 from .cip68_operations import (
     get_chain_context,
     get_wallet_from_seed,
     get_network,
     get_scripts,
     mint_cip68_token,
+    mint_cip68_batch,
+    mint_cip68_chain,
+    mint_cip68_bulk,
+    deploy_reference_scripts,
+    reference_script_savings,
     update_metadata,
+    update_metadata_batch,
     burn_cip68_token,
+    burn_cip68_batch,
     get_cip68_metadata,
+    get_cip68_metadata_batch,
     list_all_tokens,
+    list_tokens_by_owner,
 )
 
 __all__ = [
@@ -60,16 +158,106 @@ __all__ = [
     'get_fixed_store_address',
     'load_mint_script',
     'load_store_script',
+    'load_script_registry',
+    'ScriptRegistry',
     'extract_owner_from_datum',
     
+    # Caches
+    'BloomFilter',
+    'DatumCache',
+    'NegativeCache',
+    'get_datum_cache',
+    'CachedChainContext',
+    'ChainInvalidated',
+    'ExUnitsCache',
+    'ProtocolParamProvider',
+    'SingleFlight',
+    
+    # Chain context
+    'AsyncBlockFrostChainContext',
+    
+    # Index
+    'IndexEntry',
+    'ReferenceTokenIndex',
+    'decode_cip68_datum',
+    'get_reference_index',
+    
+    # Indexer
+    'ChainPoint',
+    'ChainEvent',
+    'ChainDataSource',
+    'FixtureDataSource',
+    'BlockFrostDataSource',
+    'ChainFollower',
+    'IndexSnapshot',
+    'SnapshotReplica',
+    
+    # Multi-worker
+    'LeaderLock',
+    'SharedCache',
+    
+    # Reservations
+    'Reservation',
+    'ReservationConflict',
+    'ReservationManager',
+    'WalletInputLeases',
+    'get_reservation_manager',
+    'get_wallet_leases',
+    'reserve_reference_entry',
+    
+    # Batch
+    'BatchEntry',
+    'BatchGroup',
+    'BatchPlan',
+    'bind_batch_reservations',
+    'build_burn_batch',
+    'build_mint_batch',
+    'build_update_batch',
+    'check_mint_items',
+    'pack_batches',
+    'reserve_batch_entries',
+    'resolve_burn_entries',
+    'user_token_utxos',
+    
+    # Reference scripts
+    'ReferenceScripts',
+    'build_deploy_tx',
+    'compare_script_modes',
+    'get_reference_scripts',
+    'reference_script_address',
+    'script_source',
+    
+    # Submission queue
+    'QueueFull',
+    'QueueStopped',
+    'SubmissionQueue',
+    'SubmitJob',
+    'get_submission_queue',
+    'is_transient',
+    'submit_and_wait',
+    
+    # Bulk mint
+    'BulkMinter',
+    'MintCheckpoint',
+    'read_manifest',
+    
     # Operations
     'get_chain_context',
     'get_wallet_from_seed',
     'get_network',
     'get_scripts',
     'mint_cip68_token',
+    'mint_cip68_batch',
+    'mint_cip68_chain',
+    'mint_cip68_bulk',
+    'deploy_reference_scripts',
+    'reference_script_savings',
     'update_metadata',
+    'update_metadata_batch',
     'burn_cip68_token',
+    'burn_cip68_batch',
     'get_cip68_metadata',
+    'get_cip68_metadata_batch',
     'list_all_tokens',
+    'list_tokens_by_owner',
 ]
@@ -0,0 +1,353 @@
+"""
+CIP-68 Async Chain Context
+==========================
+ChainContext nói chuyện với BlockFrost qua `httpx.AsyncClient`:
+
+- Một connection pool keep-alive dùng chung cho mọi request
+  (giới hạn bởi `max_connections`)
+- `utxos(address)` nhiều trang: trang đầu được fetch trước, nếu đầy thì
+  các trang tiếp theo được fetch song song theo từng nhóm `page_concurrency`
+- Event loop riêng chạy trong một background thread; adapter chỉ có API
+  ChainContext sync - coroutine được chạy trên loop riêng, thread gọi chỉ
+  chờ kết quả. Backend gọi qua CachedChainContext trong thread pool
+  (run_blocking) nên không cần API async riêng
+
+Chạy được với bất kỳ server nào trả JSON dạng BlockFrost, vd.
+BlockFrostStandIn trong `cip68_standin.py` để test / benchmark offline.
+"""
+
+import asyncio
+import threading
+from fractions import Fraction
+from typing import Optional, Dict, Any, List, Union
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - httpx là optional dependency
+    httpx = None
+
+from pycardano import (
+    Address,
+    ChainContext,
+    ExecutionUnits,
+    GenesisParameters,
+    Network,
+    NativeScript,
+    PlutusScript,
+    ProtocolParameters,
+    TransactionFailedException,
+    UTxO,
+)
+from pycardano.backend.base import ALONZO_COINS_PER_UTXO_WORD
+
+from .cip68_indexer import utxo_from_blockfrost
+
+
+# Số connection tối đa trong pool HTTP
+DEFAULT_MAX_CONNECTIONS = 20
+
+# Số trang UTxO được fetch song song cho một address
+DEFAULT_PAGE_CONCURRENCY = 5
+
+# Số item mỗi trang (tối đa của BlockFrost)
+DEFAULT_PAGE_SIZE = 100
+
+# Timeout (giây) của một HTTP request
+DEFAULT_HTTP_TIMEOUT = 30.0
+
+
+class BlockFrostHTTPError(Exception):
+    """Lỗi HTTP từ BlockFrost (hoặc stand-in)."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def protocol_params_from_blockfrost(params: Dict[str, Any]) -> ProtocolParameters:
+    """
+    Tạo ProtocolParameters từ JSON `/epochs/latest/parameters`.
+
+    Mapping giống BlockFrostChainContext của pycardano.
+    """
+    return ProtocolParameters(
+        min_fee_constant=int(params["min_fee_b"]),
+        min_fee_coefficient=int(params["min_fee_a"]),
+        max_block_size=int(params["max_block_size"]),
+        max_tx_size=int(params["max_tx_size"]),
+        max_block_header_size=int(params["max_block_header_size"]),
+        key_deposit=int(params["key_deposit"]),
+        pool_deposit=int(params["pool_deposit"]),
+        pool_influence=Fraction(params["a0"]),
+        monetary_expansion=Fraction(params["rho"]),
+        treasury_expansion=Fraction(params["tau"]),
+        decentralization_param=Fraction(params.get("decentralisation_param") or 0),
+        extra_entropy=params.get("extra_entropy"),
+        protocol_major_version=int(params["protocol_major_ver"]),
+        protocol_minor_version=int(params["protocol_minor_ver"]),
+        min_utxo=int(params["min_utxo"]),
+        min_pool_cost=int(params["min_pool_cost"]),
+        price_mem=Fraction(params["price_mem"]),
+        price_step=Fraction(params["price_step"]),
+        max_tx_ex_mem=int(params["max_tx_ex_mem"]),
+        max_tx_ex_steps=int(params["max_tx_ex_steps"]),
+        max_block_ex_mem=int(params["max_block_ex_mem"]),
+        max_block_ex_steps=int(params["max_block_ex_steps"]),
+        max_val_size=int(params["max_val_size"]),
+        collateral_percent=int(params["collateral_percent"]),
+        max_collateral_inputs=int(params["max_collateral_inputs"]),
+        coins_per_utxo_word=int(params.get("coins_per_utxo_word") or 0)
+        or ALONZO_COINS_PER_UTXO_WORD,
+        coins_per_utxo_byte=int(params["coins_per_utxo_size"]),
+        cost_models=params.get("cost_models") or {},
+        maximum_reference_scripts_size={"bytes": 200000},
+        min_fee_reference_scripts={
+            "base": params.get("min_fee_ref_script_cost_per_byte") or 0,
+            "range": 200000,
+            "multiplier": 1,
+        },
+    )
+
+
+class AsyncBlockFrostChainContext(ChainContext):
+    """
+    ChainContext async trên pooled HTTP client.
+
+    Không tự cache protocol params - bọc bởi CachedChainContext
+    (ProtocolParamProvider) khi dùng trong backend.
+    """
+
+    def __init__(
+        self,
+        project_id: str,
+        base_url: str,
+        network: Optional[Network] = None,
+        api_version: str = "v0",
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        page_concurrency: int = DEFAULT_PAGE_CONCURRENCY,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        timeout: float = DEFAULT_HTTP_TIMEOUT,
+    ):
+        if httpx is None:
+            raise ImportError("AsyncBlockFrostChainContext requires httpx (pip install httpx)")
+
+        self.project_id = project_id
+        self.base_url = base_url.rstrip("/")
+        self.api_version = api_version
+        if network is None:
+            network = Network.MAINNET if "mainnet" in self.base_url else Network.TESTNET
+        self._network = network
+        self.max_connections = max_connections
+        self.page_concurrency = max(1, page_concurrency)
+        self.page_size = page_size
+        self.timeout = timeout
+
+        self._epoch_info: Optional[Dict[str, Any]] = None
+        self._scripts: Dict[str, Any] = {}
+        self._api = None
+
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "pages": 0,
+        }
+        self._stats_lock = threading.Lock()
+
+        # Event loop riêng cho HTTP client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="chain-http", daemon=True
+        )
+        self._thread.start()
+        self._client = self._run(self._open_client())
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    async def _open_client(self):
+        return httpx.AsyncClient(
+            base_url=f"{self.base_url}/{self.api_version}" if self.api_version else self.base_url,
+            headers={"project_id": self.project_id or ""},
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+            timeout=self.timeout,
+        )
+
+    def _run(self, coro):
+        """Chạy coroutine trên loop riêng và chờ kết quả (gọi từ code sync)."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("Sync ChainContext API called from the HTTP event loop")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self) -> None:
+        """Đóng HTTP client và dừng event loop."""
+        if not self._loop.is_running():
+            return
+        self._run(self._client.aclose())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    async def _request(self, method: str, path: str, **kwargs):
+        with self._stats_lock:
+            self.stats["requests"] += 1
+        response = await self._client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except Exception:
+                message = response.text
+            raise BlockFrostHTTPError(response.status_code, message)
+        return response.json()
+
+    async def _get(self, path: str, **params):
+        return await self._request("GET", path, params=params or None)
+
+    async def _fetch_utxos(self, address: str) -> List[UTxO]:
+        async def page(number: int) -> List[Dict[str, Any]]:
+            with self._stats_lock:
+                self.stats["pages"] += 1
+            try:
+                return await self._get(
+                    f"/addresses/{address}/utxos", page=number, count=self.page_size
+                )
+            except BlockFrostHTTPError as e:
+                if e.status_code == 404:
+                    return []
+                raise
+
+        results = await page(1)
+        next_page = 2
+        last = results
+        while len(last) >= self.page_size:
+            numbers = range(next_page, next_page + self.page_concurrency)
+            pages = await asyncio.gather(*(page(n) for n in numbers))
+            for items in pages:
+                results.extend(items)
+                last = items
+                if len(items) < self.page_size:
+                    break
+            next_page += self.page_concurrency
+
+        parsed_address = Address.from_primitive(address)
+        utxos = []
+        for item in results:
+            utxo = utxo_from_blockfrost(item["tx_hash"], item, parsed_address)
+            script_hash = item.get("reference_script_hash")
+            if script_hash:
+                utxo.output.script = await self._fetch_script(script_hash)
+            utxos.append(utxo)
+        return utxos
+
+    async def _fetch_script(self, script_hash: str):
+        script = self._scripts.get(script_hash)
+        if script is not None:
+            return script
+        info = await self._get(f"/scripts/{script_hash}")
+        script_type = info["type"]
+        if script_type.lower().startswith("plutusv"):
+            cbor = (await self._get(f"/scripts/{script_hash}/cbor"))["cbor"]
+            script = PlutusScript.from_version(int(script_type[-1]), bytes.fromhex(cbor))
+        else:
+            script_json = (await self._get(f"/scripts/{script_hash}/json"))["json"]
+            script = NativeScript.from_dict(script_json)
+        self._scripts[script_hash] = script
+        return script
+
+    async def _submit(self, cbor: bytes) -> str:
+        try:
+            return await self._request(
+                "POST", "/tx/submit",
+                content=cbor,
+                headers={"Content-Type": "application/cbor"},
+            )
+        except BlockFrostHTTPError as e:
+            raise TransactionFailedException(
+                f"Failed to submit transaction. Error code: {e.status_code}. "
+                f"Error message: {e.message}"
+            ) from e
+
+    async def _evaluate(self, cbor: bytes) -> Dict[str, ExecutionUnits]:
+        result = await self._request(
+            "POST", "/utils/txs/evaluate",
+            content=cbor.hex(),
+            headers={"Content-Type": "application/cbor"},
+        )
+        evaluation = (result.get("result") or {}).get("EvaluationResult")
+        if evaluation is None:
+            raise TransactionFailedException(result)
+        return {
+            key: ExecutionUnits(units["memory"], units["steps"])
+            for key, units in evaluation.items()
+        }
+
+    async def _epoch_latest(self) -> Dict[str, Any]:
+        self._epoch_info = await self._get("/epochs/latest")
+        return self._epoch_info
+
+    # ------------------------------------------------------------------
+    # ChainContext (sync)
+    # ------------------------------------------------------------------
+
+    @property
+    def network(self) -> Network:
+        return self._network
+
+    @property
+    def epoch(self) -> int:
+        return int(self._run(self._epoch_latest())["epoch"])
+
+    @property
+    def epoch_end_time(self) -> Optional[float]:
+        """`end_time` của epoch hiện tại (dùng bởi ProtocolParamProvider)."""
+        info = self._epoch_info or self._run(self._epoch_latest())
+        return float(info["end_time"])
+
+    @property
+    def last_block_slot(self) -> int:
+        return int(self._run(self._get("/blocks/latest"))["slot"])
+
+    @property
+    def protocol_param(self) -> ProtocolParameters:
+        return protocol_params_from_blockfrost(self._run(self._get("/epochs/latest/parameters")))
+
+    @property
+    def genesis_param(self) -> GenesisParameters:
+        params = self._run(self._get("/genesis"))
+        fields = GenesisParameters.__dataclass_fields__
+        return GenesisParameters(**{k: v for k, v in params.items() if k in fields})
+
+    @property
+    def api(self):
+        """
+        Client blockfrost-python cùng base URL - chỉ dùng cho các endpoint
+        mà adapter không bọc (vd. BlockFrostDataSource của chain follower).
+        """
+        if self._api is None:
+            from blockfrost import BlockFrostApi
+            self._api = BlockFrostApi(
+                project_id=self.project_id,
+                base_url=self.base_url,
+                api_version=self.api_version,
+            )
+        return self._api
+
+    def _utxos(self, address: str) -> List[UTxO]:
+        return self._run(self._fetch_utxos(address))
+
+    def submit_tx_cbor(self, cbor: Union[bytes, str]) -> str:
+        if isinstance(cbor, str):
+            cbor = bytes.fromhex(cbor)
+        return self._run(self._submit(cbor))
+
+    def evaluate_tx_cbor(self, cbor: Union[bytes, str]) -> Dict[str, ExecutionUnits]:
+        if isinstance(cbor, str):
+            cbor = bytes.fromhex(cbor)
+        return self._run(self._evaluate(cbor))
@@ -0,0 +1,644 @@
+"""
+CIP-68 Batch Operations
+=======================
+Đóng gói nhiều thao tác CIP-68 vào ít transaction nhất có thể.
+
+Mint từng cặp reference / user token một tx -> collection 5.000 item cần
+5.000 tx, 5.000 phí và 5.000 lần ký ví. Batch mint gom nhiều cặp vào một
+tx, giới hạn bởi protocol params:
+
+- `max_tx_size` (bytes của tx đã serialize, kể cả witness)
+- `max_tx_ex_mem` / `max_tx_ex_steps` (tổng execution units của redeemer)
+
+Packing (`pack_batches`): build thử một nhóm, đo size và ex-units sau khi
+evaluate; vượt giới hạn -> thu nhỏ nhóm (theo tỉ lệ đã đo, hoặc chia đôi
+khi builder từ chối), vừa -> nhóm kế tiếp bắt đầu từ kích thước ước lượng
+theo phần budget còn dư. Mỗi nhóm được build đầy đủ bởi TransactionBuilder
+nên phí, collateral và min-ADA luôn chính xác.
+
+Validator path khi mint nhiều cặp:
+- Minting policy chạy MỘT lần cho mỗi tx (một redeemer cho policy). Redeemer
+  `MintToken(token_name)` chỉ yêu cầu token được nêu tên có đúng 1 reference
+  và 1 user token -> dùng redeemer của item đầu tiên trong nhóm
+- Các item còn lại được kiểm tra off-chain trước khi build (`check_mint_items`):
+  tên hợp lệ, không trùng trong batch, chưa tồn tại trong store
+
+Validator path khi update nhiều token:
+- Store validator chạy cho MỖI input -> mỗi reference UTxO có redeemer
+  `UpdateMetadata` riêng và một output riêng về store address (reference
+  token + datum mới, version + 1); script chỉ nằm một lần trong witness set
+- Reference UTxO của mọi token được reserve trước khi build (một lần tra
+  index cho cả batch); sau packing reservation của các token cùng tx được
+  gộp và bind với tx id như update đơn lẻ
+
+Validator path khi burn nhiều cặp:
+- Mỗi reference UTxO có redeemer `BurnReference` riêng (store validator chỉ
+  cần chữ ký owner); minting policy chạy một lần với `BurnToken` của item
+  đầu tiên (yêu cầu -1 reference và -1 user token của token đó)
+- Token name được resolve trong một lượt: index cho reference UTxO, một lần
+  đọc UTxO của ví cho user token (`resolve_burn_entries`)
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pycardano import (
+    Address,
+    Asset,
+    ExecutionUnits,
+    MultiAsset,
+    PlutusV3Script,
+    Redeemer,
+    ScriptHash,
+    Transaction,
+    TransactionBody,
+    TransactionBuilder,
+    TransactionOutput,
+    UTxO,
+    Value,
+    min_lovelace_post_alonzo,
+)
+from pycardano.exception import InvalidTransactionException, UTxOSelectionException
+
+from .cip68_index import IndexEntry, ReferenceTokenIndex, utxo_ref
+from .cip68_refscripts import ReferenceScripts, script_source
+from .cip68_reservations import (
+    Reservation,
+    ReservationConflict,
+    ReservationManager,
+    get_reservation_manager,
+)
+from .cip68_utils import (
+    CIP68_USER_PREFIX,
+    CIP68Datum,
+    BurnReference,
+    BurnToken,
+    MintToken,
+    UpdateMetadata,
+    create_cip68_asset_names,
+    create_cip68_datum,
+)
+
+
+# Số item tối đa trong một tx (kích thước nhóm đầu tiên được thử)
+DEFAULT_MAX_BATCH_ITEMS = 64
+
+# Phần của max_tx_size / max_tx_ex_* mà một batch tx được dùng (chừa chỗ cho
+# vkey witness của ví và sai lệch ex-units giữa evaluate và lúc chạy thật)
+DEFAULT_BATCH_BUDGET = 0.9
+
+# Độ dài tối đa (bytes) của token name: asset name 32 bytes trừ 4 bytes prefix CIP-68
+MAX_TOKEN_NAME_BYTES = 28
+
+# Lovelace tối thiểu của mỗi output (như mint đơn lẻ), tăng theo min-UTxO nếu datum lớn
+DEFAULT_OUTPUT_COIN = 2_000_000
+
+
+# ============================================================================
+# PACKING
+# ============================================================================
+
+@dataclass
+class BatchGroup:
+    """Một transaction của batch."""
+    items: List[Any]
+    builder: TransactionBuilder
+    tx_body: TransactionBody
+    size: int
+    ex_units: ExecutionUnits
+
+    @property
+    def tx_id(self) -> str:
+        return str(self.tx_body.id)
+
+    def transaction(self) -> Transaction:
+        """Unsigned transaction (witness set chưa có vkey - ví ký sau)."""
+        return Transaction(self.tx_body, self.builder.build_witness_set())
+
+
+@dataclass
+class BatchPlan:
+    """Kết quả packing: các nhóm đã build và phần chưa đóng gói được."""
+    groups: List[BatchGroup] = field(default_factory=list)
+    deferred: List[Any] = field(default_factory=list)
+    error: Optional[str] = None
+    builds: int = 0
+
+    def stats(self) -> Dict[str, Any]:
+        items = sum(len(g.items) for g in self.groups)
+        return {
+            "transactions": len(self.groups),
+            "items": items,
+            "deferred": len(self.deferred),
+            "builds": self.builds,
+            "items_per_tx": round(items / len(self.groups), 2) if self.groups else 0.0,
+        }
+
+
+def total_ex_units(builder: TransactionBuilder) -> ExecutionUnits:
+    """Tổng execution units của các redeemer trong builder (sau build)."""
+    redeemers = builder.redeemers()
+    units = (
+        [r.ex_units for r in redeemers] if isinstance(redeemers, list)
+        else [value.ex_units for value in redeemers.values()]
+    )
+    units = [u for u in units if u is not None]
+    return ExecutionUnits(sum(u.mem for u in units), sum(u.steps for u in units))
+
+
+def _usage(
+    builder: TransactionBuilder, tx_body: TransactionBody, budget: float
+) -> Tuple[float, int, ExecutionUnits]:
+    """
+    Tỉ lệ sử dụng budget của tx (> 1 nghĩa là vượt).
+
+    Returns:
+        (usage, size, ex_units)
+    """
+    params = builder.context.protocol_param
+    size = len(Transaction(tx_body, builder.build_witness_set()).to_cbor())
+    ex_units = total_ex_units(builder)
+    usage = size / params.max_tx_size
+    if params.max_tx_ex_mem:
+        usage = max(usage, ex_units.mem / params.max_tx_ex_mem)
+    if params.max_tx_ex_steps:
+        usage = max(usage, ex_units.steps / params.max_tx_ex_steps)
+    return usage / budget, size, ex_units
+
+
+def pack_batches(
+    items: Sequence[Any],
+    make_builder: Callable[[List[Any]], TransactionBuilder],
+    build: Callable[[TransactionBuilder], TransactionBody],
+    release: Optional[Callable[[TransactionBody], None]] = None,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+    budget: float = DEFAULT_BATCH_BUDGET,
+    inputs_of: Optional[Callable[[Any], Iterable[str]]] = None,
+) -> BatchPlan:
+    """
+    Chia items thành các transaction lớn nhất vừa giới hạn của protocol.
+
+    Args:
+        items: Các item theo thứ tự (giữ nguyên thứ tự trong các nhóm)
+        make_builder: Tạo TransactionBuilder cho một nhóm item
+        build: Build builder -> tx_body (vd. `WalletInputLeases.build`)
+        release: Gọi với tx_body của nhóm bị loại vì vượt budget, và với mọi
+            tx đã build nếu có exception khác (vd. trả lease)
+        max_items: Số item tối đa mỗi tx
+        budget: Phần của giới hạn protocol được dùng
+        inputs_of: UTxO refs mà item phải spend (vd. UTxO chứa user token).
+            Item có input đã bị một nhóm trước spend -> deferred (cần change
+            output của tx đó, build lại sau khi tx được submit)
+
+    Returns:
+        BatchPlan. Nhóm một item vẫn không build được (vd. ví hết UTxO)
+        -> dừng, các item còn lại nằm trong `deferred` kèm `error`
+    """
+    plan = BatchPlan()
+    remaining = list(items)
+    spent_elsewhere: List[Any] = []
+    # Kích thước nhỏ nhất đã biết là vượt giới hạn size / ex-units (trừ 1)
+    limit = max(1, max_items)
+    guess = limit
+
+    # tx_body vừa build, chưa thuộc nhóm nào và chưa được release
+    unreleased: Optional[TransactionBody] = None
+    try:
+        while remaining:
+            n = min(guess, len(remaining))
+            while True:
+                chunk = remaining[:n]
+                builder = make_builder(chunk)
+                plan.builds += 1
+                try:
+                    tx_body = unreleased = build(builder)
+                except (InvalidTransactionException, UTxOSelectionException) as e:
+                    if n == 1:
+                        plan.deferred = remaining + spent_elsewhere
+                        plan.error = str(e)
+                        return plan
+                    if isinstance(e, InvalidTransactionException):
+                        limit = n - 1
+                    n //= 2
+                    continue
+
+                usage, size, ex_units = _usage(builder, tx_body, budget)
+                if usage <= 1:
+                    break
+                unreleased = None
+                if release is not None:
+                    release(tx_body)
+                if n == 1:
+                    plan.deferred = remaining + spent_elsewhere
+                    plan.error = f"Single item exceeds the tx budget ({usage:.2f}x)"
+                    return plan
+                limit = n - 1
+                n = max(1, min(n - 1, int(n / usage)))
+
+            plan.groups.append(BatchGroup(chunk, builder, tx_body, size, ex_units))
+            unreleased = None
+            remaining = remaining[n:]
+            guess = max(1, min(limit, max(n, int(n / usage))))
+            if inputs_of is not None:
+                spent = {utxo_ref(tx_input) for tx_input in tx_body.inputs}
+                spent_elsewhere += [item for item in remaining if spent & set(inputs_of(item))]
+                remaining = [item for item in remaining if not spent & set(inputs_of(item))]
+    except BaseException:
+        # Lỗi giữa chừng (vd. make_builder / evaluate) -> trả lease của mọi tx đã build
+        if release is not None:
+            for group in plan.groups:
+                release(group.tx_body)
+            if unreleased is not None:
+                release(unreleased)
+        raise
+
+    if spent_elsewhere:
+        plan.deferred = spent_elsewhere
+        plan.error = "Input spent by an earlier transaction of this batch, retry after it is submitted"
+    return plan
+
+
+# ============================================================================
+# BATCH MINT
+# ============================================================================
+
+def check_mint_items(
+    items: Sequence[Tuple[str, str]],
+    index: Optional[ReferenceTokenIndex] = None,
+) -> Tuple[List[Tuple[str, str]], Dict[str, str]]:
+    """
+    Kiểm tra off-chain các item của batch mint (validator chỉ kiểm tra
+    item được nêu trong redeemer).
+
+    Args:
+        items: [(token_name, description)]
+        index: Reference token index để loại token đã tồn tại (tùy chọn)
+
+    Returns:
+        (accepted, rejected) - rejected: token_name -> lý do
+    """
+    accepted: List[Tuple[str, str]] = []
+    rejected: Dict[str, str] = {}
+    seen = set()
+    existing = index.lookup_many(name for name, _ in items) if index is not None else {}
+
+    for token_name, description in items:
+        name = token_name.encode('utf-8')
+        if not name or len(name) > MAX_TOKEN_NAME_BYTES:
+            rejected[token_name] = f"token name must be 1-{MAX_TOKEN_NAME_BYTES} bytes"
+        elif not description:
+            rejected[token_name] = "description is empty"
+        elif name in seen:
+            rejected[token_name] = "duplicate token name in batch"
+        elif name in existing:
+            rejected[token_name] = "token already exists"
+        else:
+            seen.add(name)
+            accepted.append((token_name, description))
+    return accepted, rejected
+
+
+def _with_min_coin(output: TransactionOutput, context) -> TransactionOutput:
+    output.amount.coin = max(output.amount.coin, min_lovelace_post_alonzo(output, context))
+    return output
+
+
+def build_mint_batch(
+    context,
+    owner_address: Address,
+    items: Sequence[Tuple[str, str]],
+    mint_script: PlutusV3Script,
+    store_address: Address,
+    policy_id: ScriptHash,
+    reference_scripts: Optional[ReferenceScripts] = None,
+) -> TransactionBuilder:
+    """
+    TransactionBuilder mint nhiều cặp CIP-68 trong một tx.
+
+    - Mỗi reference token: một output đến store address với datum riêng
+    - Tất cả user token: một output đến owner
+    - Một redeemer MintToken (item đầu tiên) cho minting policy
+
+    Args:
+        context: Chain context
+        owner_address: Địa chỉ ví (owner trong datum, nhận user token, trả phí)
+        items: [(token_name, description)] đã qua check_mint_items
+        mint_script: Minting policy script
+        store_address: Store validator address
+        policy_id: Policy ID
+        reference_scripts: Reference scripts đã deploy (None -> script inline)
+
+    Returns:
+        TransactionBuilder chưa build
+    """
+    owner_pkh = owner_address.payment_part.to_primitive()
+    policy_id_bytes = bytes(policy_id)
+
+    builder = TransactionBuilder(context)
+    builder.add_input_address(owner_address)
+
+    mint_asset = Asset()
+    user_asset = Asset()
+    for token_name, description in items:
+        token_name_bytes = token_name.encode('utf-8')
+        ref_asset_name, user_asset_name = create_cip68_asset_names(token_name_bytes)
+        mint_asset[ref_asset_name] = 1
+        mint_asset[user_asset_name] = 1
+        user_asset[user_asset_name] = 1
+
+        datum = create_cip68_datum(
+            policy_id=policy_id_bytes,
+            asset_name=token_name_bytes,
+            owner_pkh=owner_pkh,
+            metadata=description,
+            version=1,
+        )
+        ref_value = Value(DEFAULT_OUTPUT_COIN, MultiAsset({policy_id: Asset({ref_asset_name: 1})}))
+        builder.add_output(
+            _with_min_coin(TransactionOutput(store_address, ref_value, datum=datum), context)
+        )
+
+    user_value = Value(DEFAULT_OUTPUT_COIN, MultiAsset({policy_id: user_asset}))
+    builder.add_output(_with_min_coin(TransactionOutput(owner_address, user_value), context))
+
+    builder.mint = MultiAsset({policy_id: mint_asset})
+    first_name = items[0][0].encode('utf-8')
+    builder.add_minting_script(
+        script_source(builder, mint_script, reference_scripts),
+        redeemer=Redeemer(MintToken(token_name=first_name)),
+    )
+    builder.required_signers = [owner_address.payment_part]
+    return builder
+
+
+# ============================================================================
+# BATCH UPDATE
+# ============================================================================
+
+@dataclass
+class BatchEntry:
+    """Một reference token đã được tra index và reserve cho batch."""
+    token_name: str
+    entry: IndexEntry
+    reservation: Reservation
+    description: Optional[str] = None
+    user_utxo: Optional[UTxO] = None
+
+    @property
+    def new_version(self) -> int:
+        datum = self.entry.datum
+        return datum.version + 1 if isinstance(datum, CIP68Datum) else 2
+
+
+def reserve_batch_entries(
+    index: ReferenceTokenIndex,
+    items: Sequence[Tuple[str, Optional[str]]],
+    owner_pkh: bytes,
+    manager: Optional[ReservationManager] = None,
+    holder: Optional[str] = None,
+) -> Tuple[List[BatchEntry], Dict[str, str], List[str]]:
+    """
+    Tra index một lần cho cả batch, kiểm tra owner và reserve reference
+    UTxO của từng token (fail fast: token có tx khác đang chờ bị loại).
+
+    Args:
+        index: Reference token index
+        items: [(token_name, description)] (description None cho burn)
+        owner_pkh: Public key hash của owner (phải khớp owner trong datum)
+        manager: ReservationManager (mặc định: manager dùng chung)
+        holder: Người giữ (vd. địa chỉ ví)
+
+    Returns:
+        (accepted, rejected, missing) - rejected: token_name -> lý do;
+        missing: các token (cũng nằm trong rejected) không có reference token
+    """
+    manager = manager or get_reservation_manager()
+    entries = index.lookup_many(name for name, _ in items)
+    accepted: List[BatchEntry] = []
+    rejected: Dict[str, str] = {}
+    missing: List[str] = []
+    seen = set()
+
+    for token_name, description in items:
+        name = token_name.encode('utf-8')
+        entry = entries.get(name)
+        if name in seen:
+            rejected[token_name] = "duplicate token name in batch"
+            continue
+        seen.add(name)
+        if entry is None:
+            rejected[token_name] = "reference token not found"
+            missing.append(token_name)
+        elif entry.owner is not None and entry.owner != owner_pkh:
+            rejected[token_name] = "not the owner of this token"
+        else:
+            try:
+                reservation = manager.reserve([entry.ref], holder=holder)
+            except ReservationConflict:
+                rejected[token_name] = "token has another pending transaction"
+                continue
+            accepted.append(BatchEntry(token_name, entry, reservation, description))
+    return accepted, rejected, missing
+
+
+def bind_batch_reservations(
+    plan: BatchPlan, manager: Optional[ReservationManager] = None
+) -> None:
+    """
+    Sau packing: gộp reservation của các token cùng tx và bind với tx id
+    (commit / release qua /api/submit), trả lại reservation của item deferred.
+    """
+    manager = manager or get_reservation_manager()
+    for group in plan.groups:
+        merged = manager.merge(item.reservation for item in group.items)
+        if merged is not None:
+            manager.bind(merged, group.tx_body.id)
+    for item in plan.deferred:
+        manager.release(item.reservation)
+
+
+def build_update_batch(
+    context,
+    owner_address: Address,
+    items: Sequence[BatchEntry],
+    store_script: PlutusV3Script,
+    store_address: Address,
+    policy_id: ScriptHash,
+    reference_scripts: Optional[ReferenceScripts] = None,
+) -> TransactionBuilder:
+    """
+    TransactionBuilder update metadata của nhiều reference token trong một tx.
+
+    Mỗi reference UTxO được spend với redeemer UpdateMetadata riêng và trả
+    về store address với datum mới (giữ policy_id, asset_name, owner;
+    version + 1).
+
+    Args:
+        context: Chain context
+        owner_address: Địa chỉ ví owner (ký và trả phí)
+        items: BatchEntry có description mới (từ reserve_batch_entries)
+        store_script: Store validator script
+        store_address: Store validator address
+        policy_id: Policy ID
+        reference_scripts: Reference scripts đã deploy (None -> script inline)
+
+    Returns:
+        TransactionBuilder chưa build
+    """
+    owner_pkh = owner_address.payment_part.to_primitive()
+    policy_id_bytes = bytes(policy_id)
+
+    builder = TransactionBuilder(context)
+    builder.add_input_address(owner_address)
+
+    for item in items:
+        token_name_bytes = item.token_name.encode('utf-8')
+        ref_asset_name, _ = create_cip68_asset_names(token_name_bytes)
+        ref_utxo = item.entry.utxo
+        builder.add_script_input(
+            ref_utxo,
+            script_source(builder, store_script, reference_scripts),
+            redeemer=Redeemer(UpdateMetadata()),
+        )
+
+        new_datum = create_cip68_datum(
+            policy_id=policy_id_bytes,
+            asset_name=token_name_bytes,
+            owner_pkh=owner_pkh,
+            metadata=item.description,
+            version=item.new_version,
+        )
+        ref_value = Value(
+            ref_utxo.output.amount.coin, MultiAsset({policy_id: Asset({ref_asset_name: 1})})
+        )
+        builder.add_output(
+            _with_min_coin(TransactionOutput(store_address, ref_value, datum=new_datum), context)
+        )
+
+    builder.required_signers = [owner_address.payment_part]
+    return builder
+
+
+# ============================================================================
+# BATCH BURN
+# ============================================================================
+
+def user_token_utxos(utxos: Iterable[UTxO], policy_id: ScriptHash) -> Dict[bytes, UTxO]:
+    """
+    Một lượt qua UTxO của ví: token name (không prefix) -> UTxO chứa user token.
+    """
+    found: Dict[bytes, UTxO] = {}
+    for utxo in utxos:
+        multi_asset = utxo.output.amount.multi_asset
+        if not multi_asset or policy_id not in multi_asset:
+            continue
+        for asset_name in multi_asset[policy_id]:
+            if asset_name.payload.startswith(CIP68_USER_PREFIX):
+                found[asset_name.payload[len(CIP68_USER_PREFIX):]] = utxo
+    return found
+
+
+def resolve_burn_entries(
+    index: ReferenceTokenIndex,
+    wallet_utxos: Iterable[UTxO],
+    token_names: Sequence[str],
+    owner_pkh: bytes,
+    policy_id: ScriptHash,
+    manager: Optional[ReservationManager] = None,
+    holder: Optional[str] = None,
+    leased: Optional[Callable[[str], bool]] = None,
+) -> Tuple[List[BatchEntry], Dict[str, str], List[str]]:
+    """
+    Resolve các token cần burn trong một lượt: reference UTxO qua index
+    (reserve như reserve_batch_entries), user token qua một lần quét ví.
+
+    Args:
+        index: Reference token index
+        wallet_utxos: UTxO của ví owner (đọc một lần)
+        token_names: Tên token (không prefix)
+        owner_pkh: Public key hash của owner
+        policy_id: Policy ID
+        manager: ReservationManager (mặc định: manager dùng chung)
+        holder: Người giữ (vd. địa chỉ ví)
+        leased: ref -> True nếu UTxO của ví đang thuộc tx khác chờ submit
+
+    Returns:
+        (accepted, rejected, missing) - accepted xếp theo UTxO chứa user token
+        để các token cùng UTxO nằm cạnh nhau (cùng tx); missing: token không
+        có reference token trong store hoặc user token trong ví
+    """
+    manager = manager or get_reservation_manager()
+    accepted, rejected, missing = reserve_batch_entries(
+        index, [(name, None) for name in token_names], owner_pkh, manager, holder
+    )
+    user_utxos = user_token_utxos(wallet_utxos, policy_id)
+
+    resolved: List[BatchEntry] = []
+    for item in accepted:
+        user_utxo = user_utxos.get(item.token_name.encode('utf-8'))
+        if user_utxo is None:
+            rejected[item.token_name] = "user token not found in wallet"
+            missing.append(item.token_name)
+        elif leased is not None and leased(utxo_ref(user_utxo.input)):
+            rejected[item.token_name] = "user token UTxO has another pending transaction"
+        else:
+            item.user_utxo = user_utxo
+            resolved.append(item)
+            continue
+        manager.release(item.reservation)
+
+    resolved.sort(key=lambda item: utxo_ref(item.user_utxo.input))
+    return resolved, rejected, missing
+
+
+def build_burn_batch(
+    context,
+    owner_address: Address,
+    items: Sequence[BatchEntry],
+    mint_script: PlutusV3Script,
+    store_script: PlutusV3Script,
+    policy_id: ScriptHash,
+    reference_scripts: Optional[ReferenceScripts] = None,
+) -> TransactionBuilder:
+    """
+    TransactionBuilder burn nhiều cặp CIP-68 trong một tx.
+
+    Args:
+        context: Chain context
+        owner_address: Địa chỉ ví owner (ký, trả phí, nhận lại ADA)
+        items: BatchEntry có user_utxo (từ resolve_burn_entries)
+        mint_script: Minting policy script
+        store_script: Store validator script
+        policy_id: Policy ID
+        reference_scripts: Reference scripts đã deploy (None -> script inline)
+
+    Returns:
+        TransactionBuilder chưa build
+    """
+    builder = TransactionBuilder(context)
+    builder.add_input_address(owner_address)
+
+    burn_asset = Asset()
+    user_inputs = set()
+    for item in items:
+        ref_asset_name, user_asset_name = create_cip68_asset_names(item.token_name.encode('utf-8'))
+        burn_asset[ref_asset_name] = -1
+        burn_asset[user_asset_name] = -1
+        builder.add_script_input(
+            item.entry.utxo,
+            script_source(builder, store_script, reference_scripts),
+            redeemer=Redeemer(BurnReference()),
+        )
+        ref = utxo_ref(item.user_utxo.input)
+        if ref not in user_inputs:
+            user_inputs.add(ref)
+            builder.add_input(item.user_utxo)
+
+    builder.mint = MultiAsset({policy_id: burn_asset})
+    first_name = items[0].token_name.encode('utf-8')
+    builder.add_minting_script(
+        script_source(builder, mint_script, reference_scripts),
+        redeemer=Redeemer(BurnToken(token_name=first_name)),
+    )
+    builder.required_signers = [owner_address.payment_part]
+    return builder
@@ -0,0 +1,498 @@
+"""
+CIP-68 Bulk Mint
+================
+Mint một collection lớn từ file manifest (CSV / JSONL), có checkpoint để
+chạy lại sau khi crash mà không mint trùng.
+
+Manifest được đọc dạng stream (`read_manifest`), từng chunk `chunk_size`
+item - không load cả file vào bộ nhớ:
+- CSV: header có cột `token_name` và `description`
+- JSONL: mỗi dòng `{"token_name": ..., "description": ...}`
+
+Pipeline (BulkMinter):
+- Stage build (thread gọi `run`): kiểm tra item, đóng gói thành batch tx
+  (cip68_batch.pack_batches, wallet leases) rồi đưa vào hàng đợi có giới
+  hạn - build chạy trước submit tối đa `queue_size` tx
+- Stage sign + submit (thread nền): ký, ghi checkpoint, submit, apply vào
+  index. Ví hết UTxO chưa lease -> stage build chờ hàng đợi submit xong
+  (change output xuất hiện ngay sau submit, xem CachedChainContext) rồi
+  build tiếp
+
+Checkpoint (MintCheckpoint) là file JSONL append-only, fsync mỗi record:
+- `begin`: tx id, token names và CBOR của tx đã ký - ghi TRƯỚC khi submit
+- `submitted` / `failed`: kết quả submit; `failed` chỉ khi node từ chối
+  hẳn (hoặc ChainInvalidated) - lỗi tạm thời (timeout / 5xx, tx có thể đã
+  tới node) chỉ để lại `begin`
+Chạy lại: token của tx `submitted` được bỏ qua; tx chỉ có `begin` (crash
+giữa lúc submit / lỗi tạm thời) được submit lại đúng CBOR đã ký - tx đã tới
+node thì bị từ chối, nên không bao giờ mint trùng; token của tx `failed`
+được mint lại.
+"""
+
+import csv
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pycardano import (
+    Address,
+    PaymentSigningKey,
+    PaymentVerificationKey,
+    PlutusV3Script,
+    ScriptHash,
+    Transaction,
+    VerificationKeyWitness,
+)
+
+from .cip68_batch import (
+    DEFAULT_MAX_BATCH_ITEMS,
+    BatchGroup,
+    build_mint_batch,
+    check_mint_items,
+    pack_batches,
+)
+from .cip68_context import ChainInvalidated
+from .cip68_index import ReferenceTokenIndex
+from .cip68_refscripts import ReferenceScripts
+from .cip68_reservations import WalletInputLeases
+from .cip68_submit import is_transient
+
+
+# Số item đọc từ manifest và đóng gói mỗi lượt
+DEFAULT_CHUNK_SIZE = 256
+
+# Số tx đã build tối đa đang chờ stage submit
+DEFAULT_SUBMIT_QUEUE_SIZE = 8
+
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+
+def read_manifest(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Đọc manifest dạng stream: (token_name, description) cho mỗi item.
+
+    Args:
+        path: File `.csv` (header token_name, description) hoặc
+              `.jsonl` / `.ndjson` (một object mỗi dòng)
+
+    Raises:
+        ValueError: Định dạng không hỗ trợ / thiếu cột token_name
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as f:
+        if extension == ".csv":
+            reader = csv.DictReader(f)
+            if "token_name" not in (reader.fieldnames or []):
+                raise ValueError(f"{path}: CSV manifest needs a token_name column")
+            for row in reader:
+                yield row["token_name"].strip(), (row.get("description") or "").strip()
+        elif extension in (".jsonl", ".ndjson"):
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    item = json.loads(line)
+                    yield str(item["token_name"]), str(item.get("description", ""))
+                except (ValueError, KeyError, TypeError) as e:
+                    raise ValueError(f"{path}:{line_no}: invalid manifest line ({e})") from e
+        else:
+            raise ValueError(f"{path}: manifest must be .csv or .jsonl")
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+
+class MintCheckpoint:
+    """
+    Tiến trình bulk mint trong một file JSONL append-only.
+
+    Record cuối bị cắt dở (crash khi đang ghi) được bỏ qua khi load.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # Token đã mint (tx submitted)
+        self._done: set = set()
+        # tx_id -> (token names, tx CBOR hex) của tx chưa biết kết quả submit
+        self._unfinished: Dict[str, Tuple[List[str], str]] = {}
+        self._load()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                self._apply(record)
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        tx_id = record.get("tx_id")
+        event = record.get("event")
+        if event == "begin":
+            self._unfinished[tx_id] = (record["token_names"], record["tx_cbor"])
+        elif event == "submitted":
+            self._unfinished.pop(tx_id, None)
+            self._done.update(record.get("token_names", []))
+        elif event == "failed":
+            self._unfinished.pop(tx_id, None)
+            self._done.difference_update(record.get("token_names", []))
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        with self._lock:
+            self._apply(record)
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def begin(self, tx_id: str, token_names: List[str], tx_cbor: str) -> None:
+        """Ghi tx đã ký trước khi submit."""
+        self._write({
+            "event": "begin", "tx_id": tx_id, "token_names": token_names, "tx_cbor": tx_cbor,
+        })
+
+    def finish(self, tx_id: str, tx_hash: str, token_names: List[str]) -> None:
+        self._write({
+            "event": "submitted", "tx_id": tx_id, "tx_hash": tx_hash, "token_names": token_names,
+        })
+
+    def fail(self, tx_id: str, error: str, token_names: List[str]) -> None:
+        """Tx không lên chain (kể cả tx đã submit bị hủy theo tx cha) -> token được mint lại."""
+        self._write({
+            "event": "failed", "tx_id": tx_id, "error": error, "token_names": token_names,
+        })
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def is_blocked(self, token_name: str) -> bool:
+        """Token đã mint hoặc thuộc tx chưa biết kết quả -> không mint lại."""
+        with self._lock:
+            if token_name in self._done:
+                return True
+            return any(token_name in names for names, _ in self._unfinished.values())
+
+    def unfinished(self) -> List[Tuple[str, List[str], str]]:
+        """[(tx_id, token names, tx CBOR hex)] của các tx chưa biết kết quả."""
+        with self._lock:
+            return [(tx_id, names, cbor) for tx_id, (names, cbor) in self._unfinished.items()]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"done": len(self._done), "unfinished": len(self._unfinished)}
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+# ============================================================================
+# BULK MINTER
+# ============================================================================
+
+
+class BulkMinter:
+    """
+    Mint các item của manifest theo pipeline build -> sign + submit.
+
+    Context nên là CachedChainContext: change output của tx vừa submit được
+    dùng ngay cho tx tiếp theo, không chờ confirm.
+    """
+
+    def __init__(
+        self,
+        context,
+        payment_skey: PaymentSigningKey,
+        payment_vkey: PaymentVerificationKey,
+        owner_address: Address,
+        mint_script: PlutusV3Script,
+        store_address: Address,
+        policy_id: ScriptHash,
+        checkpoint: MintCheckpoint,
+        index: Optional[ReferenceTokenIndex] = None,
+        leases: Optional[WalletInputLeases] = None,
+        reference_scripts: Optional[ReferenceScripts] = None,
+        max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        queue_size: int = DEFAULT_SUBMIT_QUEUE_SIZE,
+        on_submitted: Optional[Callable[[str, List[str]], None]] = None,
+    ):
+        self.context = context
+        self.payment_skey = payment_skey
+        self.payment_vkey = payment_vkey
+        self.owner_address = owner_address
+        self.mint_script = mint_script
+        self.store_address = store_address
+        self.policy_id = policy_id
+        self.checkpoint = checkpoint
+        self.index = index
+        self.leases = leases or WalletInputLeases()
+        self.reference_scripts = reference_scripts
+        self.max_items = max_items
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.on_submitted = on_submitted
+
+        self._lock = threading.Lock()
+        # Token đã đưa vào pipeline trong lần chạy này (chống trùng giữa các chunk)
+        self._queued: set = set()
+        # tx_id -> items của tx đã submit trong lần chạy này
+        self._submitted: Dict[str, List[Tuple[str, str]]] = {}
+        # Items của tx bị hủy theo tx cha -> build lại
+        self._retry: List[Tuple[str, str]] = []
+        self.rejected: Dict[str, str] = {}
+        self.failed: Dict[str, str] = {}
+        self.unconfirmed: List[str] = []
+
+        self.stats: Dict[str, Any] = {
+            "items": 0,
+            "minted": 0,
+            "transactions": 0,
+            "skipped": 0,
+            "resubmitted": 0,
+            "invalidated": 0,
+            "build_seconds": 0.0,
+            "submit_seconds": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+
+    def run(self, items: Iterable[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Mint mọi item (iterator, vd. `read_manifest(path)`).
+
+        Returns:
+            Report: số item / tx, rejected, failed, unconfirmed và
+            throughput (tx/s, items/s)
+        """
+        started = time.perf_counter()
+        self._resume()
+
+        submit_queue: "queue.Queue[Optional[BatchGroup]]" = queue.Queue(maxsize=self.queue_size)
+        worker = threading.Thread(
+            target=self._submit_loop, args=(submit_queue,), name="bulk-mint-submit", daemon=True
+        )
+        worker.start()
+        try:
+            for chunk in _chunks(self._pending(items), self.chunk_size):
+                self._build(chunk, submit_queue)
+            # Tx bị hủy theo tx cha chỉ biết được sau khi submit -> build lại đến khi hết
+            while True:
+                submit_queue.join()
+                with self._lock:
+                    retry, self._retry = self._retry, []
+                if not retry:
+                    break
+                for chunk in _chunks(retry, self.chunk_size):
+                    self._build(chunk, submit_queue)
+        finally:
+            submit_queue.put(None)
+            worker.join()
+
+        return self.report(time.perf_counter() - started)
+
+    def _pending(self, items: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        for token_name, description in items:
+            self.stats["items"] += 1
+            if token_name in self._queued or self.checkpoint.is_blocked(token_name):
+                self.stats["skipped"] += 1
+                continue
+            self._queued.add(token_name)
+            yield token_name, description
+
+    def _resume(self) -> None:
+        """Submit lại đúng CBOR của các tx crash giữa lúc submit."""
+        for tx_id, names, cbor in self.checkpoint.unfinished():
+            try:
+                tx_hash = self.context.submit_tx_cbor(cbor)
+            except Exception:
+                # Tx đã tới node trước khi crash (hoặc inputs đã đổi) -> không
+                # mint lại; token giữ trạng thái chưa xác nhận để kiểm tra thủ công
+                if self.index is not None and len(self.index.lookup_many(names)) == len(names):
+                    self.checkpoint.finish(tx_id, tx_id, names)
+                else:
+                    self.unconfirmed.extend(names)
+                continue
+            self.checkpoint.finish(tx_id, str(tx_hash), names)
+            self.stats["resubmitted"] += 1
+
+    # ------------------------------------------------------------------
+    # Stage: build
+    # ------------------------------------------------------------------
+
+    def _build(self, chunk: List[Tuple[str, str]], submit_queue: queue.Queue) -> None:
+        pending, rejected = check_mint_items(chunk, self.index)
+        self.rejected.update(rejected)
+        waited = False
+        while pending:
+            started = time.perf_counter()
+            plan = pack_batches(
+                pending,
+                lambda items: build_mint_batch(
+                    self.context, self.owner_address, items,
+                    self.mint_script, self.store_address, self.policy_id,
+                    self.reference_scripts,
+                ),
+                lambda builder: self.leases.build(
+                    builder, self.owner_address, change_address=self.owner_address
+                )[0],
+                release=lambda tx_body: self.leases.release_tx(tx_body.id),
+                max_items=self.max_items,
+            )
+            self.stats["build_seconds"] += time.perf_counter() - started
+            for group in plan.groups:
+                submit_queue.put(group)
+            pending = plan.deferred
+            if not pending:
+                break
+            if plan.groups:
+                waited = False
+            elif waited:
+                # Đã chờ mọi tx submit xong mà vẫn không build được
+                self.failed.update({name: plan.error for name, _ in pending})
+                break
+            else:
+                # Ví hết UTxO chưa lease -> chờ change output của các tx đang submit
+                submit_queue.join()
+                waited = True
+
+    # ------------------------------------------------------------------
+    # Stage: sign + submit
+    # ------------------------------------------------------------------
+
+    def _submit_loop(self, submit_queue: queue.Queue) -> None:
+        # Lỗi của một group không được làm chết thread: stage build sẽ chờ
+        # mãi trên submit_queue.put / join
+        while True:
+            group = submit_queue.get()
+            try:
+                if group is None:
+                    return
+                self._submit(group)
+            except Exception as e:
+                self.leases.release_tx(group.tx_body.id)
+                with self._lock:
+                    self.failed.update({name: str(e) for name, _ in group.items})
+            finally:
+                submit_queue.task_done()
+
+    def _submit(self, group: BatchGroup) -> None:
+        names = [name for name, _ in group.items]
+        witness_set = group.builder.build_witness_set()
+        witness_set.vkey_witnesses = [
+            VerificationKeyWitness(self.payment_vkey, self.payment_skey.sign(group.tx_body.hash()))
+        ]
+        signed_tx = Transaction(group.tx_body, witness_set)
+        tx_id = group.tx_id
+
+        started = time.perf_counter()
+        self.checkpoint.begin(tx_id, names, signed_tx.to_cbor_hex())
+        try:
+            tx_hash = self.context.submit_tx(signed_tx)
+        except Exception as e:
+            if is_transient(e):
+                # Tx có thể đã tới node: giữ `begin` (lần chạy sau submit lại
+                # đúng CBOR) và giữ lease tới hết TTL - không mint lại các token
+                with self._lock:
+                    self.unconfirmed.extend(names)
+                return
+            self.leases.release_tx(group.tx_body.id)
+            self.checkpoint.fail(tx_id, str(e), names)
+            if isinstance(e, ChainInvalidated):
+                self._requeue(e.tx_ids, group.items)
+            else:
+                self.failed.update({name: str(e) for name in names})
+            return
+        finally:
+            self.stats["submit_seconds"] += time.perf_counter() - started
+
+        try:
+            self.leases.commit_tx(group.tx_body.id)
+            if self.index is not None:
+                self.index.apply_transaction(signed_tx)
+            self.checkpoint.finish(tx_id, str(tx_hash), names)
+        except Exception:
+            # Tx đã tới node: không đánh dấu failed; thiếu `submitted` thì lần
+            # chạy sau submit lại đúng CBOR (node từ chối -> tra index)
+            with self._lock:
+                self.unconfirmed.extend(names)
+            return
+        with self._lock:
+            self._submitted[tx_id] = list(group.items)
+            self.stats["transactions"] += 1
+            self.stats["minted"] += len(names)
+        if self.on_submitted is not None:
+            try:
+                self.on_submitted(str(tx_hash), names)
+            except Exception as e:
+                print(f"Bulk mint on_submitted callback failed for {tx_id}: {e}")
+
+    def _requeue(self, tx_ids: List[str], items: List[Tuple[str, str]]) -> None:
+        """Tx cha bị loại: các tx đã submit bị hủy theo + tx hiện tại được build lại."""
+        retry = list(items)
+        for tx_id in tx_ids:
+            with self._lock:
+                invalidated = self._submitted.pop(tx_id, None)
+            if invalidated is None:
+                continue
+            names = [name for name, _ in invalidated]
+            self.checkpoint.fail(tx_id, "invalidated by rejected upstream transaction", names)
+            if self.index is not None:
+                for index in range(len(invalidated)):
+                    self.index.remove_ref(f"{tx_id}#{index}")
+            with self._lock:
+                self.stats["transactions"] -= 1
+                self.stats["minted"] -= len(names)
+            retry = invalidated + retry
+        with self._lock:
+            self.stats["invalidated"] += 1
+            self._retry.extend(retry)
+
+    # ------------------------------------------------------------------
+    # Report
+    # ------------------------------------------------------------------
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            **stats,
+            "rejected": dict(self.rejected),
+            "failed": dict(self.failed),
+            "unconfirmed": list(self.unconfirmed),
+            "elapsed": round(elapsed, 3),
+            "tx_per_s": round(stats["transactions"] / elapsed, 3) if elapsed else 0.0,
+            "items_per_s": round(stats["minted"] / elapsed, 3) if elapsed else 0.0,
+            "checkpoint": self.checkpoint.stats(),
+        }
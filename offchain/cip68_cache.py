@@ -0,0 +1,242 @@
+"""
+CIP-68 Caches
+=============
+Các cache dùng chung cho offchain operations và backend.
+
+- DatumCache: LRU cache cho CIP68Datum đã decode, key là raw CBOR của
+  inline datum. Datum chỉ thay đổi khi version được bump nên trong trạng
+  thái ổn định hit ratio gần 100%.
+- NegativeCache: nhớ các token name không tồn tại trong một TTL ngắn
+- BloomFilter: approximate membership cho tập reference token names đã
+  biết - "không có trong filter" nghĩa là chắc chắn không có trong index
+"""
+
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Iterable
+
+from .cip68_utils import CIP68Datum
+
+
+# Số datum tối đa giữ trong cache
+DEFAULT_DATUM_CACHE_SIZE = 65_536
+
+# TTL (giây) của một negative lookup
+DEFAULT_NEGATIVE_TTL = 30.0
+
+# Số token name tối đa giữ trong negative cache
+DEFAULT_NEGATIVE_CACHE_SIZE = 10_000
+
+# Capacity mặc định và tỉ lệ false positive của Bloom filter
+DEFAULT_BLOOM_CAPACITY = 100_000
+DEFAULT_BLOOM_ERROR_RATE = 0.01
+
+# Đánh dấu CBOR không decode được (để không thử decode lại)
+_INVALID = object()
+
+
+class DatumCache:
+    """
+    Bounded LRU cache: raw datum CBOR (bytes) -> CIP68Datum.
+
+    Thread-safe. Có metrics hits / misses / evictions.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_DATUM_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def decode(self, cbor: bytes) -> Optional[CIP68Datum]:
+        """
+        Decode CBOR thành CIP68Datum, dùng kết quả đã cache nếu có.
+
+        Object trả về được chia sẻ giữa các caller - không được sửa trực tiếp.
+
+        Args:
+            cbor: Raw CBOR của inline datum
+
+        Returns:
+            CIP68Datum hoặc None nếu CBOR không đúng format
+        """
+        with self._lock:
+            value = self._data.get(cbor)
+            if value is not None:
+                self._data.move_to_end(cbor)
+                self.hits += 1
+                return None if value is _INVALID else value
+            self.misses += 1
+
+        try:
+            value = CIP68Datum.from_cbor(cbor)
+        except Exception:
+            value = _INVALID
+
+        with self._lock:
+            self._data[cbor] = value
+            self._data.move_to_end(cbor)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+        return None if value is _INVALID else value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class NegativeCache:
+    """
+    Các key (token name) vừa được xác nhận là không tồn tại, có TTL.
+
+    Thread-safe. Có metrics hits / misses.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_NEGATIVE_TTL,
+        maxsize: int = DEFAULT_NEGATIVE_CACHE_SIZE,
+    ):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self, key: bytes) -> bool:
+        """True nếu key đã được ghi nhận là không tồn tại và chưa hết TTL."""
+        now = time.monotonic()
+        with self._lock:
+            expiry = self._data.get(key)
+            if expiry is not None:
+                if expiry > now:
+                    self.hits += 1
+                    return True
+                del self._data[key]
+            self.misses += 1
+            return False
+
+    def add(self, key: bytes) -> None:
+        with self._lock:
+            self._data[key] = time.monotonic() + self.ttl
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, key: bytes) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class BloomFilter:
+    """
+    Bloom filter cho bytes keys (double hashing trên blake2b).
+
+    Không hỗ trợ xóa: key đã bị burn vẫn có thể cho kết quả "có"
+    (false positive) cho tới lần rebuild tiếp theo.
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_BLOOM_CAPACITY,
+        error_rate: float = DEFAULT_BLOOM_ERROR_RATE,
+    ):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(
+            -self.capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    @classmethod
+    def from_keys(
+        cls,
+        keys: Iterable[bytes],
+        capacity: int = DEFAULT_BLOOM_CAPACITY,
+        error_rate: float = DEFAULT_BLOOM_ERROR_RATE,
+    ) -> "BloomFilter":
+        bloom = cls(capacity, error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    def _positions(self, key: bytes):
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: bytes) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "capacity": self.capacity,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+        }
+
+
+# Cache dùng chung trong process
+datum_cache = DatumCache()
+
+
+def get_datum_cache() -> DatumCache:
+    """Lấy DatumCache dùng chung của process."""
+    return datum_cache
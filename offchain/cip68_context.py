@@ -0,0 +1,1045 @@
+"""
+CIP-68 Cached Chain Context
+===========================
+ChainContext bọc ngoài BlockFrostChainContext, thêm cache cho các
+truy vấn nằm trên hot path của việc build transaction.
+
+Wallet UTxO cache:
+- Cache `utxos(address)` theo từng address với TTL ngắn
+- Khi submit thành công: inputs của tx được đánh dấu đã spend và outputs
+  được thêm vào cache (optimistic) - các lần build tiếp theo không phải
+  gọi BlockFrost và không chọn lại input đã spend
+- Khi BlockFrost đã thấy tx (output xuất hiện / input biến mất), các
+  đánh dấu optimistic được xóa
+
+Execution-unit cache:
+- `evaluate_tx` trả về ex-units đã cache theo "shape" của redeemer
+  (tag, constructor của redeemer, datum-size bucket, số redeemer/outputs)
+  (cộng thêm margin nếu cấu hình) - không cần round trip tới BlockFrost
+- TransactionBuilder đã cộng execution_memory_buffer / execution_step_buffer
+  (mặc định +20%) lên kết quả evaluate_tx nên margin mặc định là 0
+- Miss -> evaluate thật rồi ghi lại kết quả
+- Submit lỗi -> xóa các shape của tx đó, lần build sau evaluate lại
+
+Protocol parameters / genesis:
+- ProtocolParamProvider giữ protocol params, genesis và epoch hiện tại
+- Chỉ refresh khi sang epoch mới; refresh chạy trong background thread
+  được lên lịch theo `end_time` của epoch, request không bao giờ phải chờ
+
+Chain tip:
+- `last_block_slot` (builder dùng cho validity interval của script tx) được
+  cache `tip_ttl` giây; backend refresh nó ở background (`refresh_tip()`)
+
+Single-flight:
+- Các lời gọi đồng thời giống nhau (cùng method + args, vd.
+  `utxos(store_address)`) dùng chung một fetch đang chạy và kết quả của nó
+
+Shared cache (nhiều worker process, xem cip68_shared.SharedCache):
+- UTxO fetch từ BlockFrost được ghi vào shared cache; worker khác miss
+  local thì đọc shared cache trước khi gọi BlockFrost
+- Submit thành công: đánh dấu spent / pending được ghi vào shared cache và
+  generation "utxos" tăng lên; worker khác thấy generation mới thì thay các
+  đánh dấu có trong shared cache bằng nội dung hiện tại (đánh dấu bị
+  on_rejected / hết hạn ở worker khác cũng bị xóa) và bỏ UTxO cache local
+- Ex-units đã evaluate được chia sẻ theo shape - mỗi shape chỉ evaluate
+  một lần cho cả deployment
+
+Transaction chaining:
+- Outputs của tx vừa submit dùng được ngay cho tx tiếp theo (pending), nên
+  một ví có thể submit nhiều tx nối tiếp nhau trong cùng một block
+- Mỗi tx đã submit được ghi lại cùng các tx cha (tx tạo ra input của nó)
+- Tx cha bị loại (mempool drop, rollback, node báo input không tồn tại khi
+  submit tx con) -> `on_rejected()` hủy tx đó và mọi tx con cháu: outputs
+  pending bị xóa, inputs được trả lại; submit lỗi vì vậy raise
+  ChainInvalidated kèm các tx id cần build lại
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Callable, Hashable, List, Set, Tuple, Union
+
+import cbor2
+from pycardano import (
+    ChainContext,
+    ExecutionUnits,
+    PlutusData,
+    RawCBOR,
+    RawPlutusData,
+    Redeemer,
+    RedeemerMap,
+    Transaction,
+    TransactionInput,
+    UTxO,
+)
+
+from .cip68_index import utxo_ref
+
+
+logger = logging.getLogger(__name__)
+
+
+# TTL (giây) của UTxO cache cho mỗi address
+DEFAULT_UTXO_TTL = 10.0
+
+# Thời gian (giây) giữ thay đổi optimistic khi chain chưa thấy tx
+DEFAULT_PENDING_TTL = 300.0
+
+# Address có nhiều UTxO hơn ngưỡng này (vd. store address) không được cache
+DEFAULT_MAX_CACHED_UTXOS = 1_000
+
+# Margin cộng thêm vào ex-units lấy từ cache (0.1 = +10%); mặc định 0 vì
+# TransactionBuilder đã cộng execution_memory_buffer / execution_step_buffer
+DEFAULT_EX_UNITS_MARGIN = 0.0
+
+# Khoảng thời gian (giây) thử lại khi refresh params lỗi / chain chưa sang epoch mới
+DEFAULT_PARAMS_RETRY_INTERVAL = 10.0
+
+# Chu kỳ refresh params khi context không cho biết thời điểm hết epoch
+DEFAULT_PARAMS_REFRESH_INTERVAL = 3_600.0
+
+# Kích thước (bytes) của một datum-size bucket
+DEFAULT_DATUM_BUCKET_SIZE = 256
+
+# Số shape tối đa giữ trong ex-unit cache
+DEFAULT_EX_UNITS_CACHE_SIZE = 1_024
+
+# TTL (giây) của chain tip (last_block_slot) - chỉ dùng cho validity interval
+DEFAULT_TIP_TTL = 5.0
+
+# Namespace trong SharedCache: UTxO theo address, đánh dấu spent / pending
+SHARED_UTXOS_NS = "utxos"
+SHARED_SPENT_NS = "spent"
+SHARED_PENDING_NS = "pending"
+SHARED_EX_UNITS_NS = "ex_units"
+
+# TTL (giây) của ex-units trong shared cache
+DEFAULT_SHARED_EX_UNITS_TTL = 86_400.0
+
+
+# ============================================================================
+# ERRORS
+# ============================================================================
+
+
+class ChainInvalidated(Exception):
+    """
+    Submit lỗi vì một tx cha trong chuỗi pending đã bị loại.
+
+    Attributes:
+        tx_ids: Các tx đã submit bị hủy theo (tx cha và con cháu của nó) -
+                caller cần build lại chúng từ UTxO còn hợp lệ
+    """
+
+    def __init__(self, tx_ids: List[str], cause: Exception):
+        super().__init__(
+            f"Upstream transaction rejected, {len(tx_ids)} chained transaction(s) invalidated: {cause}"
+        )
+        self.tx_ids = tx_ids
+        self.cause = cause
+
+
+# ============================================================================
+# EXECUTION-UNIT CACHE
+# ============================================================================
+
+def _constr_id(data: Any) -> Optional[int]:
+    """
+    Constructor ID của redeemer.
+
+    Dùng constructor ID (thay vì tên class) để tx build từ object
+    (MintToken, ...) và tx decode từ CBOR (RawPlutusData) cho cùng key.
+    """
+    if isinstance(data, RawPlutusData):
+        tag = getattr(data.data, "tag", None)
+        if tag is None:
+            return None
+        if 121 <= tag <= 127:
+            return tag - 121
+        if 1280 <= tag <= 1400:
+            return tag - 1280 + 7
+        if tag == 102:
+            return data.data.value[0]
+        return None
+    if isinstance(data, PlutusData):
+        return data.CONSTR_ID
+    return None
+
+
+def _datum_size(datum: Any) -> int:
+    if datum is None:
+        return 0
+    if isinstance(datum, RawCBOR):
+        return len(datum.cbor)
+    if hasattr(datum, "to_cbor"):
+        return len(datum.to_cbor())
+    return 0
+
+
+def _tx_redeemers(tx: Transaction) -> List[Tuple[str, int, Any]]:
+    """Danh sách (tag, index, data) của các redeemer trong tx."""
+    redeemers = tx.transaction_witness_set.redeemer
+    if not redeemers:
+        return []
+    if isinstance(redeemers, RedeemerMap):
+        return [
+            (key.tag.name.lower(), key.index, value.data)
+            for key, value in redeemers.items()
+        ]
+    return [
+        (r.tag.name.lower(), r.index, r.data)
+        for r in redeemers
+        if isinstance(r, Redeemer) and r.tag is not None
+    ]
+
+
+class ExUnitsCache:
+    """
+    Cache execution units theo shape của redeemer.
+
+    Key: (tag, constructor ID, datum-size bucket, số redeemer, số outputs,
+    số inputs, index của redeemer spend). Validator spend duyệt inputs của
+    tx và input mình đang spend nên số inputs / vị trí input nằm trong key.
+    Chi phí của validator gần như chỉ phụ thuộc vào các yếu tố này nên
+    một lần evaluate dùng được cho mọi tx cùng shape. Mỗi key giữ giá trị
+    lớn nhất đã quan sát; giá trị trả về được cộng thêm `margin`. Buffer
+    của TransactionBuilder vẫn được cộng lên trên nên chỉ đặt `margin` > 0
+    khi cần dư thêm ngoài buffer đó.
+
+    Thread-safe. Có metrics hits / misses / invalidations.
+    """
+
+    def __init__(
+        self,
+        margin: float = DEFAULT_EX_UNITS_MARGIN,
+        bucket_size: int = DEFAULT_DATUM_BUCKET_SIZE,
+        maxsize: int = DEFAULT_EX_UNITS_CACHE_SIZE,
+    ):
+        self.margin = margin
+        self.bucket_size = bucket_size
+        self.maxsize = maxsize
+        self._data: "OrderedDict[tuple, Tuple[int, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def shapes(self, tx: Transaction) -> Optional[Dict[str, tuple]]:
+        """
+        Tính shape key cho từng redeemer của tx.
+
+        Returns:
+            Dict "tag:index" -> shape key, hoặc None nếu tx có redeemer
+            không xác định được shape (không cache)
+        """
+        redeemers = _tx_redeemers(tx)
+        if not redeemers:
+            return None
+        outputs = tx.transaction_body.outputs
+        n_inputs = len(tx.transaction_body.inputs)
+        datum_size = max((_datum_size(o.datum) for o in outputs), default=0)
+        bucket = -(-datum_size // self.bucket_size)
+
+        shapes = {}
+        for tag, index, data in redeemers:
+            constr = _constr_id(data)
+            if constr is None:
+                return None
+            shapes[f"{tag}:{index}"] = (
+                tag, constr, bucket, len(redeemers), len(outputs), n_inputs,
+                index if tag == "spend" else None,
+            )
+        return shapes
+
+    def get(self, tx: Transaction) -> Optional[Dict[str, ExecutionUnits]]:
+        """
+        Ex-units cho toàn bộ redeemer của tx (đã cộng margin).
+
+        Trả về object mới mỗi lần - TransactionBuilder sửa trực tiếp
+        ExecutionUnits nhận được.
+
+        Returns:
+            Dict "tag:index" -> ExecutionUnits, hoặc None nếu có redeemer miss
+        """
+        shapes = self.shapes(tx)
+        with self._lock:
+            if not shapes or any(shape not in self._data for shape in shapes.values()):
+                self.misses += 1
+                return None
+            self.hits += 1
+            result = {}
+            for key, shape in shapes.items():
+                self._data.move_to_end(shape)
+                mem, steps = self._data[shape]
+                result[key] = ExecutionUnits(
+                    int(mem * (1 + self.margin)),
+                    int(steps * (1 + self.margin)),
+                )
+            return result
+
+    def put(self, tx: Transaction, ex_units: Dict[str, ExecutionUnits]) -> None:
+        """Ghi lại kết quả evaluate thật của tx."""
+        shapes = self.shapes(tx)
+        if not shapes:
+            return
+        with self._lock:
+            for key, shape in shapes.items():
+                units = ex_units.get(key)
+                if units is None:
+                    continue
+                old_mem, old_steps = self._data.get(shape, (0, 0))
+                self._data[shape] = (max(old_mem, units.mem), max(old_steps, units.steps))
+                self._data.move_to_end(shape)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, tx: Optional[Transaction] = None) -> None:
+        """Xóa các shape của tx (hoặc toàn bộ cache nếu tx=None)."""
+        with self._lock:
+            if tx is None:
+                self._data.clear()
+                self.invalidations += 1
+                return
+        shapes = self.shapes(tx) or {}
+        with self._lock:
+            for shape in shapes.values():
+                if self._data.pop(shape, None) is not None:
+                    self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "margin": self.margin,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+# ============================================================================
+# SINGLE-FLIGHT
+# ============================================================================
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Gộp các lời gọi đồng thời có cùng key thành một lần thực thi.
+
+    Caller đầu tiên (leader) chạy hàm; các caller đến trong lúc hàm đang
+    chạy chờ và nhận cùng kết quả (hoặc cùng exception). Kết quả không
+    được giữ lại sau khi lời gọi kết thúc - đây không phải cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key: Hashable, fn: Callable, *args, **kwargs):
+        """
+        Chạy `fn(*args, **kwargs)` hoặc chờ lời gọi cùng key đang chạy.
+
+        Args:
+            key: Key định danh lời gọi (vd. ("utxos", address))
+            fn: Hàm cần chạy
+
+        Returns:
+            Kết quả của fn (dùng chung giữa các caller - không được sửa)
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.executions += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args, **kwargs)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            coalesced = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "in_flight": len(self._flights),
+                "coalescing_ratio": round(coalesced / self.calls, 4) if self.calls else None,
+            }
+
+
+# ============================================================================
+# PROTOCOL PARAMETERS
+# ============================================================================
+
+class ProtocolParamProvider:
+    """
+    Cache protocol parameters + genesis parameters + epoch của một context.
+
+    - Lần đầu truy cập (hoặc `start()`): fetch đồng bộ
+    - `start()`: background thread ngủ tới `end_time` của epoch rồi refresh;
+      nếu BlockFrost chưa sang epoch mới thì thử lại sau `retry_interval`
+    - Trong lúc refresh, caller vẫn nhận giá trị của epoch trước
+
+    Không có thread (vd. CLI): params hết hạn được refresh đồng bộ ở lần
+    truy cập đầu tiên sau khi hết epoch.
+    """
+
+    def __init__(
+        self,
+        context: ChainContext,
+        retry_interval: float = DEFAULT_PARAMS_RETRY_INTERVAL,
+        fallback_interval: float = DEFAULT_PARAMS_REFRESH_INTERVAL,
+    ):
+        self.context = context
+        self.retry_interval = retry_interval
+        self.fallback_interval = fallback_interval
+
+        self._lock = threading.Lock()
+        self._protocol_param = None
+        self._genesis_param = None
+        self._epoch: Optional[int] = None
+        # Hạn (unix time) của epoch hiện tại, hoặc thời điểm refresh dự phòng
+        self._expires_at: Optional[float] = None
+
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        # Nhiều request cùng gặp params chưa load -> chỉ fetch một lần
+        self._flight = SingleFlight()
+
+        self.stats: Dict[str, Any] = {
+            "refreshes": 0,
+            "blocking_fetches": 0,
+            "last_refresh": None,
+            "last_error": None,
+        }
+
+    def _epoch_end_time(self) -> Optional[float]:
+        # AsyncBlockFrostChainContext cho biết trực tiếp end_time của epoch
+        if hasattr(type(self.context), "epoch_end_time"):
+            return self.context.epoch_end_time
+        api = getattr(self.context, "api", None)
+        if api is None or not hasattr(api, "epoch_latest"):
+            return None
+        return float(api.epoch_latest().end_time)
+
+    def refresh(self) -> bool:
+        """
+        Fetch lại params từ context gốc.
+
+        Returns:
+            True nếu đã sang epoch mới (hoặc lần fetch đầu tiên)
+        """
+        epoch = self.context.epoch
+        protocol_param = self.context.protocol_param
+        genesis_param = self.context.genesis_param
+        end_time = self._epoch_end_time()
+        now = time.time()
+
+        with self._lock:
+            changed = epoch != self._epoch
+            self._epoch = epoch
+            self._protocol_param = protocol_param
+            self._genesis_param = genesis_param
+            if end_time is None or end_time <= now:
+                end_time = now + self.fallback_interval
+            self._expires_at = end_time
+            self.stats["refreshes"] += 1
+            self.stats["last_refresh"] = now
+        return changed
+
+    def _ensure(self) -> None:
+        with self._lock:
+            loaded = self._protocol_param is not None
+            expired = self._expires_at is not None and time.time() >= self._expires_at
+            running = self._thread is not None and self._thread.is_alive()
+        if loaded and (running or not expired):
+            return
+        with self._lock:
+            self.stats["blocking_fetches"] += 1
+        self._flight.do(("refresh",), self.refresh)
+
+    @property
+    def protocol_param(self):
+        self._ensure()
+        return self._protocol_param
+
+    @property
+    def genesis_param(self):
+        self._ensure()
+        return self._genesis_param
+
+    @property
+    def epoch(self) -> int:
+        self._ensure()
+        return self._epoch
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                delay = (self._expires_at or 0) - time.time()
+            if delay > 0 and self._stop.wait(delay):
+                break
+            try:
+                if not self.refresh():
+                    # Chain chưa sang epoch mới -> thử lại sớm
+                    with self._lock:
+                        self._expires_at = time.time() + self.retry_interval
+            except Exception as e:
+                logger.warning("Protocol parameter refresh failed: %s", e)
+                with self._lock:
+                    self.stats["last_error"] = str(e)
+                    self._expires_at = time.time() + self.retry_interval
+
+    def start(self) -> None:
+        """Fetch params (đồng bộ) rồi chạy background refresh thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="protocol-params", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "epoch": self._epoch,
+                "expires_at": self._expires_at,
+                "background": self._thread is not None and self._thread.is_alive(),
+            }
+
+
+# ============================================================================
+# CACHED CHAIN CONTEXT
+# ============================================================================
+
+
+class CachedChainContext(ChainContext):
+    """
+    ChainContext có cache, bọc một context khác (thường là BlockFrostChainContext).
+
+    Các thuộc tính không được override (vd. `api`) được chuyển tiếp tới
+    context gốc.
+    """
+
+    def __init__(
+        self,
+        context: ChainContext,
+        utxo_ttl: float = DEFAULT_UTXO_TTL,
+        pending_ttl: float = DEFAULT_PENDING_TTL,
+        max_cached_utxos: int = DEFAULT_MAX_CACHED_UTXOS,
+        ex_units_margin: float = DEFAULT_EX_UNITS_MARGIN,
+        params: Optional[ProtocolParamProvider] = None,
+        shared=None,
+        tip_ttl: float = DEFAULT_TIP_TTL,
+    ):
+        self.context = context
+        # SharedCache dùng chung giữa các worker process (None = tắt)
+        self.shared = shared
+        self._shared_gen: Optional[int] = None
+        # Đánh dấu đang có trong shared cache (được thay, không gộp, khi sync)
+        self._shared_spent: Set[str] = set()
+        self._shared_pending: Dict[str, str] = {}  # ref -> address
+        self.params = params or ProtocolParamProvider(context)
+        self.utxo_ttl = utxo_ttl
+        self.pending_ttl = pending_ttl
+        self.max_cached_utxos = max_cached_utxos
+        self.tip_ttl = tip_ttl
+        # (thời điểm fetch, slot) của block mới nhất
+        self._tip: Optional[Tuple[float, int]] = None
+        self.ex_units = ExUnitsCache(margin=ex_units_margin)
+        self.single_flight = SingleFlight()
+
+        self._lock = threading.RLock()
+        # address -> (thời điểm fetch, UTxOs từ chain)
+        self._utxo_cache: Dict[str, Tuple[float, List[UTxO]]] = {}
+        # ref -> hạn của đánh dấu "đã spend" optimistic
+        self._spent: Dict[str, float] = {}
+        # address -> {ref: (UTxO, hạn)} outputs optimistic chưa lên chain
+        self._pending: Dict[str, Dict[str, Tuple[UTxO, float]]] = {}
+        # tx_id -> (input refs, [(address, output ref)]) của tx đã submit chưa lên chain
+        self._chain: Dict[str, Tuple[List[str], List[Tuple[str, str]]]] = {}
+
+        self.stats: Dict[str, int] = {
+            "utxo_hits": 0,
+            "utxo_misses": 0,
+            "submitted": 0,
+            "chained": 0,
+            "chain_invalidated": 0,
+            "evaluations": 0,
+            "shared_hits": 0,
+            "shared_syncs": 0,
+            "shared_errors": 0,
+        }
+
+    def __getattr__(self, name):
+        # Chỉ được gọi khi thuộc tính không tồn tại trên wrapper
+        if name in ("context", "params", "single_flight", "shared"):
+            raise AttributeError(name)
+        return getattr(self.context, name)
+
+    # ------------------------------------------------------------------
+    # Delegated properties
+    # ------------------------------------------------------------------
+
+    @property
+    def protocol_param(self):
+        return self.params.protocol_param
+
+    @property
+    def genesis_param(self):
+        return self.params.genesis_param
+
+    @property
+    def network(self):
+        return self.context.network
+
+    @property
+    def epoch(self) -> int:
+        return self.params.epoch
+
+    @property
+    def last_block_slot(self) -> int:
+        # Builder gọi last_block_slot cho mọi script tx (validity interval);
+        # slot trễ vài giây không ảnh hưởng -> cache trong tip_ttl
+        with self._lock:
+            tip = self._tip
+        if tip is not None and time.monotonic() - tip[0] < self.tip_ttl:
+            return tip[1]
+        return self.refresh_tip()
+
+    def refresh_tip(self) -> int:
+        """Fetch lại slot của block mới nhất (background refresher gọi định kỳ)."""
+        slot = self.single_flight.do(
+            ("last_block_slot",), lambda: self.context.last_block_slot
+        )
+        with self._lock:
+            self._tip = (time.monotonic(), slot)
+        return slot
+
+    @property
+    def tip_age(self) -> Optional[float]:
+        """Số giây kể từ lần fetch chain tip gần nhất (None nếu chưa fetch)."""
+        with self._lock:
+            tip = self._tip
+        return None if tip is None else time.monotonic() - tip[0]
+
+    # ------------------------------------------------------------------
+    # UTxO cache
+    # ------------------------------------------------------------------
+
+    def _expire(self, now: float) -> None:
+        for ref, expiry in list(self._spent.items()):
+            if expiry <= now:
+                del self._spent[ref]
+        for address, pending in list(self._pending.items()):
+            for ref, (_, expiry) in list(pending.items()):
+                if expiry <= now:
+                    del pending[ref]
+            if not pending:
+                del self._pending[address]
+        # Tx không còn output pending (đã lên chain / hết hạn) -> rời chuỗi
+        for tx_id, (_, outputs) in list(self._chain.items()):
+            if not any(ref in self._pending.get(address, {}) for address, ref in outputs):
+                del self._chain[tx_id]
+
+    # ------------------------------------------------------------------
+    # Shared cache (giữa các worker process)
+    # ------------------------------------------------------------------
+
+    def _shared_call(self, fn, *args):
+        # Shared cache chỉ là tối ưu: lỗi SQLite (vd. busy) -> bỏ qua
+        try:
+            return fn(*args)
+        except Exception as e:
+            logger.warning("Shared cache error: %s", e)
+            with self._lock:
+                self.stats["shared_errors"] += 1
+            return None
+
+    def _sync_shared(self) -> None:
+        """
+        Đồng bộ đánh dấu spent / pending với shared cache (khi generation đổi).
+
+        Shared cache là nguồn đúng cho mọi đánh dấu đã được ghi vào đó: đánh
+        dấu không còn trong shared cache (worker khác on_rejected / invalidate)
+        bị xóa ở local; đánh dấu chỉ có ở local (ghi shared lỗi) được giữ.
+        """
+        if self.shared is None:
+            return
+        gen = self._shared_call(self.shared.generation, SHARED_UTXOS_NS)
+        if gen is None or gen == self._shared_gen:
+            return
+        spent = self._shared_call(self.shared.items, SHARED_SPENT_NS)
+        pending = self._shared_call(self.shared.items, SHARED_PENDING_NS)
+        if spent is None or pending is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            spent_refs = {ref for ref, _, _ in spent}
+            for ref in self._shared_spent - spent_refs:
+                self._spent.pop(ref, None)
+            for ref, _, remaining in spent:
+                self._spent[ref] = now + remaining
+            self._shared_spent = spent_refs
+
+            shared_pending = {}
+            for ref, value, remaining in pending:
+                utxo = UTxO.from_cbor(value)
+                address = str(utxo.output.address)
+                self._pending.setdefault(address, {})[ref] = (utxo, now + remaining)
+                shared_pending[ref] = address
+            for ref, address in self._shared_pending.items():
+                if ref not in shared_pending:
+                    self._pending.get(address, {}).pop(ref, None)
+            self._shared_pending = shared_pending
+
+            # UTxO cache local có thể đã bị worker khác invalidate
+            self._utxo_cache.clear()
+            self._shared_gen = gen
+            self.stats["shared_syncs"] += 1
+
+    def _shared_utxos(self, address: str) -> Optional[List[UTxO]]:
+        if self.shared is None:
+            return None
+        found = self._shared_call(self.shared.get, SHARED_UTXOS_NS, address)
+        if found is None:
+            return None
+        value, remaining = found
+        utxos = [UTxO.from_cbor(cbor) for cbor in cbor2.loads(value)]
+        with self._lock:
+            # Giữ nguyên thời điểm fetch gốc để TTL không bị kéo dài
+            fetched_at = time.monotonic() - max(0.0, self.utxo_ttl - remaining)
+            self._utxo_cache[address] = (fetched_at, utxos)
+            self.stats["shared_hits"] += 1
+        return utxos
+
+    # ------------------------------------------------------------------
+    # UTxO fetch
+    # ------------------------------------------------------------------
+
+    def _fetch(self, address: str) -> List[UTxO]:
+        # Nhiều request cùng cần UTxO của một address -> một fetch duy nhất
+        utxos = self.single_flight.do(("utxos", address), self.context.utxos, address)
+        if self.shared is not None and len(utxos) <= self.max_cached_utxos:
+            self._shared_call(
+                self.shared.put,
+                SHARED_UTXOS_NS,
+                address,
+                cbor2.dumps([u.to_cbor() for u in utxos]),
+                self.utxo_ttl,
+            )
+        with self._lock:
+            fetched_refs = {utxo_ref(u.input) for u in utxos}
+            # Chain đã thấy outputs optimistic -> bỏ đánh dấu pending
+            pending = self._pending.get(address)
+            if pending:
+                for ref in list(pending):
+                    if ref in fetched_refs:
+                        del pending[ref]
+            if len(utxos) <= self.max_cached_utxos:
+                self._utxo_cache[address] = (time.monotonic(), utxos)
+        return utxos
+
+    def _utxos(self, address: str) -> List[UTxO]:
+        self._sync_shared()
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            cached = self._utxo_cache.get(address)
+            if cached is not None and now - cached[0] < self.utxo_ttl:
+                utxos = cached[1]
+                self.stats["utxo_hits"] += 1
+            else:
+                utxos = None
+                self.stats["utxo_misses"] += 1
+
+        if utxos is None:
+            utxos = self._shared_utxos(address)
+        if utxos is None:
+            utxos = self._fetch(address)
+
+        with self._lock:
+            result = [u for u in utxos if utxo_ref(u.input) not in self._spent]
+            seen = {utxo_ref(u.input) for u in utxos}
+            for ref, (utxo, _) in self._pending.get(address, {}).items():
+                if ref not in seen and ref not in self._spent:
+                    result.append(utxo)
+        return result
+
+    def invalidate(self, address: Optional[Union[str, Any]] = None) -> None:
+        """
+        Xóa UTxO cache của một address (hoặc toàn bộ nếu address=None).
+
+        Đánh dấu optimistic (spent / pending) vẫn được giữ.
+        """
+        with self._lock:
+            if address is None:
+                self._utxo_cache.clear()
+            else:
+                self._utxo_cache.pop(str(address), None)
+        if self.shared is not None:
+            self._shared_call(
+                self.shared.delete, SHARED_UTXOS_NS, None if address is None else str(address)
+            )
+            self._shared_call(self.shared.bump, SHARED_UTXOS_NS)
+
+    def on_submitted(self, tx: Transaction) -> None:
+        """
+        Cập nhật cache sau khi submit thành công.
+
+        - Inputs: đánh dấu đã spend
+        - Outputs: thêm vào UTxO của address nhận (optimistic)
+        - Shared cache: ghi các đánh dấu trên cho worker khác
+
+        Args:
+            tx: Transaction vừa submit
+        """
+        body = tx.transaction_body
+        tx_id = body.id
+        expiry = time.monotonic() + self.pending_ttl
+        produced = [
+            UTxO(TransactionInput(tx_id, index), output)
+            for index, output in enumerate(body.outputs)
+        ]
+        inputs = [utxo_ref(i) for i in body.inputs]
+        with self._lock:
+            if self._parents(inputs):
+                self.stats["chained"] += 1
+            for ref in inputs:
+                self._spent[ref] = expiry
+            for utxo in produced:
+                pending = self._pending.setdefault(str(utxo.output.address), {})
+                pending[utxo_ref(utxo.input)] = (utxo, expiry)
+            self._chain[str(tx_id)] = (
+                inputs,
+                [(str(u.output.address), utxo_ref(u.input)) for u in produced],
+            )
+            self.stats["submitted"] += 1
+
+        if self.shared is not None:
+            self._shared_call(
+                self.shared.put_many,
+                SHARED_SPENT_NS,
+                [(utxo_ref(i), b"") for i in body.inputs],
+                self.pending_ttl,
+            )
+            self._shared_call(
+                self.shared.put_many,
+                SHARED_PENDING_NS,
+                [(utxo_ref(u.input), u.to_cbor()) for u in produced],
+                self.pending_ttl,
+            )
+            self._shared_call(self.shared.bump, SHARED_UTXOS_NS)
+
+    # ------------------------------------------------------------------
+    # Transaction chaining
+    # ------------------------------------------------------------------
+
+    def _parents(self, input_refs: List[str]) -> List[str]:
+        """Các tx pending có output được spend bởi input_refs (gọi khi giữ lock)."""
+        parents = []
+        for ref in input_refs:
+            tx_id = ref.split("#", 1)[0]
+            if tx_id in self._chain and tx_id not in parents:
+                parents.append(tx_id)
+        return parents
+
+    def pending_chain(self) -> Dict[str, List[str]]:
+        """Các tx đã submit chưa lên chain: tx_id -> các tx cha đang pending."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                tx_id: self._parents(inputs) for tx_id, (inputs, _) in self._chain.items()
+            }
+
+    def on_rejected(self, tx_id: Union[str, Any]) -> List[str]:
+        """
+        Hủy một tx đã submit nhưng bị loại, cùng mọi tx con cháu của nó.
+
+        - Outputs pending của các tx bị hủy: xóa (không còn dùng được)
+        - Inputs đã spend: trả lại, trừ input là output của tx cũng bị hủy
+
+        Args:
+            tx_id: Tx bị loại
+
+        Returns:
+            Các tx id bị hủy (theo thứ tự submit) - caller build lại chúng
+        """
+        tx_id = str(tx_id)
+        with self._lock:
+            if tx_id not in self._chain:
+                return []
+            doomed = {tx_id}
+            # _chain giữ thứ tự submit: tx con luôn đứng sau tx cha
+            for child, (inputs, _) in self._chain.items():
+                if any(parent in doomed for parent in self._parents(inputs)):
+                    doomed.add(child)
+            invalidated = [t for t in self._chain if t in doomed]
+            restored, dropped = [], []
+            for t in invalidated:
+                inputs, outputs = self._chain.pop(t)
+                for address, ref in outputs:
+                    self._pending.get(address, {}).pop(ref, None)
+                    dropped.append(ref)
+                for ref in inputs:
+                    if ref.split("#", 1)[0] not in doomed and self._spent.pop(ref, None):
+                        restored.append(ref)
+            self.stats["chain_invalidated"] += len(invalidated)
+
+        if self.shared is not None:
+            for ref in dropped:
+                self._shared_call(self.shared.delete, SHARED_PENDING_NS, ref)
+            for ref in restored:
+                self._shared_call(self.shared.delete, SHARED_SPENT_NS, ref)
+            self._shared_call(self.shared.bump, SHARED_UTXOS_NS)
+        logger.warning("Invalidated %d chained transaction(s) from %s", len(invalidated), tx_id)
+        return invalidated
+
+    def _rejected_parents(self, tx: Transaction, error: Exception) -> List[str]:
+        """
+        Tx cha bị loại, suy ra từ lỗi submit của tx con.
+
+        Node báo BadInputsUTxO kèm các input không tồn tại; input là output
+        của một tx pending -> tx đó không còn trong mempool / chain. Chỉ tx
+        cha trực tiếp được hủy; nếu tổ tiên của nó cũng bị loại, lần submit
+        build lại sẽ báo tiếp input của tổ tiên đó.
+        """
+        message = str(error).lower()
+        if "badinputs" not in message.replace(" ", "") and "bad input" not in message:
+            return []
+        with self._lock:
+            parents = self._parents([utxo_ref(i) for i in tx.transaction_body.inputs])
+        return [tx_id for tx_id in parents if tx_id.lower() in message]
+
+    # ------------------------------------------------------------------
+    # Submit / evaluate
+    # ------------------------------------------------------------------
+
+    def submit_tx_cbor(self, cbor: Union[bytes, str]):
+        if isinstance(cbor, str):
+            cbor = bytes.fromhex(cbor)
+        try:
+            tx_hash = self.context.submit_tx_cbor(cbor)
+        except Exception as e:
+            # Ex-units từ cache có thể không đủ -> lần build sau evaluate lại
+            tx = Transaction.from_cbor(cbor)
+            if self.shared is not None:
+                for shape in (self.ex_units.shapes(tx) or {}).values():
+                    self._shared_call(self.shared.delete, SHARED_EX_UNITS_NS, repr(shape))
+            self.ex_units.invalidate(tx)
+            # Input là output của tx cha đã bị loại -> hủy cả chuỗi
+            invalidated = []
+            for parent in self._rejected_parents(tx, e):
+                invalidated += self.on_rejected(parent)
+            if invalidated:
+                raise ChainInvalidated(invalidated, e) from e
+            raise
+        self.on_submitted(Transaction.from_cbor(cbor))
+        return tx_hash
+
+    def evaluate_tx(self, tx: Transaction) -> Dict[str, ExecutionUnits]:
+        """
+        Ex-units cho các redeemer của tx: lấy từ cache nếu mọi redeemer
+        đều hit, ngược lại evaluate thật qua context gốc.
+        """
+        cached = self.ex_units.get(tx)
+        if cached is not None:
+            return cached
+        cached = self._shared_ex_units(tx)
+        if cached is not None:
+            return cached
+        result = self.context.evaluate_tx_cbor(tx.to_cbor())
+        with self._lock:
+            self.stats["evaluations"] += 1
+        self.ex_units.put(tx, result)
+        if self.shared is not None:
+            shapes = self.ex_units.shapes(tx) or {}
+            self._shared_call(
+                self.shared.put_many,
+                SHARED_EX_UNITS_NS,
+                [
+                    (repr(shape), cbor2.dumps([result[key].mem, result[key].steps]))
+                    for key, shape in shapes.items()
+                    if key in result
+                ],
+                DEFAULT_SHARED_EX_UNITS_TTL,
+            )
+        return result
+
+    def _shared_ex_units(self, tx: Transaction) -> Optional[Dict[str, ExecutionUnits]]:
+        """Ex-units do worker khác đã evaluate (nạp vào cache local)."""
+        if self.shared is None:
+            return None
+        shapes = self.ex_units.shapes(tx)
+        if not shapes:
+            return None
+        observed = {}
+        for key, shape in shapes.items():
+            found = self._shared_call(self.shared.get, SHARED_EX_UNITS_NS, repr(shape))
+            if found is None:
+                return None
+            mem, steps = cbor2.loads(found[0])
+            observed[key] = ExecutionUnits(mem, steps)
+        self.ex_units.put(tx, observed)
+        return self.ex_units.get(tx)
+
+    def evaluate_tx_cbor(self, cbor: Union[bytes, str]):
+        with self._lock:
+            self.stats["evaluations"] += 1
+        return self.context.evaluate_tx_cbor(cbor)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "cached_addresses": len(self._utxo_cache),
+                "spent_pending": len(self._spent),
+                "outputs_pending": sum(len(p) for p in self._pending.values()),
+                "chain_pending": len(self._chain),
+                "ex_units": self.ex_units.stats(),
+                "single_flight": self.single_flight.stats(),
+                "shared": self.shared.cache_stats() if self.shared is not None else None,
+            }
@@ -0,0 +1,667 @@
+"""
+CIP-68 Reference Token Index
+============================
+Index token name -> reference UTxO tại store address.
+
+Trước đây mỗi lần update / burn / query metadata đều gọi
+`context.utxos(store_address)` rồi duyệt toàn bộ UTxO để tìm một asset name.
+Index này giữ sẵn mapping:
+
+    token name (không prefix) -> UTxO ref, coin, CIP68Datum đã decode
+
+- Lookup là O(1) (dict) sau lần warm-up đầu tiên
+- Refresh là incremental: chỉ decode datum của các UTxO mới xuất hiện,
+  UTxO cũ giữ nguyên entry, UTxO đã bị spend thì bị xóa
+- Transaction do chính chúng ta submit được apply ngay vào index
+  (inputs bị spend, outputs mới tại store) nên không cần chờ refresh
+- Lookup token không tồn tại: trả về ngay nhờ negative cache (TTL ngắn)
+  và Bloom filter - không quét store. Token mới được thêm vào Bloom filter
+  ngay; filter chỉ được dựng lại (ngoài lock) khi đầy hoặc khi số token bị
+  xóa vượt ngưỡng (token đã xóa chỉ gây false positive)
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Iterator, Iterable, Set, Tuple, Union
+
+from pycardano import (
+    Address,
+    RawCBOR,
+    RawPlutusData,
+    ScriptHash,
+    Transaction,
+    TransactionInput,
+    UTxO,
+)
+
+from .cip68_utils import (
+    CIP68_REFERENCE_PREFIX,
+    CIP68Datum,
+)
+from .cip68_cache import (
+    DEFAULT_BLOOM_CAPACITY,
+    BloomFilter,
+    NegativeCache,
+    get_datum_cache,
+)
+
+
+# Khoảng thời gian (giây) giữa 2 lần refresh tự động - xấp xỉ 1 block
+DEFAULT_REFRESH_INTERVAL = 20.0
+
+# Thời gian (giây) giữ các thay đổi optimistic trước khi tin lại chain
+OPTIMISTIC_TTL = 180.0
+
+# Tỉ lệ token đã bị xóa (so với số entry) trước khi dựng lại Bloom filter
+BLOOM_REBUILD_REMOVED_RATIO = 0.25
+
+
+def utxo_ref(tx_input: TransactionInput) -> str:
+    """
+    Tạo key dạng "tx_hash#index" cho một TransactionInput.
+
+    Args:
+        tx_input: TransactionInput
+
+    Returns:
+        str: "<tx_hash hex>#<output index>"
+    """
+    return f"{tx_input.transaction_id.payload.hex()}#{tx_input.index}"
+
+
+def decode_cip68_datum(datum: Any) -> Optional[CIP68Datum]:
+    """
+    Decode inline datum (RawCBOR / RawPlutusData / bytes) thành CIP68Datum.
+
+    BlockFrost trả về inline datum dạng RawCBOR nên cần decode thủ công.
+    Kết quả được cache theo raw CBOR (DatumCache dùng chung).
+
+    Args:
+        datum: Datum lấy từ UTxO output
+
+    Returns:
+        CIP68Datum hoặc None nếu datum không đúng format
+    """
+    if datum is None:
+        return None
+    if isinstance(datum, CIP68Datum):
+        return datum
+
+    if isinstance(datum, RawCBOR):
+        cbor = datum.cbor
+    elif isinstance(datum, RawPlutusData):
+        cbor = datum.to_cbor()
+    elif isinstance(datum, bytes):
+        cbor = datum
+    else:
+        return None
+
+    return get_datum_cache().decode(cbor)
+
+
+def reference_token_names(utxo: UTxO, policy_id: ScriptHash) -> List[bytes]:
+    """
+    Lấy tên gốc (bỏ prefix 100) của các reference token trong một UTxO.
+
+    Args:
+        utxo: UTxO cần kiểm tra
+        policy_id: Policy ID của dự án
+
+    Returns:
+        List tên token (bytes, không có prefix)
+    """
+    names = []
+    multi_asset = utxo.output.amount.multi_asset
+    if not multi_asset or policy_id not in multi_asset:
+        return names
+
+    for asset_name, quantity in multi_asset[policy_id].items():
+        payload = asset_name.payload
+        if payload.startswith(CIP68_REFERENCE_PREFIX) and quantity > 0:
+            names.append(payload[len(CIP68_REFERENCE_PREFIX):])
+    return names
+
+
+@dataclass
+class IndexEntry:
+    """
+    Một entry trong reference token index.
+
+    Fields:
+        token_name: Tên token không có prefix
+        utxo: UTxO đang giữ reference token
+        coin: Lovelace nằm trong UTxO
+        datum: CIP68Datum đã decode (None nếu datum không hợp lệ)
+    """
+    token_name: bytes
+    utxo: UTxO
+    coin: int
+    datum: Optional[CIP68Datum]
+
+    @property
+    def ref(self) -> str:
+        return utxo_ref(self.utxo.input)
+
+    @property
+    def owner(self) -> Optional[bytes]:
+        return self.datum.owner if self.datum else None
+
+    @property
+    def version(self) -> Optional[int]:
+        return self.datum.version if self.datum else None
+
+
+class ReferenceTokenIndex:
+    """
+    Index các reference token (100) đang nằm tại store address.
+
+    Thread-safe: mọi thao tác đọc / ghi đều đi qua một RLock.
+    """
+
+    def __init__(
+        self,
+        context,
+        store_address: Address,
+        policy_id: ScriptHash,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+    ):
+        self.context = context
+        self.store_address = store_address
+        self.policy_id = policy_id
+        self.refresh_interval = refresh_interval
+        # False khi index được một ChainFollower cập nhật (không cần poll store)
+        self.auto_refresh = True
+
+        self._lock = threading.RLock()
+        self._by_name: Dict[bytes, IndexEntry] = {}
+        self._by_ref: Dict[str, List[bytes]] = {}
+        # Secondary index: owner pkh (từ datum) -> token names
+        self._by_owner: Dict[bytes, Set[bytes]] = {}
+        self._last_refresh: Optional[float] = None
+
+        # ref -> hạn (monotonic) của các thay đổi optimistic từ apply_transaction
+        self._optimistic_added: Dict[str, float] = {}
+        self._optimistic_spent: Dict[str, float] = {}
+        # UTxO đã chain xác nhận nhưng bị spend optimistic (cho confirmed_utxos)
+        self._spent_utxos: Dict[str, UTxO] = {}
+
+        # Negative lookup: token name vừa được xác nhận là không tồn tại
+        self.negative_cache = NegativeCache()
+        # Tập token name đã biết - None cho tới lần đồng bộ đầu tiên
+        self._bloom: Optional[BloomFilter] = None
+        self.bloom_rejects = 0
+        # Số token bị xóa từ lần dựng Bloom filter gần nhất
+        self._bloom_removed = 0
+        # Đang dựng lại ngoài lock: token thêm trong lúc đó được ghi vào đây
+        self._bloom_backlog: Optional[List[bytes]] = None
+        self.bloom_rebuilds = 0
+
+    # ------------------------------------------------------------------
+    # Mutations
+    # ------------------------------------------------------------------
+
+    def _add_utxo(self, utxo: UTxO) -> int:
+        names = reference_token_names(utxo, self.policy_id)
+        if not names:
+            return 0
+
+        datum = decode_cip68_datum(utxo.output.datum)
+        ref = utxo_ref(utxo.input)
+        for name in names:
+            self._set_entry(IndexEntry(
+                token_name=name,
+                utxo=utxo,
+                coin=utxo.output.amount.coin,
+                datum=datum,
+            ))
+        self._by_ref[ref] = names
+        return len(names)
+
+    def _set_entry(self, entry: IndexEntry) -> None:
+        previous = self._by_name.get(entry.token_name)
+        if previous is not None:
+            self._unlink_owner(previous)
+        self._by_name[entry.token_name] = entry
+        if entry.owner is not None:
+            self._by_owner.setdefault(entry.owner, set()).add(entry.token_name)
+        self.negative_cache.discard(entry.token_name)
+        if self._bloom is not None:
+            self._bloom.add(entry.token_name)
+        if self._bloom_backlog is not None:
+            self._bloom_backlog.append(entry.token_name)
+
+    def _bloom_needs_rebuild(self) -> bool:
+        if self._bloom is None:
+            return True
+        return self._bloom.is_full or (
+            self._bloom_removed > BLOOM_REBUILD_REMOVED_RATIO * max(1, len(self._by_name))
+        )
+
+    def _maybe_rebuild_bloom(self) -> None:
+        """
+        Dựng lại Bloom filter nếu cần (lần đồng bộ đầu tiên, filter đầy, hoặc
+        nhiều token đã bị xóa). Phần O(N) chạy ngoài lock nên lookup không bị
+        chặn; token thêm trong lúc dựng được bổ sung trước khi thay filter.
+        """
+        with self._lock:
+            if self._bloom_backlog is not None or not self._bloom_needs_rebuild():
+                return
+            keys = list(self._by_name.keys())
+            self._bloom_backlog = []
+            removed = self._bloom_removed
+        try:
+            bloom = BloomFilter.from_keys(keys, max(DEFAULT_BLOOM_CAPACITY, 2 * len(keys)))
+        except BaseException:
+            with self._lock:
+                self._bloom_backlog = None
+            raise
+        with self._lock:
+            for name in self._bloom_backlog:
+                bloom.add(name)
+            self._bloom = bloom
+            self._bloom_backlog = None
+            self._bloom_removed -= removed
+            self.bloom_rebuilds += 1
+
+    def _unlink_owner(self, entry: IndexEntry) -> None:
+        if entry.owner is None:
+            return
+        names = self._by_owner.get(entry.owner)
+        if names is not None:
+            names.discard(entry.token_name)
+            if not names:
+                del self._by_owner[entry.owner]
+
+    def _remove_ref(self, ref: str) -> int:
+        names = self._by_ref.pop(ref, [])
+        removed = 0
+        for name in names:
+            entry = self._by_name.get(name)
+            # Chỉ xóa nếu entry vẫn trỏ tới đúng UTxO này
+            if entry is not None and entry.ref == ref:
+                del self._by_name[name]
+                self._unlink_owner(entry)
+                removed += 1
+        self._bloom_removed += removed
+        return removed
+
+    def _is_store_output(self, output) -> bool:
+        return output.address.payment_part == self.store_address.payment_part
+
+    def _utxo_for_ref(self, ref: str) -> Optional[UTxO]:
+        names = self._by_ref.get(ref)
+        if not names:
+            return None
+        entry = self._by_name.get(names[0])
+        return entry.utxo if entry is not None else None
+
+    def add_utxo(self, utxo: UTxO) -> int:
+        """
+        Thêm (hoặc thay thế) các reference token có trong một UTxO.
+
+        Returns:
+            Số entry được thêm
+        """
+        with self._lock:
+            return self._add_utxo(utxo)
+
+    def remove_ref(self, ref: Union[str, TransactionInput]) -> int:
+        """
+        Xóa các entry thuộc một UTxO đã bị spend.
+
+        Returns:
+            Số entry bị xóa
+        """
+        if isinstance(ref, TransactionInput):
+            ref = utxo_ref(ref)
+        with self._lock:
+            return self._remove_ref(ref)
+
+    def apply_transaction(self, tx: Transaction) -> int:
+        """
+        Apply một transaction vừa submit vào index (optimistic update).
+
+        - Inputs của tx: xóa khỏi index (đã bị spend)
+        - Outputs tới store address: thêm vào index
+
+        Args:
+            tx: Transaction đã submit thành công
+
+        Returns:
+            Số entry thay đổi
+        """
+        body = tx.transaction_body
+        tx_id = body.id
+        expiry = time.monotonic() + OPTIMISTIC_TTL
+        changed = 0
+        with self._lock:
+            for tx_input in body.inputs:
+                ref = utxo_ref(tx_input)
+                self._optimistic_spent[ref] = expiry
+                utxo = self._utxo_for_ref(ref)
+                if utxo is not None and ref not in self._optimistic_added:
+                    self._spent_utxos[ref] = utxo
+                changed += self._remove_ref(ref)
+            for index, output in enumerate(body.outputs):
+                if not self._is_store_output(output):
+                    continue
+                utxo = UTxO(TransactionInput(tx_id, index), output)
+                added = self._add_utxo(utxo)
+                if added:
+                    self._optimistic_added[utxo_ref(utxo.input)] = expiry
+                changed += added
+        return changed
+
+    def apply_delta(
+        self,
+        spent_refs: Iterable[str],
+        produced: Iterable[UTxO],
+    ) -> Tuple[List[UTxO], List[str]]:
+        """
+        Apply một delta đã xác nhận trên chain (từ ChainFollower).
+
+        Mint = chỉ có output mới, update = spend + output mới, burn = chỉ spend.
+
+        Args:
+            spent_refs: Các UTxO ref bị spend ("tx_hash#index")
+            produced: Các UTxO mới được tạo ra
+
+        Returns:
+            Tuple (removed_utxos, added_refs) - dùng cho revert_delta khi rollback
+        """
+        removed: List[UTxO] = []
+        added: List[str] = []
+        with self._lock:
+            for ref in spent_refs:
+                self._optimistic_spent.pop(ref, None)
+                self._optimistic_added.pop(ref, None)
+                self._spent_utxos.pop(ref, None)
+                utxo = self._utxo_for_ref(ref)
+                if utxo is not None:
+                    self._remove_ref(ref)
+                    removed.append(utxo)
+            for utxo in produced:
+                if not self._is_store_output(utxo.output):
+                    continue
+                ref = utxo_ref(utxo.input)
+                self._optimistic_added.pop(ref, None)
+                if self._add_utxo(utxo):
+                    added.append(ref)
+        return removed, added
+
+    def revert_delta(self, removed: Iterable[UTxO], added: Iterable[str]) -> None:
+        """
+        Hoàn tác một delta (rollback): xóa outputs đã thêm, trả lại UTxO đã spend.
+
+        Args:
+            removed: UTxO đã bị xóa bởi apply_delta
+            added: Ref đã được thêm bởi apply_delta
+        """
+        with self._lock:
+            for ref in added:
+                self._remove_ref(ref)
+            for utxo in removed:
+                self._add_utxo(utxo)
+
+    def mark_synced(self) -> None:
+        """Đánh dấu index vừa được đồng bộ (không cần refresh)."""
+        with self._lock:
+            self._last_refresh = time.monotonic()
+        self._maybe_rebuild_bloom()
+
+    def refresh(self) -> int:
+        """
+        Đồng bộ index với store address (incremental).
+
+        Chỉ UTxO mới xuất hiện mới bị decode; UTxO đã bị spend thì bị xóa.
+
+        Returns:
+            Số entry thay đổi
+        """
+        return self.sync_utxos(self.context.utxos(self.store_address))
+
+    def sync_utxos(self, utxos: List[UTxO]) -> int:
+        """
+        Đồng bộ index với danh sách UTxO hiện tại của store address.
+
+        Dùng bởi refresh() (UTxO từ chain) và SnapshotReplica (UTxO từ
+        snapshot do worker leader ghi).
+
+        Returns:
+            Số entry thay đổi
+        """
+        changed = 0
+        with self._lock:
+            now = time.monotonic()
+            for pending in (self._optimistic_added, self._optimistic_spent):
+                for ref, expiry in list(pending.items()):
+                    if expiry <= now:
+                        del pending[ref]
+                        self._spent_utxos.pop(ref, None)
+
+            current_refs = set()
+            for utxo in utxos:
+                ref = utxo_ref(utxo.input)
+                current_refs.add(ref)
+                # Chain chưa thấy tx của chúng ta -> bỏ qua UTxO đã spend
+                if ref in self._optimistic_spent:
+                    continue
+                self._optimistic_added.pop(ref, None)
+                if ref not in self._by_ref:
+                    changed += self._add_utxo(utxo)
+
+            for ref in list(self._by_ref.keys()):
+                if ref not in current_refs and ref not in self._optimistic_added:
+                    changed += self._remove_ref(ref)
+            for ref in list(self._spent_utxos.keys()):
+                if ref not in current_refs:
+                    del self._spent_utxos[ref]
+
+            self._last_refresh = time.monotonic()
+        self._maybe_rebuild_bloom()
+        return changed
+
+    def sync_delta(self, spent_refs: Iterable[str], produced: Iterable[UTxO]) -> int:
+        """
+        Đồng bộ index với các thay đổi của store address thay vì danh sách
+        đầy đủ (SnapshotReplica đọc delta do leader ghi).
+
+        Thay đổi optimistic hết hạn mà chain chưa xác nhận thì bị hoàn tác
+        (output chưa lên chain bị xóa, UTxO spend optimistic được trả lại).
+
+        Returns:
+            Số entry thay đổi
+        """
+        changed = 0
+        with self._lock:
+            now = time.monotonic()
+            for ref, expiry in list(self._optimistic_added.items()):
+                if expiry <= now:
+                    del self._optimistic_added[ref]
+                    changed += self._remove_ref(ref)
+            for ref, expiry in list(self._optimistic_spent.items()):
+                if expiry <= now:
+                    del self._optimistic_spent[ref]
+                    utxo = self._spent_utxos.pop(ref, None)
+                    if utxo is not None and ref not in self._by_ref:
+                        changed += self._add_utxo(utxo)
+            removed, added = self.apply_delta(spent_refs, produced)
+            self._last_refresh = time.monotonic()
+        self._maybe_rebuild_bloom()
+        return changed + len(removed) + len(added)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def is_stale(self) -> bool:
+        if self._last_refresh is None:
+            return True
+        return time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    @property
+    def age(self) -> Optional[float]:
+        """Số giây kể từ lần đồng bộ gần nhất (None nếu chưa warm-up)."""
+        if self._last_refresh is None:
+            return None
+        return time.monotonic() - self._last_refresh
+
+    def ensure_fresh(self) -> None:
+        """Refresh nếu index chưa warm-up hoặc đã quá refresh_interval."""
+        if self.auto_refresh and self.is_stale:
+            self.refresh()
+
+    def lookup(self, token_name: Union[str, bytes]) -> Optional[IndexEntry]:
+        """
+        Tìm reference token theo tên (O(1)).
+
+        Token không tồn tại bị loại ngay bởi negative cache hoặc Bloom
+        filter mà không kích hoạt refresh (Bloom filter chỉ được dùng khi
+        index không stale, để token mới mint vẫn được tìm thấy).
+
+        Args:
+            token_name: Tên token không có prefix (str hoặc bytes)
+
+        Returns:
+            IndexEntry hoặc None nếu không tìm thấy
+        """
+        if isinstance(token_name, str):
+            token_name = token_name.encode('utf-8')
+        if self.negative_cache.hit(token_name):
+            return None
+        with self._lock:
+            bloom = self._bloom
+            fresh = not (self.auto_refresh and self.is_stale)
+            if bloom is not None and fresh and token_name not in bloom:
+                self.bloom_rejects += 1
+                self.negative_cache.add(token_name)
+                return None
+        self.ensure_fresh()
+        with self._lock:
+            entry = self._by_name.get(token_name)
+        if entry is None:
+            self.negative_cache.add(token_name)
+        return entry
+
+    def lookup_owner(self, owner_pkh: bytes) -> List[IndexEntry]:
+        """
+        Các reference token có `owner` trong datum bằng owner_pkh.
+
+        Chi phí tỉ lệ với số token của owner, không phụ thuộc kích thước store.
+
+        Args:
+            owner_pkh: Public key hash của owner (28 bytes)
+
+        Returns:
+            List IndexEntry
+        """
+        self.ensure_fresh()
+        with self._lock:
+            return [
+                self._by_name[name]
+                for name in self._by_owner.get(owner_pkh, ())
+                if name in self._by_name
+            ]
+
+    def lookup_many(self, token_names: Iterable[Union[str, bytes]]) -> Dict[bytes, IndexEntry]:
+        """
+        Tra cứu nhiều token một lần (một lần kiểm tra freshness, một lần lock).
+
+        Returns:
+            Dict token name (bytes) -> IndexEntry, chỉ chứa các token tìm thấy
+        """
+        names = [n.encode('utf-8') if isinstance(n, str) else n for n in token_names]
+        self.ensure_fresh()
+        with self._lock:
+            return {name: self._by_name[name] for name in names if name in self._by_name}
+
+    def utxos(self, confirmed_only: bool = True) -> List[UTxO]:
+        """
+        Danh sách UTxO (không trùng) đang được index.
+
+        Args:
+            confirmed_only: Bỏ qua các thay đổi optimistic chưa được chain
+                xác nhận (dùng khi ghi snapshot)
+
+        Returns:
+            List UTxO
+        """
+        with self._lock:
+            result = {}
+            for ref, names in self._by_ref.items():
+                if confirmed_only and ref in self._optimistic_added:
+                    continue
+                entry = self._by_name.get(names[0])
+                if entry is not None:
+                    result[ref] = entry.utxo
+            if confirmed_only:
+                for ref, utxo in self._spent_utxos.items():
+                    result.setdefault(ref, utxo)
+            return list(result.values())
+
+    def entries(self) -> List[IndexEntry]:
+        """Snapshot toàn bộ entries hiện có."""
+        self.ensure_fresh()
+        with self._lock:
+            return list(self._by_name.values())
+
+    def lookup_stats(self) -> Dict[str, Any]:
+        """Metrics của negative cache và Bloom filter."""
+        with self._lock:
+            return {
+                "negative_cache": self.negative_cache.stats(),
+                "bloom": self._bloom.stats() if self._bloom is not None else None,
+                "bloom_rejects": self.bloom_rejects,
+                "bloom_rebuilds": self.bloom_rebuilds,
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._by_name)
+
+    def __contains__(self, token_name: bytes) -> bool:
+        with self._lock:
+            return token_name in self._by_name
+
+    def __iter__(self) -> Iterator[IndexEntry]:
+        return iter(self.entries())
+
+
+# ==============================================================================
+# SHARED INDEXES
+# ==============================================================================
+
+_shared_indexes: Dict[str, ReferenceTokenIndex] = {}
+_shared_lock = threading.Lock()
+
+
+def get_reference_index(
+    context,
+    store_address: Address,
+    policy_id: ScriptHash,
+) -> ReferenceTokenIndex:
+    """
+    Lấy index dùng chung cho một store address (tạo mới nếu chưa có).
+
+    Các hàm offchain và backend dùng chung index này để không phải
+    quét lại store address mỗi request.
+
+    Args:
+        context: Chain context dùng để refresh
+        store_address: Store script address
+        policy_id: Policy ID của dự án
+
+    Returns:
+        ReferenceTokenIndex
+    """
+    key = str(store_address)
+    with _shared_lock:
+        index = _shared_indexes.get(key)
+        if index is None:
+            index = ReferenceTokenIndex(context, store_address, policy_id)
+            _shared_indexes[key] = index
+        elif index.context is not context:
+            index.context = context
+        return index
@@ -0,0 +1,521 @@
+"""
+CIP-68 Chain Follower Indexer
+=============================
+Indexer chạy nền, nhận các delta block/transaction chạm tới
+FIXED_POLICY_ID / FIXED_STORE_HASH và apply vào ReferenceTokenIndex.
+
+Thay vì poll lại `context.utxos(store_address)` (O(N) theo số token),
+follower chỉ xử lý các transaction mới:
+- Mint: output mới tại store chứa reference token
+- Update: spend UTxO cũ tại store + output mới với datum mới
+- Burn: spend UTxO tại store, không có output mới
+- Rollback: hoàn tác các block đã apply sau điểm rollback
+
+Data source là interface pluggable:
+- BlockFrostDataSource: poll BlockFrost (address transactions của store)
+- FixtureDataSource: đọc file JSONL - dùng để test offline
+
+Format một event (JSONL, mỗi dòng một event, dạng BlockFrost):
+
+    {"type": "roll_forward",
+     "point": {"slot": 100, "hash": "<block hash>", "height": 10},
+     "transactions": [
+        {"hash": "<tx hash>",
+         "inputs": [{"tx_hash": "...", "output_index": 0}],
+         "outputs": [{"output_index": 0, "address": "addr_test1...",
+                      "amount": [{"unit": "lovelace", "quantity": "2000000"},
+                                 {"unit": "<policy><asset name>", "quantity": "1"}],
+                      "inline_datum": "<cbor hex>"}]}]}
+    {"type": "roll_backward", "point": {"slot": 90, "hash": "..."}}
+"""
+
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Deque, Tuple
+
+from pycardano import (
+    Address,
+    Asset,
+    AssetName,
+    MultiAsset,
+    RawCBOR,
+    ScriptHash,
+    TransactionInput,
+    TransactionOutput,
+    UTxO,
+    Value,
+)
+
+from .cip68_index import ReferenceTokenIndex
+
+
+# Số block giữ undo log để xử lý rollback (Cardano: k = 2160)
+DEFAULT_MAX_ROLLBACK = 2160
+
+# Khoảng thời gian (giây) giữa 2 lần poll data source
+DEFAULT_POLL_INTERVAL = 5.0
+
+# Khoảng thời gian (giây) tối thiểu giữa 2 lần ghi snapshot
+DEFAULT_SNAPSHOT_INTERVAL = 60.0
+
+
+@dataclass(frozen=True)
+class ChainPoint:
+    """Một điểm trên chain (block)."""
+    slot: int
+    block_hash: str
+    height: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"slot": self.slot, "hash": self.block_hash, "height": self.height}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChainPoint":
+        return cls(
+            slot=int(data["slot"]),
+            block_hash=data["hash"],
+            height=data.get("height"),
+        )
+
+
+@dataclass
+class TxDelta:
+    """Thay đổi của một transaction: các UTxO bị spend và các UTxO mới."""
+    tx_hash: str
+    spent: List[str]
+    produced: List[UTxO]
+
+
+@dataclass
+class ChainEvent:
+    """
+    Event từ data source.
+
+    Fields:
+        kind: "roll_forward" hoặc "roll_backward"
+        point: Block vừa được thêm (forward) hoặc điểm rollback về (backward)
+        transactions: Các TxDelta trong block (chỉ với roll_forward)
+    """
+    kind: str
+    point: ChainPoint
+    transactions: List[TxDelta] = field(default_factory=list)
+
+
+ROLL_FORWARD = "roll_forward"
+ROLL_BACKWARD = "roll_backward"
+
+
+# ==============================================================================
+# PARSING (BlockFrost-shaped JSON)
+# ==============================================================================
+
+def utxo_from_blockfrost(
+    tx_hash: str,
+    output: Dict[str, Any],
+    address: Optional[Address] = None,
+) -> UTxO:
+    """
+    Tạo UTxO từ một output dạng BlockFrost (`/txs/{hash}/utxos`).
+
+    Args:
+        tx_hash: Hash của transaction tạo ra output
+        output: Dict có address, amount, output_index, inline_datum
+        address: Address đã parse sẵn (bỏ qua bước decode bech32 khi mọi
+            output cùng một address, vd. `/addresses/{address}/utxos`)
+
+    Returns:
+        UTxO
+    """
+    coin = 0
+    multi_asset = MultiAsset()
+    for item in output.get("amount", []):
+        if item["unit"] == "lovelace":
+            coin = int(item["quantity"])
+            continue
+        unit = bytes.fromhex(item["unit"])
+        pid = ScriptHash(unit[:28])
+        if pid not in multi_asset:
+            multi_asset[pid] = Asset()
+        multi_asset[pid][AssetName(unit[28:])] = int(item["quantity"])
+
+    datum = None
+    if output.get("inline_datum"):
+        datum = RawCBOR(bytes.fromhex(output["inline_datum"]))
+
+    tx_in = TransactionInput.from_primitive([tx_hash, int(output["output_index"])])
+    tx_out = TransactionOutput(
+        address or Address.from_primitive(output["address"]),
+        Value(coin, multi_asset),
+        datum=datum,
+    )
+    return UTxO(tx_in, tx_out)
+
+
+def tx_delta_from_blockfrost(tx_hash: str, tx_utxos: Dict[str, Any]) -> TxDelta:
+    """
+    Tạo TxDelta từ response `/txs/{hash}/utxos` (hoặc fixture cùng format).
+
+    Collateral / reference inputs không bị spend nên được bỏ qua.
+    """
+    spent = [
+        f"{i['tx_hash']}#{i['output_index']}"
+        for i in tx_utxos.get("inputs", [])
+        if not i.get("collateral") and not i.get("reference")
+    ]
+    produced = [
+        utxo_from_blockfrost(tx_hash, o)
+        for o in tx_utxos.get("outputs", [])
+        if not o.get("collateral")
+    ]
+    return TxDelta(tx_hash=tx_hash, spent=spent, produced=produced)
+
+
+def event_from_dict(data: Dict[str, Any]) -> ChainEvent:
+    """Parse một event (một dòng của fixture JSONL)."""
+    kind = data["type"]
+    if kind not in (ROLL_FORWARD, ROLL_BACKWARD):
+        raise ValueError(f"Unknown chain event type: {kind}")
+    transactions = [
+        tx_delta_from_blockfrost(tx["hash"], tx)
+        for tx in data.get("transactions", [])
+    ]
+    return ChainEvent(kind, ChainPoint.from_dict(data["point"]), transactions)
+
+
+# ==============================================================================
+# DATA SOURCES
+# ==============================================================================
+
+class ChainDataSource(ABC):
+    """
+    Interface cho nguồn dữ liệu chain.
+
+    fetch() trả về các event mới kể từ lần gọi trước (theo thứ tự).
+    """
+
+    def tip(self) -> Optional[ChainPoint]:
+        """Điểm hiện tại của chain (None nếu source phải replay từ đầu)."""
+        return None
+
+    @abstractmethod
+    def fetch(self, since: Optional[ChainPoint]) -> List[ChainEvent]:
+        """Các event mới sau `since` (None = từ đầu / từ lần gọi trước)."""
+
+
+class FixtureDataSource(ChainDataSource):
+    """
+    Data source đọc event từ file JSONL - dùng để test / benchmark offline.
+
+    Mỗi lần fetch trả về tối đa `batch_size` event tiếp theo trong file.
+    """
+
+    def __init__(self, path: str, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+        with open(path, 'r', encoding='utf-8') as f:
+            self._events = [
+                event_from_dict(json.loads(line))
+                for line in f
+                if line.strip()
+            ]
+        self._cursor = 0
+
+    def fetch(self, since: Optional[ChainPoint]) -> List[ChainEvent]:
+        if since is not None and self._cursor == 0:
+            # Resume: bỏ qua các event đã apply trước đó
+            for i, event in enumerate(self._events):
+                if event.kind == ROLL_FORWARD and event.point == since:
+                    self._cursor = i + 1
+                    break
+        events = self._events[self._cursor:self._cursor + self.batch_size]
+        self._cursor += len(events)
+        return events
+
+
+class BlockFrostDataSource(ChainDataSource):
+    """
+    Data source poll BlockFrost: các transaction của store address
+    kể từ block cuối cùng đã xử lý.
+
+    Mỗi block chứa transaction liên quan sinh ra một roll_forward event.
+    Nếu block cuối đã emit không còn trên chain (fork), emit roll_backward
+    về block gần nhất còn hợp lệ.
+    """
+
+    def __init__(self, context, store_address: Address, max_points: int = 64):
+        self.api = context.api
+        self.store_address = str(store_address)
+        self._points: Deque[ChainPoint] = deque(maxlen=max_points)
+
+    def _block_point(self, hash_or_number) -> Optional[ChainPoint]:
+        try:
+            block = self.api.block(str(hash_or_number), return_type="json")
+        except Exception:
+            return None
+        return ChainPoint(int(block["slot"]), block["hash"], int(block["height"]))
+
+    def tip(self) -> Optional[ChainPoint]:
+        block = self.api.block_latest(return_type="json")
+        point = ChainPoint(int(block["slot"]), block["hash"], int(block["height"]))
+        self._points.append(point)
+        return point
+
+    def _is_on_chain(self, point: ChainPoint) -> bool:
+        current = self._block_point(point.height)
+        return current is not None and current.block_hash == point.block_hash
+
+    def _check_fork(self) -> Optional[ChainEvent]:
+        if not self._points or self._is_on_chain(self._points[-1]):
+            return None
+
+        # Block cuối không còn trên chain -> tìm block gần nhất còn hợp lệ
+        self._points.pop()
+        while self._points:
+            candidate = self._points[-1]
+            if self._is_on_chain(candidate):
+                return ChainEvent(ROLL_BACKWARD, candidate)
+            self._points.pop()
+
+        # Fork sâu hơn số point đang theo dõi -> follower sẽ resync
+        return ChainEvent(ROLL_BACKWARD, ChainPoint(0, ""))
+
+    def fetch(self, since: Optional[ChainPoint]) -> List[ChainEvent]:
+        if since is not None and not self._points:
+            self._points.append(since)
+
+        fork = self._check_fork()
+        if fork is not None:
+            return [fork]
+
+        from_block = None
+        if since is not None and since.height is not None:
+            from_block = str(since.height + 1)
+
+        txs = self.api.address_transactions(
+            self.store_address,
+            from_block=from_block,
+            gather_pages=True,
+            return_type="json",
+        )
+
+        # Gom transaction theo block, giữ thứ tự trong block
+        by_height: Dict[int, List[Dict[str, Any]]] = {}
+        for tx in txs:
+            by_height.setdefault(int(tx["block_height"]), []).append(tx)
+
+        events = []
+        for height in sorted(by_height):
+            point = self._block_point(height)
+            if point is None:
+                break
+            deltas = []
+            for tx in sorted(by_height[height], key=lambda t: t.get("tx_index", 0)):
+                tx_utxos = self.api.transaction_utxos(tx["tx_hash"], return_type="json")
+                deltas.append(tx_delta_from_blockfrost(tx["tx_hash"], tx_utxos))
+            events.append(ChainEvent(ROLL_FORWARD, point, deltas))
+            self._points.append(point)
+        return events
+
+
+# ==============================================================================
+# CHAIN FOLLOWER
+# ==============================================================================
+
+class ChainFollower:
+    """
+    Follower apply event từ data source vào ReferenceTokenIndex.
+
+    Giữ undo log cho `max_rollback` block gần nhất để xử lý rollback.
+    Có thể chạy nền bằng start() / stop() hoặc gọi poll_once() thủ công.
+
+    Nếu có `snapshot` (IndexSnapshot), trạng thái index được ghi định kỳ
+    để lần khởi động sau chỉ cần catch-up phần delta (xem restore()).
+    """
+
+    def __init__(
+        self,
+        source: ChainDataSource,
+        index: ReferenceTokenIndex,
+        max_rollback: int = DEFAULT_MAX_ROLLBACK,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        snapshot=None,
+        snapshot_interval: float = DEFAULT_SNAPSHOT_INTERVAL,
+    ):
+        self.source = source
+        self.index = index
+        self.max_rollback = max_rollback
+        self.poll_interval = poll_interval
+        self.snapshot = snapshot
+        self.snapshot_interval = snapshot_interval
+        self._last_snapshot: Optional[float] = None
+        self._dirty = False
+
+        self.point: Optional[ChainPoint] = None
+        # (point, [(removed_utxos, added_refs), ...]) cho mỗi block đã apply
+        self._undo: Deque[Tuple[ChainPoint, List[Tuple[List[UTxO], List[str]]]]] = deque()
+        # Point ngay trước block đầu tiên trong undo log
+        self._base: Optional[ChainPoint] = None
+        self._bootstrapped = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats: Dict[str, Any] = {
+            "blocks_applied": 0,
+            "transactions_applied": 0,
+            "rollbacks": 0,
+            "last_poll": None,
+            "last_error": None,
+            "snapshots_saved": 0,
+        }
+
+    def restore(self) -> bool:
+        """
+        Warm start: load index + chain point từ snapshot.
+
+        Returns:
+            True nếu load được snapshot hợp lệ
+        """
+        if self.snapshot is None:
+            return False
+        point = self.snapshot.load(self.index)
+        if point is None:
+            return False
+        with self._lock:
+            self._undo.clear()
+            self.point = point
+            self._base = point
+            self._bootstrapped = True
+            self.index.auto_refresh = False
+            self._last_snapshot = time.monotonic()
+        return True
+
+    def save_snapshot(self) -> None:
+        """Ghi trạng thái hiện tại của index xuống snapshot."""
+        if self.snapshot is None:
+            return
+        with self._lock:
+            self.snapshot.save(self.index, self.point)
+            self._dirty = False
+        self._last_snapshot = time.monotonic()
+        self.stats["snapshots_saved"] += 1
+
+    def _maybe_save_snapshot(self) -> None:
+        if self.snapshot is None or not self._dirty:
+            return
+        if (
+            self._last_snapshot is None
+            or time.monotonic() - self._last_snapshot >= self.snapshot_interval
+        ):
+            self.save_snapshot()
+
+    def bootstrap(self) -> None:
+        """
+        Warm-up index lần đầu.
+
+        Lấy tip trước rồi mới quét store một lần; các tx nằm giữa hai
+        bước sẽ được replay lại - apply_delta là idempotent nên an toàn.
+        Với source không có tip (fixture), replay toàn bộ từ đầu.
+        """
+        if self.point is not None or self._bootstrapped:
+            return
+        self._resync()
+
+    def _resync(self) -> None:
+        self._undo.clear()
+        tip = self.source.tip()
+        if tip is not None:
+            self.index.refresh()
+        self.point = tip
+        self._base = tip
+        self._bootstrapped = True
+        self._dirty = True
+        # Index giờ do follower cập nhật, không tự poll store address nữa
+        self.index.auto_refresh = False
+        self.index.mark_synced()
+
+    def _roll_forward(self, event: ChainEvent) -> None:
+        undo = []
+        for tx in event.transactions:
+            undo.append(self.index.apply_delta(tx.spent, tx.produced))
+            self.stats["transactions_applied"] += 1
+        self._undo.append((event.point, undo))
+        while len(self._undo) > self.max_rollback:
+            self._base = self._undo.popleft()[0]
+        self.point = event.point
+        self.stats["blocks_applied"] += 1
+
+    def _roll_backward(self, point: ChainPoint) -> None:
+        self.stats["rollbacks"] += 1
+        while self._undo and self._undo[-1][0].slot > point.slot:
+            _, undo = self._undo.pop()
+            for removed, added in reversed(undo):
+                self.index.revert_delta(removed, added)
+
+        if self._undo:
+            known = self._undo[-1][0] == point
+        else:
+            known = self._base is None or self._base == point
+        if not known:
+            # Rollback sâu hơn undo log -> quét lại toàn bộ store
+            print(f"Rollback to {point} beyond undo log, resyncing index")
+            self._resync()
+            return
+        self.point = point
+
+    def apply(self, event: ChainEvent) -> None:
+        """Apply một event (roll_forward / roll_backward) vào index."""
+        with self._lock:
+            if event.kind == ROLL_FORWARD:
+                self._roll_forward(event)
+            else:
+                self._roll_backward(event.point)
+            self._dirty = True
+            self.index.mark_synced()
+
+    def poll_once(self) -> int:
+        """
+        Lấy và apply các event mới từ source.
+
+        Returns:
+            Số event đã apply
+        """
+        self.bootstrap()
+        events = self.source.fetch(self.point)
+        for event in events:
+            self.apply(event)
+        self.stats["last_poll"] = time.time()
+        self.index.mark_synced()
+        self._maybe_save_snapshot()
+        return len(events)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+                self.stats["last_error"] = None
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                print(f"Chain follower error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def start(self) -> None:
+        """Chạy follower trong background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cip68-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Dừng background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._dirty:
+            self.save_snapshot()
@@ -13,6 +13,7 @@ SIMPLIFIED VERSION: Non-parameterized contracts
 
 import os
 import json
+import threading
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 
@@ -39,6 +40,7 @@ from pycardano import (
     StakeSigningKey,
     StakeVerificationKey,
     Transaction,
+    VerificationKeyWitness,
     HDWallet,
     plutus_script_hash,
     min_lovelace,
@@ -61,22 +63,75 @@ from .cip68_utils import (
     get_script_address,
     get_fixed_policy_id,
     get_fixed_store_address,
-    load_mint_script,
-    load_store_script,
+    load_script_registry,
     extract_owner_from_datum,
 )
+from .cip68_index import (
+    ReferenceTokenIndex,
+    get_reference_index,
+    utxo_ref,
+)
+from .cip68_context import CachedChainContext, ChainInvalidated
+from .cip68_reservations import (
+    get_reservation_manager,
+    get_wallet_leases,
+    reserve_reference_entry,
+)
+from .cip68_batch import (
+    DEFAULT_MAX_BATCH_ITEMS,
+    BatchEntry,
+    BatchPlan,
+    bind_batch_reservations,
+    build_burn_batch,
+    build_mint_batch,
+    build_update_batch,
+    check_mint_items,
+    pack_batches,
+    reserve_batch_entries,
+    resolve_burn_entries,
+    user_token_utxos,
+)
+from .cip68_submit import submit_and_wait
+from .cip68_refscripts import (
+    DEFAULT_REFERENCE_SCRIPTS_PATH,
+    ReferenceScripts,
+    build_deploy_tx,
+    compare_script_modes,
+    get_reference_scripts,
+    reference_script_address,
+    save_reference_scripts,
+    script_source,
+)
+from .cip68_bulk import (
+    DEFAULT_CHUNK_SIZE,
+    BulkMinter,
+    MintCheckpoint,
+    read_manifest,
+)
 
 
 # Load environment variables
 load_dotenv()
 
+# Chain context dùng chung trong process, key (base_url, project_id, network)
+_chain_contexts: Dict[tuple, CachedChainContext] = {}
+_chain_contexts_lock = threading.Lock()
+
+# Số lần tối đa build lại chuỗi mint khi tx cha bị loại (mint_cip68_chain)
+DEFAULT_MAX_CHAIN_REBUILDS = 3
 
-def get_chain_context() -> BlockFrostChainContext:
+
+def get_chain_context() -> CachedChainContext:
     """
     Tạo BlockFrost chain context từ environment variables.
     
+    Context được bọc bởi CachedChainContext: UTxO của ví được cache và
+    cập nhật ngay sau mỗi lần submit, nên các lần mint / update / burn
+    liên tiếp không phải chờ BlockFrost thấy change output. Context được
+    dùng chung trong process nên protocol params chỉ fetch một lần mỗi epoch.
+    
     Returns:
-        BlockFrostChainContext
+        CachedChainContext (bọc BlockFrostChainContext)
     """
     network_str = os.getenv("NETWORK", "Preprod")
     blockfrost_url = os.getenv("BLOCKFROST_URL")
@@ -84,11 +139,19 @@ def get_chain_context() -> BlockFrostChainContext:
     
     network = Network.TESTNET if network_str.lower() == "preprod" else Network.MAINNET
     
-    return BlockFrostChainContext(
-        project_id=blockfrost_key,
-        base_url=blockfrost_url,
-        network=network
-    )
+    key = (blockfrost_url, blockfrost_key, network)
+    with _chain_contexts_lock:
+        context = _chain_contexts.get(key)
+        if context is None:
+            context = CachedChainContext(
+                BlockFrostChainContext(
+                    project_id=blockfrost_key,
+                    base_url=blockfrost_url,
+                    network=network
+                )
+            )
+            _chain_contexts[key] = context
+    return context
 
 
 def get_wallet_from_seed(seed_phrase: str) -> tuple:
@@ -135,6 +198,9 @@ def get_scripts(blueprint_path: str = None) -> tuple:
     """
     Load mint and store scripts from blueprint.
     
+    Scripts, hashes và store address lấy từ ScriptRegistry dùng chung:
+    blueprint chỉ được parse một lần (load lại khi mtime thay đổi).
+    
     Args:
         blueprint_path: Path to plutus.json. If None, uses default path.
         
@@ -148,14 +214,10 @@ def get_scripts(blueprint_path: str = None) -> tuple:
             "plutus.json"
         )
     
-    mint_script = load_mint_script(blueprint_path)
-    store_script = load_store_script(blueprint_path)
+    registry = load_script_registry(blueprint_path)
+    store_address = registry.store_address(get_network())
     
-    policy_id = get_fixed_policy_id()
-    network = get_network()
-    store_address = get_fixed_store_address(network)
-    
-    return mint_script, store_script, policy_id, store_address
+    return registry.mint_script, registry.store_script, registry.policy_id, store_address
 
 
 def mint_cip68_token(
@@ -166,6 +228,7 @@ def mint_cip68_token(
     token_name: str,
     description: str,
     blueprint_path: str = None,
+    chain_input: Optional[UTxO] = None,
 ) -> dict:
     """
     Mint một CIP-68 Dynamic NFT.
@@ -181,14 +244,19 @@ def mint_cip68_token(
         token_name: Tên token (sẽ được thêm prefix)
         description: Mô tả ban đầu của NFT
         blueprint_path: Path to plutus.json (optional)
+        chain_input: UTxO bắt buộc spend, vd. change output chưa confirm
+                     của tx trước (transaction chaining, optional)
         
     Returns:
-        Dict with tx_hash, policy_id, and asset info
+        Dict with tx_hash, policy_id, asset info, change_utxo (change
+        output của tx, dùng làm chain_input cho lần mint tiếp theo) và
+        reference_ref (ref của output giữ reference token ở store address)
     """
     network = get_network()
     
-    # Load scripts
+    # Load scripts (reference scripts nếu đã deploy)
     mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
     
     # Get owner's public key hash
     owner_pkh = bytes(payment_vkey.hash())
@@ -229,11 +297,15 @@ def mint_cip68_token(
     
     # Build transaction
     builder = TransactionBuilder(context)
+    if chain_input is not None:
+        builder.add_input(chain_input)
     builder.add_input_address(owner_address)
     
     # Mint tokens
     builder.mint = mint_assets
-    builder.add_minting_script(mint_script, redeemer=redeemer)
+    builder.add_minting_script(
+        script_source(builder, mint_script, reference_scripts), redeemer=redeemer
+    )
     
     # Output: Reference token đến store script với datum
     builder.add_output(
@@ -267,7 +339,8 @@ def mint_cip68_token(
     )
     
     # Submit
-    tx_hash = context.submit_tx(signed_tx)
+    tx_hash = submit_and_wait(context, signed_tx)
+    get_reference_index(context, store_address, policy_id).apply_transaction(signed_tx)
     print(f"Transaction submitted: {tx_hash}")
     
     return {
@@ -277,9 +350,283 @@ def mint_cip68_token(
         "ref_asset_name": ref_asset_name.payload.hex(),
         "user_asset_name": user_asset_name.payload.hex(),
         "store_address": str(store_address),
+        "change_utxo": _change_output(signed_tx, owner_address),
+        "reference_ref": _store_ref(signed_tx, store_address),
     }
 
 
+def _store_ref(tx: Transaction, store_address: Address) -> Optional[str]:
+    """Ref "tx_hash#index" của output gửi reference token tới store address."""
+    body = tx.transaction_body
+    for index, output in enumerate(body.outputs):
+        if output.address == store_address:
+            return utxo_ref(TransactionInput(body.id, index))
+    return None
+
+
+def _change_output(tx: Transaction, address: Address) -> Optional[UTxO]:
+    """Change output (output cuối chỉ chứa ADA về address) của một tx."""
+    body = tx.transaction_body
+    for index in range(len(body.outputs) - 1, -1, -1):
+        output = body.outputs[index]
+        if output.address == address and not output.amount.multi_asset:
+            return UTxO(TransactionInput(body.id, index), output)
+    return None
+
+
+def mint_cip68_chain(
+    context: CachedChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    items: List[tuple],
+    blueprint_path: str = None,
+    max_rebuilds: int = DEFAULT_MAX_CHAIN_REBUILDS,
+) -> dict:
+    """
+    Mint nhiều CIP-68 Dynamic NFT liên tiếp, không chờ confirm (tx chaining).
+    
+    Mỗi tx spend change output chưa confirm của tx trước (CachedChainContext
+    giữ outputs pending sau submit), nên một ví submit được nhiều mint trong
+    cùng một block. Tx cha bị loại -> submit tx con raise ChainInvalidated:
+    các mint bị hủy theo được xóa khỏi index và build lại từ UTxO còn hợp lệ.
+    
+    Args:
+        context: CachedChainContext (giữ outputs pending giữa các tx)
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ của owner
+        items: List (token_name, description)
+        blueprint_path: Path to plutus.json (optional)
+        max_rebuilds: Số lần build lại chuỗi tối đa trước khi dừng
+        
+    Returns:
+        Dict with transactions (tx_hash + token_name theo thứ tự submit),
+        rebuilds và failed (token_name -> lý do)
+    """
+    _, _, policy_id, store_address = get_scripts(blueprint_path)
+    index = get_reference_index(context, store_address, policy_id)
+    
+    queue = list(items)
+    submitted: Dict[str, tuple] = {}  # tx_hash -> item, theo thứ tự submit
+    store_refs: Dict[str, str] = {}  # tx_hash -> ref của reference token output
+    failed = {}
+    rebuilds = 0
+    head = None
+    
+    while queue:
+        token_name, description = queue.pop(0)
+        try:
+            result = mint_cip68_token(
+                context, payment_skey, payment_vkey, owner_address,
+                token_name, description, blueprint_path, chain_input=head,
+            )
+        except ChainInvalidated as e:
+            # Tx bị hủy: bỏ reference token optimistic, build lại theo thứ tự cũ
+            redo = []
+            for tx_id in e.tx_ids:
+                if tx_id in submitted:
+                    ref = store_refs.pop(tx_id, None)
+                    if ref is not None:
+                        index.remove_ref(ref)
+                    redo.append(submitted.pop(tx_id))
+            queue[:0] = redo + [(token_name, description)]
+            head = None
+            rebuilds += 1
+            if rebuilds > max_rebuilds:
+                failed.update({name: str(e) for name, _ in queue})
+                break
+            continue
+        except Exception as e:
+            failed[token_name] = str(e)
+            head = None
+            continue
+        submitted[result["tx_hash"]] = (token_name, description)
+        if result["reference_ref"] is not None:
+            store_refs[result["tx_hash"]] = result["reference_ref"]
+        head = result["change_utxo"]
+    
+    return {
+        "policy_id": FIXED_POLICY_ID,
+        "store_address": str(store_address),
+        "transactions": [
+            {"tx_hash": tx_hash, "token_name": name}
+            for tx_hash, (name, _) in submitted.items()
+        ],
+        "rebuilds": rebuilds,
+        "failed": failed,
+    }
+
+
+def _submit_batch_groups(
+    context,
+    plan: BatchPlan,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    index: ReferenceTokenIndex,
+    name_of,
+    transactions: List[dict],
+    failed: Dict[str, str],
+) -> None:
+    """
+    Ký và submit từng tx của batch plan.
+    
+    Submit thành công -> commit wallet lease và reservation của tx, apply
+    vào index; lỗi -> trả lại để vòng sau / request khác dùng được.
+    Kết quả được ghi vào `transactions` và `failed` (token_name -> lỗi).
+    """
+    leases = get_wallet_leases()
+    reservations = get_reservation_manager()
+    for group in plan.groups:
+        names = [name_of(item) for item in group.items]
+        witness_set = group.builder.build_witness_set()
+        witness_set.vkey_witnesses = [
+            VerificationKeyWitness(payment_vkey, payment_skey.sign(group.tx_body.hash()))
+        ]
+        signed_tx = Transaction(group.tx_body, witness_set)
+        try:
+            tx_hash = submit_and_wait(context, signed_tx)
+        except Exception as e:
+            leases.release_tx(group.tx_body.id)
+            reservations.release_tx(group.tx_body.id)
+            failed.update({name: str(e) for name in names})
+            continue
+        leases.commit_tx(group.tx_body.id)
+        reservations.commit_tx(group.tx_body.id)
+        index.apply_transaction(signed_tx)
+        print(f"Transaction submitted: {tx_hash} ({len(names)} tokens)")
+        transactions.append({
+            "tx_hash": str(tx_hash),
+            "token_names": names,
+            "size": group.size,
+            "ex_units": {"mem": group.ex_units.mem, "steps": group.ex_units.steps},
+        })
+
+
+def mint_cip68_batch(
+    context: BlockFrostChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    items: List[tuple],
+    blueprint_path: str = None,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+) -> dict:
+    """
+    Mint nhiều CIP-68 Dynamic NFT, nhiều cặp mỗi transaction.
+    
+    Items được đóng gói thành các tx lớn nhất vừa max_tx_size và ex-unit
+    budget (xem cip68_batch). Các tx trong một vòng có inputs rời nhau
+    (wallet leases); ví hết UTxO -> submit vòng hiện tại rồi build vòng
+    sau trên change output (CachedChainContext thấy output ngay sau submit).
+    
+    Args:
+        context: BlockFrost chain context
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ của owner
+        items: List (token_name, description)
+        blueprint_path: Path to plutus.json (optional)
+        max_items: Số cặp tối đa mỗi tx
+        
+    Returns:
+        Dict with transactions (tx_hash + token names mỗi tx), rejected
+        và failed (token_name -> lý do)
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
+    index = get_reference_index(context, store_address, policy_id)
+    leases = get_wallet_leases()
+    
+    pending, rejected = check_mint_items(items, index)
+    transactions = []
+    failed = {}
+    
+    while pending:
+        plan = pack_batches(
+            pending,
+            lambda chunk: build_mint_batch(
+                context, owner_address, chunk, mint_script, store_address, policy_id,
+                reference_scripts,
+            ),
+            lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+            release=lambda tx_body: leases.release_tx(tx_body.id),
+            max_items=max_items,
+        )
+        if not plan.groups:
+            failed.update({name: plan.error for name, _ in plan.deferred})
+            break
+        
+        _submit_batch_groups(
+            context, plan, payment_skey, payment_vkey, index,
+            lambda item: item[0], transactions, failed,
+        )
+        pending = plan.deferred
+    
+    return {
+        "policy_id": FIXED_POLICY_ID,
+        "store_address": str(store_address),
+        "transactions": transactions,
+        "rejected": rejected,
+        "failed": failed,
+    }
+
+
+def mint_cip68_bulk(
+    context: BlockFrostChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    manifest_path: str,
+    checkpoint_path: str = None,
+    blueprint_path: str = None,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_submitted=None,
+) -> dict:
+    """
+    Mint một collection từ manifest CSV / JSONL (stream, có checkpoint).
+    
+    Xem cip68_bulk: build batch tx và sign + submit chạy song song; chạy lại
+    với cùng checkpoint sau khi crash -> token đã mint được bỏ qua, tx đang
+    submit dở được submit lại đúng CBOR đã ký.
+    
+    Args:
+        context: BlockFrost chain context
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ của owner
+        manifest_path: File .csv / .jsonl (token_name, description)
+        checkpoint_path: File checkpoint (mặc định: manifest_path + ".checkpoint.jsonl")
+        blueprint_path: Path to plutus.json (optional)
+        max_items: Số cặp tối đa mỗi tx
+        chunk_size: Số item đọc từ manifest mỗi lượt
+        on_submitted: Callback (tx_hash, token_names) sau mỗi tx submit
+        
+    Returns:
+        Report: minted, transactions, skipped, rejected, failed, unconfirmed,
+        elapsed, tx_per_s, items_per_s
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    checkpoint = MintCheckpoint(checkpoint_path or f"{manifest_path}.checkpoint.jsonl")
+    try:
+        minter = BulkMinter(
+            context, payment_skey, payment_vkey, owner_address,
+            mint_script, store_address, policy_id, checkpoint,
+            index=get_reference_index(context, store_address, policy_id),
+            leases=get_wallet_leases(),
+            reference_scripts=get_reference_scripts(context),
+            max_items=max_items,
+            chunk_size=chunk_size,
+            on_submitted=on_submitted,
+        )
+        report = minter.run(read_manifest(manifest_path))
+    finally:
+        checkpoint.close()
+    report["policy_id"] = FIXED_POLICY_ID
+    return report
+
+
 def update_metadata(
     context: BlockFrostChainContext,
     payment_skey: PaymentSigningKey,
@@ -309,8 +656,9 @@ def update_metadata(
     """
     network = get_network()
     
-    # Load scripts
+    # Load scripts (reference scripts nếu đã deploy)
     mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
     
     # Get owner's public key hash for verification
     owner_pkh = bytes(payment_vkey.hash())
@@ -322,81 +670,85 @@ def update_metadata(
     token_name_bytes = token_name.encode('utf-8')
     ref_asset_name = AssetName(CIP68_REFERENCE_PREFIX + token_name_bytes)
     
-    # Tìm UTxO chứa reference token
-    utxos = context.utxos(store_address)
-    ref_utxo = None
-    for utxo in utxos:
-        if utxo.output.amount.multi_asset:
-            for pid, assets in utxo.output.amount.multi_asset.items():
-                if pid == policy_id and ref_asset_name in assets:
-                    ref_utxo = utxo
-                    break
-    
-    if not ref_utxo:
+    # Tìm UTxO chứa reference token qua index (O(1)) và giữ nó cho tx này
+    # (tx khác đang chờ với cùng token -> ReservationConflict)
+    index = get_reference_index(context, store_address, policy_id)
+    reservations = get_reservation_manager()
+    entry, reservation = reserve_reference_entry(
+        index, token_name_bytes, reservations, holder=str(owner_address)
+    )
+    if not entry:
         raise ValueError("Không tìm thấy reference token UTxO!")
+    ref_utxo = entry.utxo
     
-    # Parse current datum and verify owner
-    current_datum = ref_utxo.output.datum
-    if isinstance(current_datum, CIP68Datum):
-        current_owner = extract_owner_from_datum(current_datum)
-        if current_owner != owner_pkh:
-            raise ValueError("Bạn không phải owner của NFT này!")
-        new_version = current_datum.version + 1
-    else:
-        # Try to parse from raw data
-        new_version = 2
-    
-    # Tạo datum mới - giữ nguyên policy_id, asset_name, owner
-    new_datum = create_cip68_datum(
-        policy_id=policy_id_bytes,
-        asset_name=token_name_bytes,
-        owner_pkh=owner_pkh,
-        metadata=new_description,
-        version=new_version
-    )
+    try:
+        # Parse current datum and verify owner
+        current_datum = entry.datum
+        if isinstance(current_datum, CIP68Datum):
+            current_owner = extract_owner_from_datum(current_datum)
+            if current_owner != owner_pkh:
+                raise ValueError("Bạn không phải owner của NFT này!")
+            new_version = current_datum.version + 1
+        else:
+            # Try to parse from raw data
+            new_version = 2
+    
+        # Tạo datum mới - giữ nguyên policy_id, asset_name, owner
+        new_datum = create_cip68_datum(
+            policy_id=policy_id_bytes,
+            asset_name=token_name_bytes,
+            owner_pkh=owner_pkh,
+            metadata=new_description,
+            version=new_version
+        )
     
-    # Tạo redeemer cho spending
-    redeemer = Redeemer(UpdateMetadata())
+        # Tạo redeemer cho spending
+        redeemer = Redeemer(UpdateMetadata())
     
-    # Build transaction
-    builder = TransactionBuilder(context)
-    builder.add_input_address(owner_address)
+        # Build transaction
+        builder = TransactionBuilder(context)
+        builder.add_input_address(owner_address)
     
-    # Spend reference token UTxO
-    builder.add_script_input(
-        ref_utxo,
-        store_script,
-        redeemer=redeemer
-    )
+        # Spend reference token UTxO
+        builder.add_script_input(
+            ref_utxo,
+            script_source(builder, store_script, reference_scripts),
+            redeemer=redeemer
+        )
     
-    # Output: Reference token trở lại store script với datum mới
-    ref_asset = Asset()
-    ref_asset[ref_asset_name] = 1
-    ref_multi = MultiAsset()
-    ref_multi[policy_id] = ref_asset
-    ref_value = Value(
-        ref_utxo.output.amount.coin,
-        ref_multi
-    )
-    builder.add_output(
-        TransactionOutput(
-            store_address,
-            ref_value,
-            datum=new_datum,
+        # Output: Reference token trở lại store script với datum mới
+        ref_asset = Asset()
+        ref_asset[ref_asset_name] = 1
+        ref_multi = MultiAsset()
+        ref_multi[policy_id] = ref_asset
+        ref_value = Value(
+            ref_utxo.output.amount.coin,
+            ref_multi
+        )
+        builder.add_output(
+            TransactionOutput(
+                store_address,
+                ref_value,
+                datum=new_datum,
+            )
         )
-    )
     
-    # Required signers
-    builder.required_signers = [payment_vkey.hash()]
+        # Required signers
+        builder.required_signers = [payment_vkey.hash()]
     
-    # Build and sign
-    signed_tx = builder.build_and_sign(
-        signing_keys=[payment_skey],
-        change_address=owner_address
-    )
+        # Build and sign
+        signed_tx = builder.build_and_sign(
+            signing_keys=[payment_skey],
+            change_address=owner_address
+        )
     
-    # Submit
-    tx_hash = context.submit_tx(signed_tx)
+        # Submit
+        tx_hash = submit_and_wait(context, signed_tx)
+        index.apply_transaction(signed_tx)
+    except Exception:
+        reservations.release(reservation)
+        raise
+    reservations.commit(reservation)
     print(f"Update transaction submitted: {tx_hash}")
     
     return {
@@ -407,6 +759,92 @@ def update_metadata(
     }
 
 
+def update_metadata_batch(
+    context: BlockFrostChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    updates: List[tuple],
+    blueprint_path: str = None,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+) -> dict:
+    """
+    Update metadata của nhiều CIP-68 NFT, nhiều reference UTxO mỗi transaction.
+    
+    Mỗi reference UTxO được spend với redeemer UpdateMetadata riêng và
+    datum mới (version + 1); số token mỗi tx được chọn theo max_tx_size và
+    ex-unit budget (xem cip68_batch).
+    
+    Args:
+        context: BlockFrost chain context
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ của owner
+        updates: List (token_name, new_description)
+        blueprint_path: Path to plutus.json (optional)
+        max_items: Số token tối đa mỗi tx
+        
+    Returns:
+        Dict with transactions (tx_hash + token names mỗi tx), new_versions,
+        rejected và failed (token_name -> lý do)
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
+    index = get_reference_index(context, store_address, policy_id)
+    leases = get_wallet_leases()
+    reservations = get_reservation_manager()
+    owner_pkh = bytes(payment_vkey.hash())
+    
+    pending = list(updates)
+    transactions = []
+    new_versions = {}
+    rejected = {}
+    failed = {}
+    
+    while pending:
+        accepted, newly_rejected, _ = reserve_batch_entries(
+            index, pending, owner_pkh, reservations, holder=str(owner_address)
+        )
+        rejected.update(newly_rejected)
+        if not accepted:
+            break
+        try:
+            plan = pack_batches(
+                accepted,
+                lambda chunk: build_update_batch(
+                    context, owner_address, chunk, store_script, store_address, policy_id,
+                    reference_scripts,
+                ),
+                lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+                release=lambda tx_body: leases.release_tx(tx_body.id),
+                max_items=max_items,
+            )
+        except Exception:
+            for item in accepted:
+                reservations.release(item.reservation)
+            raise
+        bind_batch_reservations(plan, reservations)
+        if not plan.groups:
+            failed.update({item.token_name: plan.error for item in plan.deferred})
+            break
+        
+        for group in plan.groups:
+            new_versions.update({item.token_name: item.new_version for item in group.items})
+        _submit_batch_groups(
+            context, plan, payment_skey, payment_vkey, index,
+            lambda item: item.token_name, transactions, failed,
+        )
+        pending = [(item.token_name, item.description) for item in plan.deferred]
+    
+    return {
+        "policy_id": FIXED_POLICY_ID,
+        "transactions": transactions,
+        "new_versions": {name: v for name, v in new_versions.items() if name not in failed},
+        "rejected": rejected,
+        "failed": failed,
+    }
+
+
 def burn_cip68_token(
     context: BlockFrostChainContext,
     payment_skey: PaymentSigningKey,
@@ -434,8 +872,9 @@ def burn_cip68_token(
     """
     network = get_network()
     
-    # Load scripts
+    # Load scripts (reference scripts nếu đã deploy)
     mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
     
     # Get owner's public key hash
     owner_pkh = bytes(payment_vkey.hash())
@@ -444,88 +883,306 @@ def burn_cip68_token(
     token_name_bytes = token_name.encode('utf-8')
     ref_asset_name, user_asset_name = create_cip68_asset_names(token_name_bytes)
     
-    # Tìm UTxO chứa reference token
-    store_utxos = context.utxos(store_address)
-    ref_utxo = None
-    for utxo in store_utxos:
-        if utxo.output.amount.multi_asset:
-            for pid, assets in utxo.output.amount.multi_asset.items():
-                if pid == policy_id and ref_asset_name in assets:
-                    ref_utxo = utxo
-                    break
-    
-    if not ref_utxo:
+    # Tìm UTxO chứa reference token qua index (O(1)) và giữ nó cho tx này
+    # (tx khác đang chờ với cùng token -> ReservationConflict)
+    index = get_reference_index(context, store_address, policy_id)
+    reservations = get_reservation_manager()
+    entry, reservation = reserve_reference_entry(
+        index, token_name_bytes, reservations, holder=str(owner_address)
+    )
+    if not entry:
         raise ValueError("Không tìm thấy reference token UTxO!")
+    ref_utxo = entry.utxo
     
-    # Verify owner from datum
-    current_datum = ref_utxo.output.datum
-    if isinstance(current_datum, CIP68Datum):
-        current_owner = extract_owner_from_datum(current_datum)
-        if current_owner != owner_pkh:
-            raise ValueError("Bạn không phải owner của NFT này!")
-    
-    # Tìm UTxO chứa user token trong ví owner
-    owner_utxos = context.utxos(owner_address)
-    user_utxo = None
-    for utxo in owner_utxos:
-        if utxo.output.amount.multi_asset:
-            for pid, assets in utxo.output.amount.multi_asset.items():
-                if pid == policy_id and user_asset_name in assets:
-                    user_utxo = utxo
-                    break
+    try:
+        # Verify owner from datum
+        current_datum = entry.datum
+        if isinstance(current_datum, CIP68Datum):
+            current_owner = extract_owner_from_datum(current_datum)
+            if current_owner != owner_pkh:
+                raise ValueError("Bạn không phải owner của NFT này!")
+    
+        # Tìm UTxO chứa user token trong ví owner
+        owner_utxos = context.utxos(owner_address)
+        user_utxo = None
+        for utxo in owner_utxos:
+            if utxo.output.amount.multi_asset:
+                for pid, assets in utxo.output.amount.multi_asset.items():
+                    if pid == policy_id and user_asset_name in assets:
+                        user_utxo = utxo
+                        break
+    
+        if not user_utxo:
+            raise ValueError("Không tìm thấy user token UTxO!")
+    
+        # Tạo MultiAsset cho burning (số âm)
+        burn_asset = Asset()
+        burn_asset[ref_asset_name] = -1   # Burn reference token
+        burn_asset[user_asset_name] = -1  # Burn user token
+    
+        burn_assets = MultiAsset()
+        burn_assets[policy_id] = burn_asset
+    
+        # Tạo redeemers
+        mint_redeemer = Redeemer(BurnToken(token_name=token_name_bytes))
+        spend_redeemer = Redeemer(BurnReference())
+    
+        # Build transaction
+        builder = TransactionBuilder(context)
+        builder.add_input_address(owner_address)
+    
+        # Spend reference token UTxO
+        builder.add_script_input(
+            ref_utxo,
+            script_source(builder, store_script, reference_scripts),
+            redeemer=spend_redeemer
+        )
     
-    if not user_utxo:
-        raise ValueError("Không tìm thấy user token UTxO!")
+        # Add user token input
+        builder.add_input(user_utxo)
     
-    # Tạo MultiAsset cho burning (số âm)
-    burn_asset = Asset()
-    burn_asset[ref_asset_name] = -1   # Burn reference token
-    burn_asset[user_asset_name] = -1  # Burn user token
+        # Burn tokens
+        builder.mint = burn_assets
+        builder.add_minting_script(
+            script_source(builder, mint_script, reference_scripts), redeemer=mint_redeemer
+        )
     
-    burn_assets = MultiAsset()
-    burn_assets[policy_id] = burn_asset
+        # Required signers
+        builder.required_signers = [payment_vkey.hash()]
     
-    # Tạo redeemers
-    mint_redeemer = Redeemer(BurnToken(token_name=token_name_bytes))
-    spend_redeemer = Redeemer(BurnReference())
+        # Build and sign
+        signed_tx = builder.build_and_sign(
+            signing_keys=[payment_skey],
+            change_address=owner_address
+        )
     
-    # Build transaction
-    builder = TransactionBuilder(context)
-    builder.add_input_address(owner_address)
+        # Submit
+        tx_hash = submit_and_wait(context, signed_tx)
+        index.apply_transaction(signed_tx)
+    except Exception:
+        reservations.release(reservation)
+        raise
+    reservations.commit(reservation)
+    print(f"Burn transaction submitted: {tx_hash}")
     
-    # Spend reference token UTxO
-    builder.add_script_input(
-        ref_utxo,
-        store_script,
-        redeemer=spend_redeemer
-    )
+    return {
+        "tx_hash": str(tx_hash),
+        "policy_id": FIXED_POLICY_ID,
+        "token_name": token_name,
+        "burned": True,
+    }
+
+
+def burn_cip68_batch(
+    context: BlockFrostChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    token_names: List[str],
+    blueprint_path: str = None,
+    max_items: int = DEFAULT_MAX_BATCH_ITEMS,
+) -> dict:
+    """
+    Burn nhiều CIP-68 NFT, nhiều cặp mỗi transaction.
     
-    # Add user token input
-    builder.add_input(user_utxo)
+    Reference UTxO được tra qua index, user token qua một lần đọc UTxO của
+    ví cho mỗi vòng (không quét store / ví cho từng token). Token có user
+    token nằm chung UTxO với token của tx trước được burn ở vòng sau, trên
+    change output của tx đó.
     
-    # Burn tokens
-    builder.mint = burn_assets
-    builder.add_minting_script(mint_script, redeemer=mint_redeemer)
+    Args:
+        context: BlockFrost chain context
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ của owner
+        token_names: Tên các token cần burn
+        blueprint_path: Path to plutus.json (optional)
+        max_items: Số cặp tối đa mỗi tx
+        
+    Returns:
+        Dict with transactions (tx_hash + token names mỗi tx), missing
+        (token không tìm thấy), rejected và failed (token_name -> lý do)
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
+    index = get_reference_index(context, store_address, policy_id)
+    leases = get_wallet_leases()
+    reservations = get_reservation_manager()
+    owner_pkh = bytes(payment_vkey.hash())
     
-    # Required signers
-    builder.required_signers = [payment_vkey.hash()]
+    pending = list(token_names)
+    transactions = []
+    rejected = {}
+    missing = []
+    failed = {}
     
-    # Build and sign
+    while pending:
+        accepted, newly_rejected, newly_missing = resolve_burn_entries(
+            index, context.utxos(owner_address), pending, owner_pkh, policy_id,
+            reservations, holder=str(owner_address), leased=leases.manager.is_reserved,
+        )
+        rejected.update(newly_rejected)
+        missing += newly_missing
+        if not accepted:
+            break
+        try:
+            plan = pack_batches(
+                accepted,
+                lambda chunk: build_burn_batch(
+                    context, owner_address, chunk, mint_script, store_script, policy_id,
+                    reference_scripts,
+                ),
+                lambda builder: leases.build(builder, owner_address, change_address=owner_address)[0],
+                release=lambda tx_body: leases.release_tx(tx_body.id),
+                max_items=max_items,
+                inputs_of=lambda item: [utxo_ref(item.user_utxo.input)],
+            )
+        except Exception:
+            for item in accepted:
+                reservations.release(item.reservation)
+            raise
+        bind_batch_reservations(plan, reservations)
+        if not plan.groups:
+            failed.update({item.token_name: plan.error for item in plan.deferred})
+            break
+        
+        _submit_batch_groups(
+            context, plan, payment_skey, payment_vkey, index,
+            lambda item: item.token_name, transactions, failed,
+        )
+        pending = [item.token_name for item in plan.deferred]
+    
+    return {
+        "policy_id": FIXED_POLICY_ID,
+        "transactions": transactions,
+        "missing": missing,
+        "rejected": rejected,
+        "failed": failed,
+    }
+
+
+# ============================================================================
+# REFERENCE SCRIPTS
+# ============================================================================
+
+def deploy_reference_scripts(
+    context: BlockFrostChainContext,
+    payment_skey: PaymentSigningKey,
+    payment_vkey: PaymentVerificationKey,
+    owner_address: Address,
+    blueprint_path: str = None,
+    path: str = None,
+) -> dict:
+    """
+    Khóa cip68_mint và cip68_store trong reference-script UTxO (một tx).
+    
+    Các UTxO nằm ở address native script của owner (không bị coin selection
+    của ví tiêu mất); vị trí được ghi vào file deploy nên các hàm mint /
+    update / burn và backend dùng reference inputs từ lần build tiếp theo.
+    
+    Args:
+        context: BlockFrost chain context
+        payment_skey: Payment signing key
+        payment_vkey: Payment verification key
+        owner_address: Địa chỉ ví trả phí và ADA khóa cùng script
+        blueprint_path: Path to plutus.json (optional)
+        path: File deploy (mặc định: env REFERENCE_SCRIPTS_PATH hoặc
+              smart_contract/reference_scripts.json)
+        
+    Returns:
+        Dict with tx_hash, lock_address, mint / store (ref, script_hash,
+        script_bytes) và locked_lovelace
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    lock_address = reference_script_address(payment_vkey.hash(), owner_address.network)
+    path = path or os.getenv("REFERENCE_SCRIPTS_PATH") or DEFAULT_REFERENCE_SCRIPTS_PATH
+    
+    builder = build_deploy_tx(context, owner_address, [mint_script, store_script], lock_address)
     signed_tx = builder.build_and_sign(
         signing_keys=[payment_skey],
         change_address=owner_address
     )
+    tx_hash = submit_and_wait(context, signed_tx)
+    print(f"Reference scripts transaction submitted: {tx_hash}")
     
-    # Submit
-    tx_hash = context.submit_tx(signed_tx)
-    print(f"Burn transaction submitted: {tx_hash}")
+    # Output 0: mint script, output 1: store script - dùng được ngay
+    # (CachedChainContext thấy output trước khi confirm)
+    reference_scripts = ReferenceScripts.from_transaction(signed_tx)
+    save_reference_scripts(path, reference_scripts)
     
     return {
         "tx_hash": str(tx_hash),
-        "policy_id": FIXED_POLICY_ID,
-        "token_name": token_name,
-        "burned": True,
+        "lock_address": str(lock_address),
+        "locked_lovelace": sum(o.amount.coin for o in signed_tx.transaction_body.outputs[:2]),
+        "path": path,
+        **reference_scripts.to_dict(),
+    }
+
+
+def reference_script_savings(
+    context: BlockFrostChainContext,
+    owner_address: Address,
+    token_name: str = None,
+    blueprint_path: str = None,
+) -> dict:
+    """
+    So sánh size và phí của mỗi loại tx khi build với script inline và với
+    reference scripts (chỉ build, không ký / submit).
+    
+    Args:
+        context: BlockFrost chain context
+        owner_address: Địa chỉ ví (trả phí)
+        token_name: Token của ví để đo update và burn (optional; không có
+                    -> chỉ đo mint)
+        blueprint_path: Path to plutus.json (optional)
+        
+    Returns:
+        Dict tx type (mint / update / burn) -> inline, reference ({size, fee}),
+        size_saved, fee_saved
+    """
+    mint_script, store_script, policy_id, store_address = get_scripts(blueprint_path)
+    reference_scripts = get_reference_scripts(context)
+    if reference_scripts is None:
+        raise ValueError("Reference scripts chưa được deploy!")
+    
+    report = {
+        "mint": compare_script_modes(
+            lambda refs: build_mint_batch(
+                context, owner_address, [("RefScriptProbe", "Reference script probe")],
+                mint_script, store_address, policy_id, refs,
+            ),
+            owner_address,
+            reference_scripts,
+        ),
     }
+    if token_name is None:
+        return report
+    
+    index = get_reference_index(context, store_address, policy_id)
+    entry = index.lookup(token_name)
+    if not entry:
+        raise ValueError("Không tìm thấy reference token UTxO!")
+    item = BatchEntry(token_name, entry, None, description="Reference script probe")
+    report["update"] = compare_script_modes(
+        lambda refs: build_update_batch(
+            context, owner_address, [item], store_script, store_address, policy_id, refs
+        ),
+        owner_address,
+        reference_scripts,
+    )
+    
+    item.user_utxo = user_token_utxos(context.utxos(owner_address), policy_id).get(
+        token_name.encode('utf-8')
+    )
+    if item.user_utxo is not None:
+        report["burn"] = compare_script_modes(
+            lambda refs: build_burn_batch(
+                context, owner_address, [item], mint_script, store_script, policy_id, refs
+            ),
+            owner_address,
+            reference_scripts,
+        )
+    return report
 
 
 def get_cip68_metadata(
@@ -552,33 +1209,60 @@ def get_cip68_metadata(
     policy_id = get_fixed_policy_id()
     store_address = get_fixed_store_address(network)
     
-    # Tạo asset name cho reference token
-    token_name_bytes = token_name.encode('utf-8')
-    ref_asset_name = AssetName(CIP68_REFERENCE_PREFIX + token_name_bytes)
+    # Tìm reference token qua index (O(1))
+    index = get_reference_index(context, store_address, policy_id)
+    entry = index.lookup(token_name)
+    if not entry or not entry.datum:
+        return None
+    return _metadata_from_datum(entry.datum, token_name)
+
+
+def get_cip68_metadata_batch(
+    context: BlockFrostChainContext,
+    token_names: List[str],
+    blueprint_path: str = None,
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Lấy metadata của nhiều CIP-68 NFT bằng một lượt tra index.
     
-    # Tìm UTxO chứa reference token
-    utxos = context.utxos(store_address)
-    for utxo in utxos:
-        if utxo.output.amount.multi_asset:
-            for pid, assets in utxo.output.amount.multi_asset.items():
-                if pid == policy_id and ref_asset_name in assets:
-                    datum = utxo.output.datum
-                    if isinstance(datum, CIP68Datum):
-                        # Convert bytes keys to strings
-                        metadata = {}
-                        for k, v in datum.metadata.items():
-                            key = k.decode('utf-8') if isinstance(k, bytes) else str(k)
-                            value = v.decode('utf-8') if isinstance(v, bytes) else v
-                            metadata[key] = value
-                        return {
-                            'metadata': metadata,
-                            'version': datum.version,
-                            'owner': datum.owner.hex(),
-                            'policy_id': datum.policy_id.hex() if datum.policy_id else FIXED_POLICY_ID,
-                            'asset_name': datum.asset_name.decode('utf-8') if datum.asset_name else token_name,
-                        }
+    Args:
+        context: BlockFrost chain context
+        token_names: Tên các token
+        blueprint_path: Path to plutus.json (optional)
+        
+    Returns:
+        Dict token_name -> metadata (như get_cip68_metadata), None nếu không tìm thấy
+    """
+    network = get_network()
+    policy_id = get_fixed_policy_id()
+    store_address = get_fixed_store_address(network)
     
-    return None
+    index = get_reference_index(context, store_address, policy_id)
+    entries = index.lookup_many(token_names)
+    results = {}
+    for token_name in token_names:
+        entry = entries.get(token_name.encode('utf-8'))
+        results[token_name] = (
+            _metadata_from_datum(entry.datum, token_name) if entry and entry.datum else None
+        )
+    return results
+
+
+def _metadata_from_datum(datum: CIP68Datum, token_name: str) -> Dict[str, Any]:
+    """Convert CIP68Datum sang dict trả về cho get_cip68_metadata."""
+    # Convert bytes keys to strings
+    metadata = {}
+    for k, v in datum.metadata.items():
+        key = k.decode('utf-8') if isinstance(k, bytes) else str(k)
+        value = v.decode('utf-8') if isinstance(v, bytes) else v
+        metadata[key] = value
+    return {
+        'metadata': metadata,
+        'version': datum.version,
+        'owner': datum.owner.hex(),
+        'policy_id': datum.policy_id.hex() if datum.policy_id else FIXED_POLICY_ID,
+        'asset_name': datum.asset_name.decode('utf-8') if datum.asset_name else token_name,
+    }
 
 
 def list_all_tokens(
@@ -597,8 +1281,6 @@ def list_all_tokens(
     # Prefix bytes
     # (222) User Token
     user_token_prefix = bytes.fromhex("000de140") 
-    # (100) Reference Token
-    ref_token_prefix = bytes.fromhex("000643b0")  
 
     user_tokens_list = []
     
@@ -631,55 +1313,71 @@ def list_all_tokens(
         return [] # User không có token nào của dự án này
 
     # ========================================================
-    # BƯỚC 2: TRA CỨU METADATA TỪ STORE SCRIPT
+    # BƯỚC 2: TRA CỨU METADATA TỪ REFERENCE TOKEN INDEX
     # ========================================================
-    # Để tối ưu, ta chỉ tìm những Reference Token tương ứng với holding_token_names
-    # Lưu ý: PyCardano context.utxos() lấy hết, ta sẽ filter ở client side.
-    # (Nếu dùng Raw Blockfrost API thì có thể query specific asset, nhưng ở đây dùng context cho đồng bộ)
+    # Index (được ChainFollower hoặc refresh incremental cập nhật) cho phép
+    # tra cứu O(1) mỗi token, không cần quét toàn bộ store address.
+    index = get_reference_index(context, store_address, policy_id)
     
-    store_utxos = context.utxos(store_address)
-    
-    for utxo in store_utxos:
-        if utxo.output.amount.multi_asset:
-            for pid, assets in utxo.output.amount.multi_asset.items():
-                if pid == policy_id:
-                    for asset_name in assets.keys():
-                        payload = asset_name.payload
-                        
-                        # Kiểm tra xem đây có phải là Reference Token (100) không
-                        if payload.startswith(ref_token_prefix):
-                            # Lấy tên gốc
-                            real_name_bytes = payload[len(ref_token_prefix):]
-                            
-                            # QUAN TRỌNG: Chỉ lấy nếu User đang giữ User Token tương ứng
-                            if real_name_bytes in holding_token_names:
-                                
-                                # Parse Metadata từ Datum
-                                datum = utxo.output.datum
-                                token_data = {
-                                    "token_name": real_name_bytes.decode("utf-8"),
-                                    "policy_id": str(policy_id),
-                                    "amount": 1, # NFT thì luôn là 1
-                                    "metadata": {}
-                                }
-                                
-                                if isinstance(datum, CIP68Datum):
-                                    # Convert bytes metadata sang string cho đẹp
-                                    meta_dict = {}
-                                    for k, v in datum.metadata.items():
-                                        key = k.decode("utf-8") if isinstance(k, bytes) else str(k)
-                                        val = v.decode("utf-8") if isinstance(v, bytes) else str(v)
-                                        meta_dict[key] = val
-                                        
-                                    token_data["metadata"] = meta_dict
-                                    token_data["version"] = datum.version
-                                    token_data["owner_in_datum"] = datum.owner.hex() # Để tham khảo
-                                
-                                user_tokens_list.append(token_data)
+    for entry in index.lookup_many(holding_token_names).values():
+        user_tokens_list.append(_token_data_from_entry(entry, policy_id))
 
     return user_tokens_list
 
 
+def list_tokens_by_owner(
+    context: BlockFrostChainContext,
+    owner_pkh: bytes,
+) -> List[Dict[str, Any]]:
+    """
+    Lấy danh sách CIP-68 NFT có `owner` trong datum bằng owner_pkh.
+    
+    Dùng secondary index owner -> token names, chi phí tỉ lệ với số NFT
+    của owner chứ không phải kích thước toàn bộ collection.
+    
+    Args:
+        context: BlockFrost chain context
+        owner_pkh: Public key hash của owner (28 bytes)
+        
+    Returns:
+        List token data (cùng format với list_all_tokens)
+    """
+    network = get_network()
+    policy_id = get_fixed_policy_id()
+    store_address = get_fixed_store_address(network)
+    
+    index = get_reference_index(context, store_address, policy_id)
+    return [
+        _token_data_from_entry(entry, policy_id)
+        for entry in index.lookup_owner(owner_pkh)
+    ]
+
+
+def _token_data_from_entry(entry, policy_id: ScriptHash) -> Dict[str, Any]:
+    """Convert IndexEntry sang dict trả về cho list_all_tokens / list_tokens_by_owner."""
+    datum = entry.datum
+    token_data = {
+        "token_name": entry.token_name.decode("utf-8"),
+        "policy_id": str(policy_id),
+        "amount": 1, # NFT thì luôn là 1
+        "metadata": {}
+    }
+    
+    if isinstance(datum, CIP68Datum):
+        # Convert bytes metadata sang string cho đẹp
+        meta_dict = {}
+        for k, v in datum.metadata.items():
+            key = k.decode("utf-8") if isinstance(k, bytes) else str(k)
+            val = v.decode("utf-8") if isinstance(v, bytes) else str(v)
+            meta_dict[key] = val
+            
+        token_data["metadata"] = meta_dict
+        token_data["version"] = datum.version
+        token_data["owner_in_datum"] = datum.owner.hex() # Để tham khảo
+    
+    return token_data
+
+
 if __name__ == "__main__":
     # Test basic functionality
     print("CIP-68 Off-chain module loaded successfully!")
@@ -0,0 +1,273 @@
+"""
+CIP-68 Reference Scripts
+========================
+Dùng `cip68_mint` / `cip68_store` qua reference input (CIP-33) thay vì
+đính kèm script trong witness set của mỗi tx.
+
+Mỗi mint / update / burn đính kèm toàn bộ compiled script: tx lớn hơn vài
+KB, phí tính theo byte cao hơn, và batch chứa được ít item hơn trong
+`max_tx_size`. Deploy một lần:
+
+- Một tx khóa mỗi script trong một UTxO (`script_ref`) tại một address
+  riêng của owner (native script `ScriptPubkey`): coin selection của ví
+  không tiêu mất các UTxO này, owner vẫn thu hồi được ADA bằng chữ ký
+- Vị trí các UTxO được ghi vào file JSON (mặc định
+  `smart_contract/reference_scripts.json`, env `REFERENCE_SCRIPTS_PATH`,
+  đặt rỗng để tắt)
+
+Build (`script_source`): script có reference UTxO cùng hash -> truyền UTxO
+cho `add_minting_script` / `add_script_input` (reference input, script không
+nằm trong witness set); không có -> script inline như trước. Phí reference
+script (`minFeeRefScriptCostPerByte`) do pycardano tính.
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence
+
+from pycardano import (
+    Address,
+    PlutusV3Script,
+    ScriptHash,
+    ScriptPubkey,
+    Transaction,
+    TransactionBuilder,
+    TransactionInput,
+    TransactionOutput,
+    UTxO,
+    Value,
+    VerificationKeyHash,
+    min_lovelace_post_alonzo,
+    script_hash,
+)
+
+from .cip68_index import utxo_ref
+
+
+# File ghi vị trí các reference script UTxO (tạo bởi deploy_reference_scripts)
+DEFAULT_REFERENCE_SCRIPTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "smart_contract",
+    "reference_scripts.json",
+)
+
+
+@dataclass
+class ReferenceScripts:
+    """
+    Các UTxO chứa script_ref của cip68_mint và cip68_store.
+
+    Fields:
+        mint_utxo: UTxO chứa minting policy
+        store_utxo: UTxO chứa store validator
+    """
+    mint_utxo: UTxO
+    store_utxo: UTxO
+    _by_hash: Dict[ScriptHash, UTxO] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        for utxo in (self.mint_utxo, self.store_utxo):
+            self._by_hash[script_hash(utxo.output.script)] = utxo
+
+    @classmethod
+    def from_transaction(cls, tx: Transaction, mint_index: int = 0, store_index: int = 1):
+        """Reference scripts từ tx deploy (dùng ngay, không chờ confirm)."""
+        outputs = tx.transaction_body.outputs
+        return cls(
+            UTxO(TransactionInput(tx.id, mint_index), outputs[mint_index]),
+            UTxO(TransactionInput(tx.id, store_index), outputs[store_index]),
+        )
+
+    def utxo_for(self, script) -> Optional[UTxO]:
+        """Reference UTxO chứa script có cùng hash (None nếu blueprint đã đổi)."""
+        return self._by_hash.get(script_hash(script))
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "ref": utxo_ref(utxo.input),
+                "script_hash": str(script_hash(utxo.output.script)),
+                "script_bytes": len(utxo.output.script),
+            }
+            for name, utxo in (("mint", self.mint_utxo), ("store", self.store_utxo))
+        }
+
+
+# ============================================================================
+# DEPLOY
+# ============================================================================
+
+def reference_script_address(owner_pkh: VerificationKeyHash, network) -> Address:
+    """
+    Address khóa reference scripts: native script chỉ cần chữ ký owner.
+
+    Khác address của ví nên `add_input_address(wallet)` không chọn các UTxO
+    này; owner spend bằng native script để thu hồi ADA khi không dùng nữa.
+    """
+    return Address(script_hash(ScriptPubkey(owner_pkh)), network=network)
+
+
+def build_deploy_tx(
+    context,
+    owner_address: Address,
+    scripts: Sequence[PlutusV3Script],
+    lock_address: Address,
+) -> TransactionBuilder:
+    """
+    TransactionBuilder khóa mỗi script trong một output (script_ref) tại
+    lock_address, coin = min-UTxO của output (tăng theo kích thước script).
+
+    Returns:
+        TransactionBuilder chưa build (output i chứa scripts[i])
+    """
+    builder = TransactionBuilder(context)
+    builder.add_input_address(owner_address)
+    for script in scripts:
+        output = TransactionOutput(lock_address, Value(0), script=script)
+        output.amount.coin = min_lovelace_post_alonzo(output, context)
+        builder.add_output(output)
+    return builder
+
+
+def save_reference_scripts(path: str, reference_scripts: ReferenceScripts) -> None:
+    """Ghi vị trí reference scripts (ghi file tạm rồi rename)."""
+    data = {
+        "lock_address": str(reference_scripts.mint_utxo.output.address),
+        **reference_scripts.to_dict(),
+    }
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+# ============================================================================
+# LOAD
+# ============================================================================
+
+# Cache theo đường dẫn: (mtime, id(context), ReferenceScripts | None)
+_reference_scripts: Dict[str, tuple] = {}
+_reference_scripts_lock = threading.Lock()
+
+
+def load_reference_scripts(context, path: str) -> Optional[ReferenceScripts]:
+    """
+    Đọc file deploy và lấy các reference UTxO từ chain (một lần đọc UTxO
+    của lock address).
+
+    Returns:
+        ReferenceScripts, hoặc None nếu UTxO không còn / script không khớp
+        hash đã ghi (vd. đã thu hồi ADA) -> build với script inline
+    """
+    with open(path) as f:
+        data = json.load(f)
+    utxos = {
+        utxo_ref(utxo.input): utxo
+        for utxo in context.utxos(Address.from_primitive(data["lock_address"]))
+    }
+    found = []
+    for name in ("mint", "store"):
+        utxo = utxos.get(data[name]["ref"])
+        if utxo is None or utxo.output.script is None or (
+            str(script_hash(utxo.output.script)) != data[name]["script_hash"]
+        ):
+            print(f"Warning: reference script {name} ({data[name]['ref']}) not found, using inline scripts")
+            return None
+        found.append(utxo)
+    return ReferenceScripts(*found)
+
+
+def get_reference_scripts(context, path: Optional[str] = None) -> Optional[ReferenceScripts]:
+    """
+    Reference scripts dùng chung trong process.
+
+    Kết quả được cache theo mtime của file: chain chỉ được đọc lại khi file
+    đổi (vd. sau khi deploy lại).
+
+    Args:
+        context: Chain context
+        path: File deploy (mặc định: env REFERENCE_SCRIPTS_PATH hoặc
+              smart_contract/reference_scripts.json; rỗng -> tắt)
+
+    Returns:
+        ReferenceScripts, hoặc None (chưa deploy / đã tắt)
+    """
+    if path is None:
+        path = os.getenv("REFERENCE_SCRIPTS_PATH", DEFAULT_REFERENCE_SCRIPTS_PATH)
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _reference_scripts_lock:
+        cached = _reference_scripts.get(path)
+        if cached is not None and cached[:2] == (mtime, id(context)):
+            return cached[2]
+        reference_scripts = load_reference_scripts(context, path)
+        _reference_scripts[path] = (mtime, id(context), reference_scripts)
+        return reference_scripts
+
+
+# ============================================================================
+# BUILD
+# ============================================================================
+
+def script_source(
+    builder: TransactionBuilder,
+    script: PlutusV3Script,
+    reference_scripts: Optional[ReferenceScripts] = None,
+):
+    """
+    Tham số script cho `add_minting_script` / `add_script_input`.
+
+    - Có reference UTxO cùng hash -> UTxO (thêm vào reference inputs)
+    - UTxO đã là reference input của builder (vd. input thứ hai của batch
+      update) -> script inline: pycardano bỏ script trùng hash với
+      reference script khỏi witness set và không tính phí reference script
+      thêm một lần nữa
+    - Không có reference scripts -> script inline
+    """
+    if reference_scripts is None:
+        return script
+    utxo = reference_scripts.utxo_for(script)
+    if utxo is None or utxo in builder.reference_inputs:
+        return script
+    return utxo
+
+
+def measure_builder(builder: TransactionBuilder, change_address: Address) -> Dict[str, int]:
+    """Build (không ký, không submit) và đo size (bytes) và phí (lovelace)."""
+    tx_body = builder.build(change_address=change_address)
+    tx = Transaction(tx_body, builder.build_witness_set())
+    return {"size": len(tx.to_cbor()), "fee": tx_body.fee}
+
+
+def compare_script_modes(
+    build: Callable[[Optional[ReferenceScripts]], TransactionBuilder],
+    change_address: Address,
+    reference_scripts: ReferenceScripts,
+) -> Dict[str, object]:
+    """
+    Build cùng một tx với script inline và với reference scripts.
+
+    Args:
+        build: reference_scripts (None = inline) -> TransactionBuilder
+        change_address: Change address
+        reference_scripts: Reference scripts đã deploy
+
+    Returns:
+        Dict với inline / reference ({size, fee}), size_saved và fee_saved
+    """
+    inline = measure_builder(build(None), change_address)
+    reference = measure_builder(build(reference_scripts), change_address)
+    return {
+        "inline": inline,
+        "reference": reference,
+        "size_saved": inline["size"] - reference["size"],
+        "fee_saved": inline["fee"] - reference["fee"],
+    }
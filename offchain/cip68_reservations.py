@@ -0,0 +1,520 @@
+"""
+CIP-68 UTxO Reservations
+========================
+Giữ chỗ (reserve) UTxO cho một transaction đang chờ ký / submit.
+
+Hai request update / burn cùng một token được build gần nhau sẽ chọn
+cùng một reference UTxO - chỉ một tx lên được chain, tx còn lại tốn một
+lần ký ví và một lần submit vô ích. Reservation manager:
+
+- Mỗi UTxO chỉ được giao cho một tx đang chờ tại một thời điểm
+- Builder khác muốn dùng UTxO đó: chờ tối đa `wait` giây (serialize)
+  hoặc nhận ReservationConflict ngay (fail fast)
+- Reservation được release khi submit lỗi, build lỗi, hoặc hết TTL
+  (vd. người dùng không ký); submit thành công -> commit (UTxO đã bị spend)
+
+Wallet input leasing (WalletInputLeases):
+- Nhiều build song song từ cùng một ví: coin selection của mỗi build loại
+  trừ (`excluded_inputs`) các UTxO đã được lease cho tx khác đang chờ
+- Inputs (và collateral) của tx vừa build được lease ngay (dưới lock theo
+  address) nên các tx song song luôn có inputs rời nhau
+
+Nhiều worker (`use_shared`): reservation và lease được ghi thêm vào
+SharedCache bằng `claim` (một write transaction SQLite) - worker khác thấy
+UTxO đang bị giữ như reservation local; build của cùng một ví được
+serialize giữa các worker bằng một claim trên key `build:<address>`.
+"""
+
+import os
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Iterable, Tuple, Union
+
+from pycardano import Address, TransactionBody, TransactionBuilder, TransactionId, UTxO
+
+from .cip68_index import IndexEntry, ReferenceTokenIndex, utxo_ref
+from .cip68_shared import SharedCache
+
+
+# Thời gian (giây) giữ một reservation - đủ cho người dùng ký trong ví
+DEFAULT_RESERVATION_TTL = 120.0
+
+# Thời gian (giây) giữ lease trên inputs của ví
+DEFAULT_LEASE_TTL = 120.0
+
+# Giá trị tối thiểu (lovelace) của UTxO được chọn làm collateral
+MIN_COLLATERAL_COIN = 5_000_000
+
+# Namespace SharedCache của reservation (store UTxOs) và lease inputs của ví
+SHARED_RESERVATIONS_NS = "reservations"
+SHARED_LEASES_NS = "wallet_leases"
+SHARED_BUILD_LOCKS_NS = "wallet_builds"
+
+# Chu kỳ (giây) kiểm tra lại khi UTxO bị giữ bởi worker khác (không có notify)
+DEFAULT_SHARED_POLL_INTERVAL = 0.05
+
+# TTL (giây) của khóa build theo address giữa các worker (worker chết giữa build)
+DEFAULT_BUILD_LOCK_TTL = 30.0
+
+
+class ReservationConflict(Exception):
+    """UTxO đang được giữ bởi một transaction khác."""
+
+    def __init__(self, refs: List[str]):
+        super().__init__(f"UTxO already reserved by a pending transaction: {', '.join(refs)}")
+        self.refs = refs
+
+
+@dataclass
+class Reservation:
+    """Một nhóm UTxO được giữ cho cùng một transaction."""
+    id: str
+    refs: List[str]
+    holder: Optional[str]
+    expires_at: float
+    tx_id: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+
+def _tx_key(tx_id: Union[str, TransactionId]) -> str:
+    return tx_id if isinstance(tx_id, str) else tx_id.payload.hex()
+
+
+class ReservationManager:
+    """
+    Quản lý reservation theo UTxO ref ("tx_hash#index").
+
+    Thread-safe; builder chờ trên một Condition khi `wait > 0`. Với
+    `shared`, UTxO còn được claim trong SharedCache nên các process khác
+    dùng cùng file cũng không giữ được chúng.
+    """
+
+    def __init__(
+        self,
+        ttl: float = DEFAULT_RESERVATION_TTL,
+        shared: Optional[SharedCache] = None,
+        namespace: str = SHARED_RESERVATIONS_NS,
+    ):
+        self.ttl = ttl
+        self.shared = shared
+        self.namespace = namespace
+        # Chủ của các claim trong SharedCache (một token cho cả process)
+        self.owner = f"{os.getpid()}:{uuid.uuid4().hex}".encode()
+        self._cond = threading.Condition()
+        self._by_ref: Dict[str, Reservation] = {}
+        self._by_id: Dict[str, Reservation] = {}
+        self._by_tx: Dict[str, Reservation] = {}
+
+        self.stats: Dict[str, int] = {
+            "reserved": 0,
+            "conflicts": 0,
+            "waited": 0,
+            "committed": 0,
+            "released": 0,
+            "expired": 0,
+            "shared_conflicts": 0,
+        }
+
+    def use_shared(self, shared: Optional[SharedCache], namespace: Optional[str] = None) -> None:
+        """Bật (hoặc tắt với None) reservation dùng chung giữa các worker."""
+        with self._cond:
+            self.shared = shared
+            if namespace is not None:
+                self.namespace = namespace
+
+    # ------------------------------------------------------------------
+    # Internal
+    # ------------------------------------------------------------------
+
+    def _drop(self, reservation: Reservation) -> None:
+        self._by_id.pop(reservation.id, None)
+        if reservation.tx_id is not None:
+            self._by_tx.pop(reservation.tx_id, None)
+        dropped = []
+        for ref in reservation.refs:
+            if self._by_ref.get(ref) is reservation:
+                del self._by_ref[ref]
+                dropped.append(ref)
+        if self.shared is not None and dropped:
+            self.shared.unclaim(self.namespace, dropped, self.owner)
+        self._cond.notify_all()
+
+    def _expire(self) -> None:
+        for reservation in list(self._by_id.values()):
+            if reservation.expired:
+                self._drop(reservation)
+                self.stats["expired"] += 1
+
+    def _conflicts(self, refs: List[str]) -> List[str]:
+        return [ref for ref in refs if ref in self._by_ref]
+
+    def _next_expiry(self, refs: List[str]) -> float:
+        return min(self._by_ref[ref].expires_at for ref in refs)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def reserve(
+        self,
+        refs: Iterable[str],
+        holder: Optional[str] = None,
+        wait: float = 0.0,
+        ttl: Optional[float] = None,
+    ) -> Reservation:
+        """
+        Giữ tất cả `refs` cho một transaction (all-or-nothing).
+
+        Args:
+            refs: UTxO refs cần giữ
+            holder: Mô tả người giữ (vd. địa chỉ ví) - cho metrics / log
+            wait: Thời gian tối đa (giây) chờ reservation khác được release;
+                0 = fail fast
+            ttl: TTL riêng (mặc định self.ttl)
+
+        Returns:
+            Reservation
+
+        Raises:
+            ReservationConflict: Nếu vẫn còn UTxO bị giữ sau `wait` giây
+        """
+        refs = list(dict.fromkeys(refs))
+        ttl = self.ttl if ttl is None else ttl
+        deadline = time.monotonic() + wait
+        with self._cond:
+            waited = False
+            while True:
+                self._expire()
+                conflicts = self._conflicts(refs)
+                shared_conflict = False
+                if not conflicts and self.shared is not None:
+                    conflicts = self.shared.claim(self.namespace, refs, self.owner, ttl)
+                    shared_conflict = bool(conflicts)
+                if not conflicts:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats["conflicts"] += 1
+                    if shared_conflict:
+                        self.stats["shared_conflicts"] += 1
+                    raise ReservationConflict(conflicts)
+                waited = True
+                if shared_conflict:
+                    # Worker khác release không notify được -> kiểm tra lại định kỳ
+                    self._cond.wait(min(remaining, DEFAULT_SHARED_POLL_INTERVAL))
+                else:
+                    # Thức dậy khi có release hoặc khi reservation đang giữ hết hạn
+                    self._cond.wait(min(remaining, max(0.0, self._next_expiry(conflicts) - time.monotonic())))
+
+            reservation = Reservation(
+                id=uuid.uuid4().hex,
+                refs=refs,
+                holder=holder,
+                expires_at=time.monotonic() + ttl,
+            )
+            for ref in refs:
+                self._by_ref[ref] = reservation
+            self._by_id[reservation.id] = reservation
+            self.stats["reserved"] += 1
+            if waited:
+                self.stats["waited"] += 1
+            return reservation
+
+    def bind(self, reservation: Reservation, tx_id: Union[str, TransactionId]) -> None:
+        """Gắn reservation với transaction đã build (để submit tìm lại được)."""
+        with self._cond:
+            if reservation.id not in self._by_id:
+                return
+            if reservation.tx_id is not None:
+                self._by_tx.pop(reservation.tx_id, None)
+            reservation.tx_id = _tx_key(tx_id)
+            self._by_tx[reservation.tx_id] = reservation
+
+    def merge(self, reservations: Iterable[Optional[Reservation]]) -> Optional[Reservation]:
+        """
+        Gộp nhiều reservation thành một (vd. các token của một batch tx)
+        để bind / commit / release theo một tx id. UTxO không bị thả ra
+        giữa chừng; TTL được tính lại từ lúc gộp.
+        """
+        with self._cond:
+            live = [r for r in reservations if r is not None and r.id in self._by_id]
+            if not live:
+                return None
+            merged = Reservation(
+                id=uuid.uuid4().hex,
+                refs=[ref for r in live for ref in r.refs],
+                holder=live[0].holder,
+                expires_at=time.monotonic() + self.ttl,
+            )
+            for reservation in live:
+                del self._by_id[reservation.id]
+                if reservation.tx_id is not None:
+                    self._by_tx.pop(reservation.tx_id, None)
+            for ref in merged.refs:
+                self._by_ref[ref] = merged
+            self._by_id[merged.id] = merged
+            if self.shared is not None:
+                # Cùng owner -> chỉ gia hạn TTL của các claim
+                self.shared.claim(self.namespace, merged.refs, self.owner, self.ttl)
+            return merged
+
+    def release(self, reservation: Optional[Reservation]) -> None:
+        """Trả lại UTxO (build lỗi / submit lỗi)."""
+        if reservation is None:
+            return
+        with self._cond:
+            if reservation.id in self._by_id:
+                self._drop(reservation)
+                self.stats["released"] += 1
+
+    def commit(self, reservation: Optional[Reservation]) -> None:
+        """Submit thành công - UTxO đã bị spend, bỏ reservation."""
+        if reservation is None:
+            return
+        with self._cond:
+            if reservation.id in self._by_id:
+                self._drop(reservation)
+                self.stats["committed"] += 1
+
+    def for_tx(self, tx_id: Union[str, TransactionId]) -> Optional[Reservation]:
+        with self._cond:
+            return self._by_tx.get(_tx_key(tx_id))
+
+    def release_tx(self, tx_id: Union[str, TransactionId]) -> None:
+        self.release(self.for_tx(tx_id))
+
+    def commit_tx(self, tx_id: Union[str, TransactionId]) -> None:
+        self.commit(self.for_tx(tx_id))
+
+    def is_reserved(self, ref: str) -> bool:
+        with self._cond:
+            self._expire()
+            if ref in self._by_ref:
+                return True
+            return self.shared is not None and self.shared.get(self.namespace, ref) is not None
+
+    def reserved_refs(self) -> List[str]:
+        """UTxO đang bị giữ (kể cả bởi worker khác khi dùng SharedCache)."""
+        with self._cond:
+            self._expire()
+            refs = dict.fromkeys(self._by_ref)
+            if self.shared is not None:
+                refs.update(dict.fromkeys(key for key, _, _ in self.shared.items(self.namespace)))
+            return list(refs)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            self._expire()
+            return {
+                **self.stats,
+                "active": len(self._by_id),
+                "reserved_utxos": len(self._by_ref),
+            }
+
+
+def reserve_reference_entry(
+    index: ReferenceTokenIndex,
+    token_name: Union[str, bytes],
+    manager: Optional[ReservationManager] = None,
+    holder: Optional[str] = None,
+    wait: float = 0.0,
+) -> Tuple[Optional[IndexEntry], Optional[Reservation]]:
+    """
+    Tìm reference UTxO của token và giữ nó cho transaction sắp build.
+
+    Nếu phải chờ một tx khác, UTxO cũ có thể đã bị spend bởi tx đó
+    (index đã apply) -> lookup lại và giữ UTxO mới.
+
+    Args:
+        index: Reference token index
+        token_name: Tên token (không prefix)
+        manager: ReservationManager (mặc định: manager dùng chung)
+        holder: Người giữ (vd. địa chỉ ví)
+        wait: Thời gian tối đa (giây) chờ tx khác
+
+    Returns:
+        (entry, reservation), hoặc (None, None) nếu token không tồn tại
+
+    Raises:
+        ReservationConflict: Token đang có tx khác chờ ký / submit
+    """
+    manager = manager or get_reservation_manager()
+    deadline = time.monotonic() + wait
+    entry = index.lookup(token_name)
+    while entry is not None:
+        reservation = manager.reserve(
+            [entry.ref], holder=holder, wait=max(0.0, deadline - time.monotonic())
+        )
+        current = index.lookup(token_name)
+        if current is not None and current.ref == entry.ref:
+            return current, reservation
+        manager.release(reservation)
+        entry = current
+    return None, None
+
+
+# ============================================================================
+# WALLET INPUT LEASING
+# ============================================================================
+
+def _pick_collateral(utxos: List[UTxO]) -> Optional[UTxO]:
+    """UTxO chỉ chứa ADA (>= MIN_COLLATERAL_COIN), không script, lớn nhất."""
+    candidates = [
+        u for u in utxos
+        if not u.output.amount.multi_asset
+        and u.output.script is None
+        and u.output.datum is None and u.output.datum_hash is None
+        and u.output.amount.coin >= MIN_COLLATERAL_COIN
+        and not u.output.address.address_type.name.startswith("SCRIPT")
+    ]
+    return max(candidates, key=lambda u: u.output.amount.coin, default=None)
+
+
+class WalletInputLeases:
+    """
+    Lease inputs của ví cho các transaction được build song song.
+
+    `build()` chạy coin selection của TransactionBuilder dưới lock theo
+    address, loại trừ các UTxO đang được lease, rồi lease inputs của tx
+    vừa build. Build cho các address khác nhau vẫn chạy song song.
+
+    Với `shared`, lease nằm trong SharedCache và lock theo address là một
+    claim trong SharedCache (giữ trong lúc build) - worker khác không chọn
+    trùng inputs.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_LEASE_TTL, shared: Optional[SharedCache] = None):
+        self.manager = ReservationManager(ttl=ttl, shared=shared, namespace=SHARED_LEASES_NS)
+        self.build_lock_ttl = DEFAULT_BUILD_LOCK_TTL
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def use_shared(self, shared: Optional[SharedCache]) -> None:
+        """Bật (hoặc tắt với None) lease dùng chung giữa các worker."""
+        self.manager.use_shared(shared, SHARED_LEASES_NS)
+
+    def _address_lock(self, address: str) -> threading.Lock:
+        with self._locks_lock:
+            lock = self._locks.get(address)
+            if lock is None:
+                lock = self._locks[address] = threading.Lock()
+            return lock
+
+    def _acquire_shared_lock(self, address: str) -> None:
+        """Claim `build:<address>` trong SharedCache (chờ worker khác build xong)."""
+        shared = self.manager.shared
+        if shared is None:
+            return
+        key = [f"build:{address}"]
+        while shared.claim(SHARED_BUILD_LOCKS_NS, key, self.manager.owner, self.build_lock_ttl):
+            time.sleep(DEFAULT_SHARED_POLL_INTERVAL)
+
+    def _release_shared_lock(self, address: str) -> None:
+        shared = self.manager.shared
+        if shared is not None:
+            shared.unclaim(SHARED_BUILD_LOCKS_NS, [f"build:{address}"], self.manager.owner)
+
+    def build(
+        self,
+        builder: TransactionBuilder,
+        address: Union[str, Address],
+        holder: Optional[str] = None,
+        **build_kwargs,
+    ) -> Tuple[TransactionBody, Reservation]:
+        """
+        `builder.build(**build_kwargs)` với inputs không trùng các tx đang chờ.
+
+        Args:
+            builder: TransactionBuilder đã `add_input_address(address)`
+            address: Địa chỉ ví cần lease inputs
+            holder: Người giữ lease (mặc định: address)
+            **build_kwargs: Truyền cho builder.build (vd. change_address)
+
+        Returns:
+            (tx_body, lease) - lease được commit / release theo tx id
+
+        Raises:
+            ReservationConflict: Input được thêm trực tiếp (vd. UTxO chứa
+                user token) đang được lease cho tx khác
+        """
+        address = str(address)
+        with self._address_lock(address):
+            self._acquire_shared_lock(address)
+            try:
+                return self._build_locked(builder, address, holder, build_kwargs)
+            finally:
+                self._release_shared_lock(address)
+
+    def _build_locked(
+        self,
+        builder: TransactionBuilder,
+        address: str,
+        holder: Optional[str],
+        build_kwargs: Dict[str, Any],
+    ) -> Tuple[TransactionBody, Reservation]:
+        leased = set(self.manager.reserved_refs())
+        explicit = {utxo_ref(u.input) for u in builder.inputs}
+        busy = sorted(explicit & leased)
+        if busy:
+            raise ReservationConflict(busy)
+
+        wallet_utxos = builder.context.utxos(address)
+        wallet_refs = {utxo_ref(u.input) for u in wallet_utxos}
+        free = [u for u in wallet_utxos if utxo_ref(u.input) not in leased]
+        builder.excluded_inputs = list(builder.excluded_inputs) + [
+            u for u in wallet_utxos if utxo_ref(u.input) in leased
+        ]
+        # Collateral của pycardano được chọn từ context.utxos() (không xét
+        # excluded_inputs) -> chọn trước từ các UTxO chưa lease
+        if builder.all_scripts and not builder.collaterals:
+            collateral = _pick_collateral(free)
+            if collateral is not None:
+                builder.collaterals.append(collateral)
+
+        tx_body = builder.build(**build_kwargs)
+
+        # Input do coin selection chọn luôn thuộc ví, kể cả output vừa xuất hiện
+        # sau snapshot trên (vd. change của tx được submit trong lúc build)
+        spent = list(tx_body.inputs) + list(tx_body.collateral or [])
+        refs = [
+            utxo_ref(i) for i in spent
+            if utxo_ref(i) in wallet_refs or utxo_ref(i) not in explicit
+        ]
+        lease = self.manager.reserve(refs, holder=holder or address)
+        self.manager.bind(lease, tx_body.id)
+        return tx_body, lease
+
+    def commit_tx(self, tx_id: Union[str, TransactionId]) -> None:
+        self.manager.commit_tx(tx_id)
+
+    def release_tx(self, tx_id: Union[str, TransactionId]) -> None:
+        self.manager.release_tx(tx_id)
+
+    def release(self, lease: Optional[Reservation]) -> None:
+        self.manager.release(lease)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.manager.cache_stats()
+
+
+# Manager dùng chung trong process (store UTxOs)
+reservation_manager = ReservationManager()
+
+# Lease inputs của ví dùng chung trong process
+wallet_leases = WalletInputLeases()
+
+
+def get_reservation_manager() -> ReservationManager:
+    """Lấy ReservationManager dùng chung của process."""
+    return reservation_manager
+
+
+def get_wallet_leases() -> WalletInputLeases:
+    """Lấy WalletInputLeases dùng chung của process."""
+    return wallet_leases
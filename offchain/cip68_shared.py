@@ -0,0 +1,265 @@
+"""
+CIP-68 Shared Cache (multi-worker)
+==================================
+Cache dùng chung giữa các worker process (vd. `uvicorn --workers N`)
+trên cùng một máy, lưu trong một file SQLite (WAL mode).
+
+Mỗi worker giữ cache trong bộ nhớ như trước; SharedCache là tầng thứ hai:
+- Worker miss cache local -> đọc shared cache trước khi gọi BlockFrost
+- Worker fetch từ BlockFrost -> ghi kết quả vào shared cache
+- Thay đổi cần lan sang worker khác (vd. submit thành công) -> ghi dữ
+  liệu rồi tăng generation của namespace; worker khác so sánh generation
+  (một SELECT) và nạp lại phần đã thay đổi
+
+Claims (`claim` / `unclaim`): khóa theo key giữa các process - dùng cho
+reservation reference UTxO và lease inputs của ví; key đã có chủ còn hạn
+thì process khác không giành được.
+
+LeaderLock: file lock (fcntl) để chỉ một worker chạy chain follower;
+các worker còn lại đọc index từ snapshot (xem SnapshotReplica).
+
+Schema:
+    entries(ns TEXT, key TEXT, value BLOB, expires_at REAL)  -- PK (ns, key)
+    generations(ns TEXT PRIMARY KEY, gen INTEGER)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: mỗi worker tự chạy follower
+    fcntl = None
+
+
+class SharedCache:
+    """
+    Key-value cache có TTL trong một file SQLite dùng chung giữa các process.
+
+    Mỗi process mở connection riêng; trong một process connection được
+    dùng chung giữa các thread qua một Lock.
+    """
+
+    def __init__(self, path: str, timeout: float = 5.0):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "ns TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, "
+            "expires_at REAL NOT NULL, PRIMARY KEY (ns, key))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS generations (ns TEXT PRIMARY KEY, gen INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "bumps": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def get(self, ns: str, key: str) -> Optional[Tuple[bytes, float]]:
+        """
+        Đọc một entry còn hạn.
+
+        Returns:
+            (value, số giây còn lại của TTL), hoặc None nếu không có / hết hạn
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM entries WHERE ns = ? AND key = ? AND expires_at > ?",
+                (ns, key, now),
+            ).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+        return bytes(row[0]), row[1] - now
+
+    def put(self, ns: str, key: str, value: bytes, ttl: float) -> None:
+        self.put_many(ns, [(key, value)], ttl)
+
+    def put_many(self, ns: str, items: List[Tuple[str, bytes]], ttl: float) -> None:
+        """Ghi nhiều entry trong một transaction."""
+        expires_at = time.time() + ttl
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    [(ns, key, value, expires_at) for key, value in items],
+                )
+            self.stats["writes"] += len(items)
+
+    def items(self, ns: str) -> List[Tuple[str, bytes, float]]:
+        """Các entry còn hạn của một namespace: [(key, value, TTL còn lại)]."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, value, expires_at FROM entries WHERE ns = ? AND expires_at > ?",
+                (ns, now),
+            ).fetchall()
+        return [(key, bytes(value), expires_at - now) for key, value, expires_at in rows]
+
+    def delete(self, ns: str, key: Optional[str] = None) -> None:
+        """Xóa một entry (hoặc cả namespace nếu key=None)."""
+        with self._lock:
+            with self._conn:
+                if key is None:
+                    self._conn.execute("DELETE FROM entries WHERE ns = ?", (ns,))
+                else:
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key)
+                    )
+
+    # ------------------------------------------------------------------
+    # Claims (khóa theo key giữa các process)
+    # ------------------------------------------------------------------
+
+    def claim(self, ns: str, keys: List[str], owner: bytes, ttl: float) -> List[str]:
+        """
+        Giành tất cả `keys` cho `owner` (all-or-nothing).
+
+        Chạy trong một write transaction (BEGIN IMMEDIATE lấy write lock của
+        SQLite) nên hai process không thể cùng giành một key. Key đã thuộc
+        owner -> gia hạn TTL.
+
+        Returns:
+            Các key đang thuộc owner khác (rỗng nếu giành được)
+        """
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(
+                    "DELETE FROM entries WHERE ns = ? AND key = ? AND expires_at <= ?",
+                    [(ns, key, now) for key in keys],
+                )
+                conflicts = []
+                for key in keys:
+                    row = self._conn.execute(
+                        "SELECT value FROM entries WHERE ns = ? AND key = ?", (ns, key)
+                    ).fetchone()
+                    if row is not None and bytes(row[0]) != owner:
+                        conflicts.append(key)
+                if conflicts:
+                    return conflicts
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (ns, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    [(ns, key, owner, now + ttl) for key in keys],
+                )
+            self.stats["writes"] += len(keys)
+        return []
+
+    def unclaim(self, ns: str, keys: List[str], owner: bytes) -> None:
+        """Trả lại các key của owner (key đã bị owner khác giành lại sau TTL thì giữ nguyên)."""
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "DELETE FROM entries WHERE ns = ? AND key = ? AND value = ?",
+                    [(ns, key, owner) for key in keys],
+                )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            with self._conn:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE expires_at <= ?", (time.time(),)
+                )
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Generations (cross-process invalidation)
+    # ------------------------------------------------------------------
+
+    def generation(self, ns: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT gen FROM generations WHERE ns = ?", (ns,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, ns: str) -> int:
+        """Tăng generation của namespace - báo cho các worker khác nạp lại."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO generations (ns, gen) VALUES (?, 1) "
+                    "ON CONFLICT(ns) DO UPDATE SET gen = gen + 1",
+                    (ns,),
+                )
+                gen = self._conn.execute(
+                    "SELECT gen FROM generations WHERE ns = ?", (ns,)
+                ).fetchone()[0]
+            self.stats["bumps"] += 1
+        return gen
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {**self.stats, "path": self.path, "entries": count}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class LeaderLock:
+    """
+    File lock không chặn: worker giữ được lock là leader.
+
+    Lock được hệ điều hành trả lại khi process thoát, nên worker khác có
+    thể thử lại `acquire()` định kỳ để thay thế leader đã chết.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._held = False
+
+    @property
+    def is_leader(self) -> bool:
+        return self._held
+
+    def acquire(self) -> bool:
+        if self._held:
+            return True
+        if fcntl is None:
+            self._held = True
+            return True
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        self._held = True
+        return True
+
+    def release(self) -> None:
+        self._held = False
+        if self._file is None:
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
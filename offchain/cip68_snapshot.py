@@ -0,0 +1,355 @@
+"""
+CIP-68 Index Snapshot (SQLite)
+==============================
+Lưu reference token index xuống file SQLite (WAL mode) cùng với
+chain point cuối cùng đã xử lý.
+
+Khi khởi động lại:
+- Warm start: load snapshot -> follower chỉ cần catch-up phần delta
+  kể từ chain point đã lưu
+- Cold start: không có snapshot -> quét toàn bộ store address
+
+Mỗi lần save() chỉ ghi phần thay đổi so với lần trước: UTxO mới được
+upsert, UTxO đã spend thành tombstone (deleted = 1), tất cả gắn sequence
+number của lần ghi. Tombstone được dọn khi vượt DEFAULT_TOMBSTONE_LIMIT
+(meta `compacted_seq`).
+
+Multi-worker: chỉ worker leader chạy ChainFollower và ghi snapshot; các
+worker khác dùng SnapshotReplica để đồng bộ index từ snapshot - mỗi lần
+chỉ đọc các row có seq mới hơn lần đọc trước - không worker nào khác gọi
+BlockFrost cho index.
+
+Schema:
+    entries(ref TEXT PRIMARY KEY, utxo BLOB, seq INTEGER, deleted INTEGER)
+                                               -- UTxO dạng CBOR
+    meta(key TEXT PRIMARY KEY, value TEXT)     -- chain point, store address, seq, ...
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any, Callable, List, Set, Tuple
+
+from pycardano import UTxO
+
+from .cip68_index import ReferenceTokenIndex, utxo_ref
+from .cip68_indexer import ChainPoint
+
+
+# Số tombstone tối đa trước khi dọn (replica cũ hơn phải load lại toàn bộ)
+DEFAULT_TOMBSTONE_LIMIT = 10_000
+
+
+class IndexSnapshot:
+    """
+    Snapshot của ReferenceTokenIndex trong một file SQLite.
+
+    Connection dùng chung giữa các thread (follower thread ghi,
+    lifespan đọc) nên mọi truy cập đi qua một Lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries (ref TEXT PRIMARY KEY, utxo BLOB NOT NULL, "
+            "seq INTEGER NOT NULL DEFAULT 0, deleted INTEGER NOT NULL DEFAULT 0)"
+        )
+        # Snapshot cũ (chưa có seq / deleted)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(entries)")}
+        for column in ("seq", "deleted"):
+            if column not in columns:
+                self._conn.execute(
+                    f"ALTER TABLE entries ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+                )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_seq ON entries (seq)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.tombstone_limit = DEFAULT_TOMBSTONE_LIMIT
+        # Ref đang có trong file (leader) và seq tương ứng - None = chưa đọc
+        self._saved: Optional[Set[str]] = None
+        self._saved_seq: Optional[int] = None
+        self._tombstones = 0
+
+    # ------------------------------------------------------------------
+    # Meta
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._meta_value(key)
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+            self._conn.commit()
+
+    def _meta_value(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _meta_int(self, key: str) -> int:
+        return int(self._meta_value(key) or 0)
+
+    # ------------------------------------------------------------------
+    # Save / Load
+    # ------------------------------------------------------------------
+
+    def save(self, index: ReferenceTokenIndex, point: Optional[ChainPoint]) -> int:
+        """
+        Ghi phần index thay đổi từ lần save trước + chain point trong một
+        transaction (một sequence number mới nếu có thay đổi).
+
+        Args:
+            index: Index cần lưu
+            point: Chain point tương ứng với trạng thái index
+
+        Returns:
+            Số UTxO đã ghi (upsert + tombstone)
+        """
+        utxos = {utxo_ref(utxo.input): utxo for utxo in index.utxos()}
+        with self._lock:
+            seq = self._meta_int("seq")
+            store_address = str(index.store_address)
+            reset = self._meta_value("store_address") not in (None, store_address)
+            if reset:
+                # Store address đổi -> bỏ dữ liệu cũ, replica phải load lại toàn bộ
+                self._saved, self._tombstones = set(), 0
+            elif self._saved is None or self._saved_seq != seq:
+                self._load_saved()
+            added = [ref for ref in utxos if ref not in self._saved]
+            removed = [ref for ref in self._saved if ref not in utxos]
+            # seq 0 = snapshot cũ (trước khi có seq) -> replica chưa đọc được
+            if added or removed or reset or seq == 0:
+                seq += 1
+            compact = self._tombstones + len(removed) > self.tombstone_limit
+
+            with self._conn:
+                if reset:
+                    self._conn.execute("DELETE FROM entries")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO entries (ref, utxo, seq, deleted) VALUES (?, ?, ?, 0)",
+                    [(ref, utxos[ref].to_cbor(), seq) for ref in added],
+                )
+                self._conn.executemany(
+                    "UPDATE entries SET utxo = X'', seq = ?, deleted = 1 WHERE ref = ?",
+                    [(seq, ref) for ref in removed],
+                )
+                meta = {
+                    "point": json.dumps(point.to_dict()) if point else "",
+                    "store_address": store_address,
+                    "saved_at": str(time.time()),
+                    "seq": str(seq),
+                }
+                if compact or reset:
+                    self._conn.execute("DELETE FROM entries WHERE deleted = 1")
+                    meta["compacted_seq"] = str(seq)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                    list(meta.items()),
+                )
+
+            self._saved.update(added)
+            self._saved.difference_update(removed)
+            self._saved_seq = seq
+            self._tombstones = 0 if compact or reset else self._tombstones + len(removed)
+        return len(added) + len(removed)
+
+    def _load_saved(self) -> None:
+        """Đọc tập ref đang có trong file (lần save đầu / file do process khác ghi)."""
+        self._saved = set()
+        self._tombstones = 0
+        for ref, deleted in self._conn.execute("SELECT ref, deleted FROM entries"):
+            if deleted:
+                self._tombstones += 1
+            else:
+                self._saved.add(ref)
+        self._saved_seq = self._meta_int("seq")
+
+    def version(self) -> Optional[str]:
+        """Phiên bản snapshot (thời điểm ghi) - đổi mỗi lần save()."""
+        return self.get_meta("saved_at")
+
+    def sequence(self) -> int:
+        """Sequence number của lần ghi có thay đổi gần nhất (0 = chưa ghi)."""
+        with self._lock:
+            return self._meta_int("seq")
+
+    def load_utxos(self) -> List[UTxO]:
+        with self._lock:
+            rows = self._conn.execute("SELECT utxo FROM entries WHERE deleted = 0").fetchall()
+        return [UTxO.from_cbor(utxo_cbor) for (utxo_cbor,) in rows]
+
+    def changes_since(self, seq: int) -> Optional[Tuple[List[UTxO], List[str], int]]:
+        """
+        Các thay đổi sau sequence `seq` (đọc trong một read transaction).
+
+        Returns:
+            (UTxO mới, ref đã spend, seq hiện tại), hoặc None nếu tombstone
+            cần thiết đã bị dọn / file được ghi lại -> phải load toàn bộ
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                current = self._meta_int("seq")
+                if seq < self._meta_int("compacted_seq") or seq > current:
+                    return None
+                rows = self._conn.execute(
+                    "SELECT ref, utxo, deleted FROM entries WHERE seq > ? AND seq <= ?",
+                    (seq, current),
+                ).fetchall()
+            finally:
+                self._conn.commit()
+        produced = [UTxO.from_cbor(utxo_cbor) for _, utxo_cbor, deleted in rows if not deleted]
+        spent = [ref for ref, _, deleted in rows if deleted]
+        return produced, spent, current
+
+    def load(self, index: ReferenceTokenIndex) -> Optional[ChainPoint]:
+        """
+        Load snapshot vào index.
+
+        Snapshot chỉ hợp lệ nếu có chain point và cùng store address.
+
+        Args:
+            index: Index (rỗng) để nạp dữ liệu
+
+        Returns:
+            ChainPoint đã lưu, hoặc None nếu không có snapshot hợp lệ
+        """
+        point_json = self.get_meta("point")
+        if not point_json or self.get_meta("store_address") != str(index.store_address):
+            return None
+
+        for utxo in self.load_utxos():
+            index.add_utxo(utxo)
+        index.mark_synced()
+        return ChainPoint.from_dict(json.loads(point_json))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE deleted = 0"
+            ).fetchone()[0]
+            seq = self._meta_int("seq")
+        saved_at = self.get_meta("saved_at")
+        return {
+            "path": self.path,
+            "entries": count,
+            "seq": seq,
+            "saved_at": float(saved_at) if saved_at else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+# Khoảng thời gian (giây) giữa 2 lần replica kiểm tra snapshot mới
+DEFAULT_REPLICA_INTERVAL = 1.0
+
+
+class SnapshotReplica:
+    """
+    Giữ index của một worker không phải leader đồng bộ với snapshot.
+
+    Mỗi `interval` giây: nếu snapshot có sequence mới thì chỉ đọc các row
+    thay đổi sau sequence đã sync (lần đầu, hoặc tombstone đã bị dọn ->
+    load toàn bộ). Nếu có `leader_lock`, replica
+    cũng thử giành lock - leader cũ chết thì gọi `on_promote()` (vd. khởi
+    động ChainFollower trong worker này) và dừng replica.
+    """
+
+    def __init__(
+        self,
+        snapshot: IndexSnapshot,
+        index: ReferenceTokenIndex,
+        interval: float = DEFAULT_REPLICA_INTERVAL,
+        leader_lock=None,
+        on_promote: Optional[Callable[[], None]] = None,
+    ):
+        self.snapshot = snapshot
+        self.index = index
+        self.interval = interval
+        self.leader_lock = leader_lock
+        self.on_promote = on_promote
+        self._seq: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats: Dict[str, Any] = {
+            "syncs": 0,
+            "full_syncs": 0,
+            "last_sync": None,
+            "last_check": None,
+            "last_error": None,
+            "promoted": False,
+        }
+
+    def sync_once(self) -> bool:
+        """
+        Sync index nếu snapshot có phiên bản mới.
+
+        Returns:
+            True nếu index được sync
+        """
+        seq = self.snapshot.sequence()
+        self.stats["last_check"] = time.time()
+        if seq == 0 or seq == self._seq:
+            return False
+        if self.snapshot.get_meta("store_address") != str(self.index.store_address):
+            return False
+        self.index.auto_refresh = False
+        changes = self.snapshot.changes_since(self._seq) if self._seq is not None else None
+        if changes is None:
+            # seq đọc trước load_utxos: lần sau đọc lại các row ghi xen giữa (idempotent)
+            self.index.sync_utxos(self.snapshot.load_utxos())
+            self.stats["full_syncs"] += 1
+        else:
+            produced, spent, seq = changes
+            self.index.sync_delta(spent, produced)
+        self._seq = seq
+        self.stats["syncs"] += 1
+        self.stats["last_sync"] = time.time()
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.leader_lock is not None and self.leader_lock.acquire():
+                    self.stats["promoted"] = True
+                    if self.on_promote is not None:
+                        self.on_promote()
+                    return
+                self.sync_once()
+                self.stats["last_error"] = None
+            except Exception as e:
+                self.stats["last_error"] = str(e)
+                print(f"Snapshot replica error: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Chạy replica trong background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cip68-replica", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
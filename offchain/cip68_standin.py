@@ -0,0 +1,259 @@
+"""
+BlockFrost Stand-in (offline)
+=============================
+HTTP server cục bộ trả JSON dạng BlockFrost cho các endpoint mà
+chain context dùng - để test và benchmark không cần API key / mạng.
+
+Endpoints (prefix `/api/v0`):
+    GET  /epochs/latest
+    GET  /epochs/latest/parameters
+    GET  /genesis
+    GET  /blocks/latest
+    GET  /addresses/{address}/utxos?page=&count=
+    POST /tx/submit
+    POST /utils/txs/evaluate
+
+`latency` (giây) được thêm vào mỗi request để mô phỏng round trip tới
+BlockFrost; `max_in_flight` cho biết số request được xử lý đồng thời.
+
+Benchmark:
+    python -m offchain.cip68_standin
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlparse, parse_qs
+
+
+# Protocol parameters (preprod, rút gọn) - đủ cho TransactionBuilder
+DEFAULT_PROTOCOL_PARAMS: Dict[str, Any] = {
+    "epoch": 100,
+    "min_fee_a": 44,
+    "min_fee_b": 155381,
+    "max_block_size": 90112,
+    "max_tx_size": 16384,
+    "max_block_header_size": 1100,
+    "key_deposit": "2000000",
+    "pool_deposit": "500000000",
+    "a0": 0.3,
+    "rho": 0.003,
+    "tau": 0.2,
+    "decentralisation_param": 0,
+    "extra_entropy": None,
+    "protocol_major_ver": 9,
+    "protocol_minor_ver": 0,
+    "min_utxo": "4310",
+    "min_pool_cost": "170000000",
+    "price_mem": 0.0577,
+    "price_step": 0.0000721,
+    "max_tx_ex_mem": "14000000",
+    "max_tx_ex_steps": "10000000000",
+    "max_block_ex_mem": "62000000",
+    "max_block_ex_steps": "20000000000",
+    "max_val_size": "5000",
+    "collateral_percent": 150,
+    "max_collateral_inputs": 3,
+    "coins_per_utxo_size": "4310",
+    "coins_per_utxo_word": "4310",
+    "cost_models": {},
+    "min_fee_ref_script_cost_per_byte": 15,
+}
+
+DEFAULT_GENESIS: Dict[str, Any] = {
+    "active_slots_coefficient": 0.05,
+    "update_quorum": 5,
+    "max_lovelace_supply": "45000000000000000",
+    "network_magic": 1,
+    "epoch_length": 432000,
+    "system_start": 1654041600,
+    "slots_per_kes_period": 129600,
+    "slot_length": 1,
+    "max_kes_evolutions": 62,
+    "security_param": 2160,
+}
+
+
+class BlockFrostStandIn:
+    """
+    Server BlockFrost giả lập chạy trong một background thread.
+
+    Dữ liệu được set trực tiếp:
+        standin.utxos[address] = [output dict dạng BlockFrost, ...]
+        standin.evaluation = {"spend:0": {"memory": ..., "steps": ...}}
+    """
+
+    def __init__(self, latency: float = 0.0, page_limit: int = 100):
+        self.latency = latency
+        self.page_limit = page_limit
+
+        self.utxos: Dict[str, List[Dict[str, Any]]] = {}
+        self.protocol_params = dict(DEFAULT_PROTOCOL_PARAMS)
+        self.genesis = dict(DEFAULT_GENESIS)
+        self.epoch = {"epoch": 100, "end_time": int(time.time()) + 3600}
+        self.block = {"slot": 1_000, "hash": "00" * 32, "height": 10}
+        self.evaluation: Dict[str, Dict[str, int]] = {}
+        self.submitted: List[bytes] = []
+
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL (không có `/v0`) - giống `BLOCKFROST_URL`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self) -> "BlockFrostStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="blockfrost-standin", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "BlockFrostStandIn":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+
+    def _route(self, method: str, path: str, query: Dict[str, List[str]], body: bytes):
+        if not path.startswith("/api/v0/"):
+            return 404, {"status_code": 404, "message": "Not Found"}
+        parts = path[len("/api/v0/"):].strip("/").split("/")
+
+        if method == "GET":
+            if parts == ["epochs", "latest"]:
+                return 200, self.epoch
+            if parts == ["epochs", "latest", "parameters"]:
+                return 200, self.protocol_params
+            if parts == ["genesis"]:
+                return 200, self.genesis
+            if parts == ["blocks", "latest"]:
+                return 200, self.block
+            if len(parts) == 3 and parts[0] == "addresses" and parts[2] == "utxos":
+                items = self.utxos.get(parts[1])
+                if not items:
+                    return 404, {"status_code": 404, "message": "The requested component has not been found."}
+                page = int(query.get("page", ["1"])[0])
+                count = min(int(query.get("count", ["100"])[0]), self.page_limit)
+                return 200, items[(page - 1) * count:page * count]
+
+        if method == "POST":
+            if parts == ["tx", "submit"]:
+                from pycardano import Transaction
+                try:
+                    tx_id = Transaction.from_cbor(body).id
+                except Exception as e:
+                    return 400, {"status_code": 400, "message": str(e)}
+                with self._lock:
+                    self.submitted.append(body)
+                return 200, str(tx_id)
+            if parts == ["utils", "txs", "evaluate"]:
+                return 200, {"result": {"EvaluationResult": self.evaluation}}
+
+        return 404, {"status_code": 404, "message": "Not Found"}
+
+    def _handler_class(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _handle(self, method: str):
+                with standin._lock:
+                    standin.requests += 1
+                    standin.in_flight += 1
+                    standin.max_in_flight = max(standin.max_in_flight, standin.in_flight)
+                try:
+                    if standin.latency:
+                        time.sleep(standin.latency)
+                    length = int(self.headers.get("Content-Length") or 0)
+                    body = self.rfile.read(length) if length else b""
+                    url = urlparse(self.path)
+                    status, payload = standin._route(method, url.path, parse_qs(url.query), body)
+                    data = json.dumps(payload).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with standin._lock:
+                        standin.in_flight -= 1
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def make_utxo_json(address: str, tx_byte: int, index: int, coin: int = 2_000_000) -> Dict[str, Any]:
+    """Một UTxO dạng `/addresses/{address}/utxos`."""
+    return {
+        "address": address,
+        "tx_hash": f"{tx_byte % 256:02x}" * 32,
+        "output_index": index,
+        "amount": [{"unit": "lovelace", "quantity": str(coin)}],
+        "data_hash": None,
+        "inline_datum": None,
+        "reference_script_hash": None,
+    }
+
+
+def main():
+    """Benchmark: fetch UTxO nhiều trang, sync vs async adapter."""
+    from pycardano import BlockFrostChainContext
+
+    from .cip68_async_context import AsyncBlockFrostChainContext
+    from .cip68_utils import get_fixed_store_address
+    from pycardano import Network
+
+    address = str(get_fixed_store_address(Network.TESTNET))
+    pages = 20
+
+    with BlockFrostStandIn(latency=0.05) as standin:
+        standin.utxos[address] = [
+            make_utxo_json(address, i // 100, i % 100) for i in range(pages * 100)
+        ]
+
+        sync_context = BlockFrostChainContext(project_id="standin", base_url=standin.base_url)
+        started = time.perf_counter()
+        sync_count = len(sync_context.utxos(address))
+        sync_seconds = time.perf_counter() - started
+
+        async_context = AsyncBlockFrostChainContext("standin", standin.base_url)
+        started = time.perf_counter()
+        async_count = len(async_context.utxos(address))
+        async_seconds = time.perf_counter() - started
+        async_context.close()
+
+    print(f"{pages} pages, latency 50ms/request")
+    print(f"  BlockFrostChainContext:      {sync_count} UTxOs in {sync_seconds:.2f}s")
+    print(f"  AsyncBlockFrostChainContext: {async_count} UTxOs in {async_seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
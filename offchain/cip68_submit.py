@@ -0,0 +1,545 @@
+"""
+CIP-68 Submission Queue
+=======================
+Submit transaction qua một hàng đợi có giới hạn thay vì gọi
+`submit_tx` trực tiếp trong request / vòng mint.
+
+- Hàng đợi tối đa `max_size` tx; đầy -> QueueFull (backend trả 429 kèm
+  Retry-After) hoặc caller chờ chỗ trống (`block=True`)
+- `concurrency` worker thread submit song song; burst vượt rate limit của
+  BlockFrost được dàn đều thay vì lỗi hàng loạt
+- Lỗi tạm thời (HTTP 425 mempool đầy, 429, 5xx, timeout / mất kết nối) được
+  thử lại với exponential backoff + jitter; lỗi của node (tx không hợp lệ)
+  trả về ngay
+- Lần thử lại nhận lỗi không tạm thời: lần thử trước có thể đã tới node ->
+  coi là submitted nếu tx đã lên chain (`confirm`) hoặc lỗi của node nêu
+  chính tx id này (vd. đã có trong mempool); còn lại (vd. inputs bị tx khác
+  spend) -> failed
+- Trạng thái mỗi tx được theo dõi tới khi lên chain:
+  queued -> submitting (-> retrying) -> submitted -> confirmed
+  hoặc failed (submit lỗi) / dropped (submit rồi nhưng quá `confirm_timeout`
+  vẫn chưa lên chain -> on_dropped, vd. CachedChainContext.on_rejected)
+"""
+
+import logging
+import math
+import queue
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from pycardano import Transaction
+
+from .cip68_context import ChainInvalidated
+
+
+logger = logging.getLogger(__name__)
+
+
+# Số tx tối đa chờ submit
+DEFAULT_SUBMIT_QUEUE_SIZE = 256
+
+# Số tx được submit đồng thời
+DEFAULT_SUBMIT_CONCURRENCY = 4
+
+# Số lần thử lại tối đa khi lỗi tạm thời
+DEFAULT_SUBMIT_RETRIES = 5
+
+# Backoff (giây) của lần thử lại đầu tiên, nhân đôi mỗi lần, tối đa DEFAULT_MAX_BACKOFF
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_MAX_BACKOFF = 30.0
+
+# Chu kỳ (giây) kiểm tra tx đã submit có lên chain chưa
+DEFAULT_CONFIRM_INTERVAL = 10.0
+
+# Tx submit quá thời gian này (giây) mà chưa lên chain -> dropped
+DEFAULT_CONFIRM_TIMEOUT = 300.0
+
+# Số tx đã kết thúc (confirmed / failed / dropped) giữ lại để tra trạng thái
+DEFAULT_MAX_TRACKED = 10_000
+
+# HTTP status của lỗi tạm thời: mempool đầy, rate limit, lỗi server
+TRANSIENT_STATUS_CODES = (425, 429, 500, 502, 503, 504)
+
+# Trạng thái của một tx trong queue
+QUEUED = "queued"
+SUBMITTING = "submitting"
+RETRYING = "retrying"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+DROPPED = "dropped"
+
+FINAL_STATES = (CONFIRMED, FAILED, DROPPED)
+
+
+class QueueFull(Exception):
+    """Hàng đợi submit đầy - thử lại sau `retry_after` giây."""
+
+    def __init__(self, size: int, retry_after: int):
+        super().__init__(f"Submission queue is full ({size} transactions), retry in {retry_after}s")
+        self.size = size
+        self.retry_after = retry_after
+
+
+class QueueStopped(Exception):
+    """Hàng đợi submit đã dừng - tx chưa được submit."""
+
+    def __init__(self, tx_id: str):
+        super().__init__(f"Submission queue stopped before {tx_id} was submitted")
+        self.tx_id = tx_id
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status của lỗi submit (kể cả lỗi được bọc trong TransactionFailedException)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        status = getattr(error, "status_code", None)
+        if isinstance(status, int):
+            return status
+        match = re.search(r"Error code: (\d{3})", str(error))
+        if match:
+            return int(match.group(1))
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def is_transient(error: BaseException) -> bool:
+    """Lỗi submit có nên thử lại không (rate limit / server / mạng)."""
+    if isinstance(error, ChainInvalidated):
+        return False
+    status = _status_code(error)
+    if status is not None:
+        return status in TRANSIENT_STATUS_CODES
+    return isinstance(error, (ConnectionError, TimeoutError)) or "timeout" in type(error).__name__.lower()
+
+
+def blockfrost_confirmed(context) -> Optional[Callable[[str], bool]]:
+    """
+    Hàm kiểm tra tx đã lên chain qua BlockFrost (`GET /txs/{hash}`).
+
+    Returns:
+        None nếu context không có BlockFrost API (không theo dõi confirm)
+    """
+    try:
+        api = context.api
+    except AttributeError:
+        return None
+
+    def confirmed(tx_id: str) -> bool:
+        try:
+            api.transaction(tx_id)
+            return True
+        except Exception as e:
+            if _status_code(e) != 404:
+                logger.warning("Confirmation check for %s failed: %s", tx_id, e)
+            return False
+
+    return confirmed
+
+
+# ============================================================================
+# SUBMIT JOB
+# ============================================================================
+
+
+@dataclass
+class SubmitJob:
+    """Một tx trong hàng đợi submit."""
+    tx_id: str
+    cbor: bytes
+    state: str = QUEUED
+    attempts: int = 0
+    error: Optional[str] = None
+    tx_hash: Optional[str] = None
+    queued_at: float = field(default_factory=time.time)
+    submitted_at: Optional[float] = None
+    confirmed_at: Optional[float] = None
+    on_submitted: Optional[Callable[[str], None]] = None
+    on_failed: Optional[Callable[[BaseException], None]] = None
+    # Kết quả lần submit (tx hash hoặc exception), không chờ confirm
+    future: Future = field(default_factory=Future)
+
+    def result(self, timeout: Optional[float] = None) -> str:
+        """Chờ submit xong; raise lỗi submit cuối cùng nếu thất bại."""
+        return self.future.result(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "tx_id": self.tx_id,
+            "state": self.state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "tx_hash": self.tx_hash,
+            "queued_at": self.queued_at,
+            "submitted_at": self.submitted_at,
+            "confirmed_at": self.confirmed_at,
+        }
+
+
+# ============================================================================
+# SUBMISSION QUEUE
+# ============================================================================
+
+
+class SubmissionQueue:
+    """
+    Hàng đợi submit có giới hạn, worker thread, retry và theo dõi confirm.
+
+    Context thường là CachedChainContext: submit thành công cập nhật UTxO
+    cache (đánh dấu spent / outputs pending) như khi gọi submit_tx trực tiếp.
+    """
+
+    def __init__(
+        self,
+        context,
+        max_size: int = DEFAULT_SUBMIT_QUEUE_SIZE,
+        concurrency: int = DEFAULT_SUBMIT_CONCURRENCY,
+        retries: int = DEFAULT_SUBMIT_RETRIES,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+        max_backoff: float = DEFAULT_MAX_BACKOFF,
+        confirm: Optional[Callable[[str], bool]] = None,
+        confirm_interval: float = DEFAULT_CONFIRM_INTERVAL,
+        confirm_timeout: float = DEFAULT_CONFIRM_TIMEOUT,
+        on_dropped: Optional[Callable[[str], Any]] = None,
+        max_tracked: int = DEFAULT_MAX_TRACKED,
+    ):
+        self.context = context
+        self.max_size = max_size
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.confirm = confirm
+        self.confirm_interval = confirm_interval
+        self.confirm_timeout = confirm_timeout
+        self.on_dropped = on_dropped
+        self.max_tracked = max_tracked
+
+        self._queue: "queue.Queue[Optional[SubmitJob]]" = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        # tx_id -> job, theo thứ tự nhận; job đã kết thúc cũ nhất bị bỏ trước
+        self._jobs: "OrderedDict[str, SubmitJob]" = OrderedDict()
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        # Thời gian (giây) trung bình một lần submit, để ước lượng Retry-After
+        self._latency = 1.0
+
+        self.stats: Dict[str, int] = {
+            "accepted": 0,
+            "rejected_full": 0,
+            "duplicates": 0,
+            "submitted": 0,
+            "retries": 0,
+            "failed": 0,
+            "ambiguous": 0,
+            "confirmed": 0,
+            "dropped": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.concurrency):
+            thread = threading.Thread(target=self._worker, name=f"submit-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        if self.confirm is not None:
+            thread = threading.Thread(target=self._monitor, name="submit-confirm", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Dừng worker; tx còn trong hàng đợi thất bại với QueueStopped."""
+        self._stop.set()
+        self._drain()
+        for _ in range(self.concurrency):
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._drain()
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if job is None or job.future.done():
+                continue
+            error = QueueStopped(job.tx_id)
+            self._set(job, FAILED, error=str(error))
+            with self._lock:
+                self.stats["failed"] += 1
+            self._callback(job, job.on_failed, error)
+            job.future.set_exception(error)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def submit(
+        self,
+        tx: Union[Transaction, bytes, str],
+        on_submitted: Optional[Callable[[str], None]] = None,
+        on_failed: Optional[Callable[[BaseException], None]] = None,
+        block: bool = False,
+        timeout: Optional[float] = None,
+    ) -> SubmitJob:
+        """
+        Đưa một tx đã ký vào hàng đợi.
+
+        Args:
+            tx: Transaction hoặc CBOR (bytes / hex)
+            on_submitted: Callback(tx_hash) khi submit thành công (worker thread)
+            on_failed: Callback(error) khi submit thất bại hẳn (worker thread)
+            block: Chờ chỗ trống thay vì raise QueueFull
+            timeout: Thời gian chờ tối đa khi block=True
+
+        Returns:
+            SubmitJob (cùng tx gửi lại khi chưa thất bại -> job đang có;
+            callback của lần gửi lại được gọi khi job đó có kết quả)
+
+        Raises:
+            QueueFull: Hàng đợi đầy
+            QueueStopped: Hàng đợi đã dừng
+        """
+        if isinstance(tx, str):
+            tx = bytes.fromhex(tx)
+        if isinstance(tx, bytes):
+            tx = Transaction.from_cbor(tx)
+        tx_id = str(tx.id)
+        if self._stop.is_set():
+            raise QueueStopped(tx_id)
+
+        job = SubmitJob(
+            tx_id=tx_id, cbor=tx.to_cbor(), on_submitted=on_submitted, on_failed=on_failed,
+        )
+        with self._lock:
+            existing = self._jobs.get(tx_id)
+            if existing is not None and existing.state != FAILED:
+                self.stats["duplicates"] += 1
+                self._chain_callbacks(existing, on_submitted, on_failed)
+                return existing
+            self._jobs[tx_id] = job
+            self._jobs.move_to_end(tx_id)
+        try:
+            self._queue.put(job, block=block, timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                if self._jobs.get(tx_id) is job:
+                    del self._jobs[tx_id]
+                self.stats["rejected_full"] += 1
+            raise QueueFull(self.max_size, self.retry_after())
+        with self._lock:
+            self.stats["accepted"] += 1
+            self._trim()
+        return job
+
+    def _chain_callbacks(
+        self,
+        job: SubmitJob,
+        on_submitted: Optional[Callable[[str], None]],
+        on_failed: Optional[Callable[[BaseException], None]],
+    ) -> None:
+        """Gọi callback của lần gửi trùng khi job đang có submit xong (ngay nếu đã xong)."""
+        if on_submitted is None and on_failed is None:
+            return
+
+        def done(future: Future) -> None:
+            error = future.exception()
+            if error is None:
+                self._callback(job, on_submitted, future.result())
+            else:
+                self._callback(job, on_failed, error)
+
+        job.future.add_done_callback(done)
+
+    def status(self, tx_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(str(tx_id))
+            return job.to_dict() if job is not None else None
+
+    def retry_after(self) -> int:
+        """Số giây ước lượng tới khi hàng đợi có chỗ trống."""
+        return max(1, math.ceil(self._queue.qsize() * self._latency / max(1, self.concurrency)))
+
+    def _trim(self) -> None:
+        excess = len(self._jobs) - self.max_tracked
+        for tx_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[tx_id].state in FINAL_STATES:
+                del self._jobs[tx_id]
+                excess -= 1
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _set(self, job: SubmitJob, state: str, **changes) -> None:
+        with self._lock:
+            job.state = state
+            for name, value in changes.items():
+                setattr(job, name, value)
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._process(job)
+            except Exception:
+                logger.exception("Submission worker error for %s", job.tx_id)
+
+    def _process(self, job: SubmitJob) -> None:
+        while True:
+            self._set(job, SUBMITTING, attempts=job.attempts + 1)
+            started = time.monotonic()
+            try:
+                tx_hash = str(self.context.submit_tx_cbor(job.cbor))
+            except Exception as e:
+                if is_transient(e) and job.attempts <= self.retries and not self._stop.is_set():
+                    delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1))
+                    delay *= random.uniform(0.5, 1.0)
+                    self._set(job, RETRYING, error=str(e))
+                    with self._lock:
+                        self.stats["retries"] += 1
+                    logger.info("Submit %s failed (%s), retry in %.1fs", job.tx_id, e, delay)
+                    self._stop.wait(delay)
+                    continue
+                if self._landed_earlier(job, e):
+                    logger.info("Submit %s retry failed (%s), earlier attempt reached the node", job.tx_id, e)
+                    with self._lock:
+                        self.stats["ambiguous"] += 1
+                    # Context không thấy lần submit thành công -> cập nhật cache như submit_tx
+                    on_submitted = getattr(self.context, "on_submitted", None)
+                    if on_submitted is not None:
+                        on_submitted(Transaction.from_cbor(job.cbor))
+                    tx_hash = job.tx_id
+                    break
+                self._set(job, FAILED, error=str(e))
+                with self._lock:
+                    self.stats["failed"] += 1
+                self._callback(job, job.on_failed, e)
+                job.future.set_exception(e)
+                return
+            finally:
+                elapsed = time.monotonic() - started
+                self._latency = 0.8 * self._latency + 0.2 * elapsed
+            break
+
+        self._set(job, SUBMITTED, tx_hash=tx_hash, error=None, submitted_at=time.time())
+        with self._lock:
+            self.stats["submitted"] += 1
+        self._callback(job, job.on_submitted, tx_hash)
+        job.future.set_result(tx_hash)
+
+    def _landed_earlier(self, job: SubmitJob, error: BaseException) -> bool:
+        """
+        Lỗi không tạm thời ở một lần thử lại: lần thử trước (5xx / timeout)
+        có thể đã tới node. Chỉ coi là đã nhận khi tx đã lên chain, hoặc lỗi
+        của node nêu chính tx id này - BadInputs do một tx khác spend cùng
+        inputs vẫn là failed.
+        """
+        if job.attempts <= 1 or is_transient(error) or isinstance(error, ChainInvalidated):
+            return False
+        if self.confirm is not None and self.confirm(job.tx_id):
+            return True
+        return job.tx_id.lower() in str(error).lower()
+
+    @staticmethod
+    def _callback(job: SubmitJob, callback: Optional[Callable], arg) -> None:
+        # Callback lỗi không được làm treo caller đang chờ job.future
+        if callback is None:
+            return
+        try:
+            callback(arg)
+        except Exception:
+            logger.exception("Submit callback failed for %s", job.tx_id)
+
+    def _monitor(self) -> None:
+        while not self._stop.wait(self.confirm_interval):
+            self.check_confirmations()
+
+    def check_confirmations(self) -> None:
+        """Kiểm tra các tx đã submit: lên chain -> confirmed, quá hạn -> dropped."""
+        with self._lock:
+            pending = [job for job in self._jobs.values() if job.state == SUBMITTED]
+        now = time.time()
+        for job in pending:
+            if self.confirm(job.tx_id):
+                self._set(job, CONFIRMED, confirmed_at=now)
+                with self._lock:
+                    self.stats["confirmed"] += 1
+            elif now - job.submitted_at > self.confirm_timeout:
+                self._set(job, DROPPED, error="not confirmed within timeout")
+                with self._lock:
+                    self.stats["dropped"] += 1
+                if self.on_dropped is not None:
+                    self.on_dropped(job.tx_id)
+
+    def queue_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            states: Dict[str, int] = {}
+            for job in self._jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                **self.stats,
+                "queue_depth": self._queue.qsize(),
+                "max_size": self.max_size,
+                "concurrency": self.concurrency,
+                "states": states,
+                "avg_submit_seconds": round(self._latency, 3),
+            }
+
+
+# Queue dùng chung trong process, một queue cho mỗi chain context
+_submission_queues: Dict[int, SubmissionQueue] = {}
+_submission_queues_lock = threading.Lock()
+
+
+def get_submission_queue(context) -> SubmissionQueue:
+    """Lấy (hoặc tạo và start) SubmissionQueue dùng chung cho một chain context."""
+    with _submission_queues_lock:
+        submission_queue = _submission_queues.get(id(context))
+        if submission_queue is None or submission_queue.context is not context:
+            submission_queue = SubmissionQueue(
+                context,
+                confirm=blockfrost_confirmed(context),
+                on_dropped=getattr(context, "on_rejected", None),
+            )
+            submission_queue.start()
+            _submission_queues[id(context)] = submission_queue
+        return submission_queue
+
+
+def submit_and_wait(context, tx: Union[Transaction, bytes, str], timeout: Optional[float] = None) -> str:
+    """
+    Submit qua queue dùng chung và chờ kết quả (thay cho `context.submit_tx`).
+
+    Queue đầy -> chờ chỗ trống; lỗi tạm thời được thử lại trong queue.
+
+    Returns:
+        Tx hash
+
+    Raises:
+        Lỗi submit cuối cùng (lỗi của node, hoặc hết số lần thử lại)
+    """
+    return get_submission_queue(context).submit(tx, block=True, timeout=timeout).result(timeout)
@@ -15,7 +15,8 @@ SIMPLIFIED VERSION - Không có parameterized scripts
 
 import json
 import os
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from typing import Optional, Dict, Any, List, Union, Tuple
 
 from pycardano import (
@@ -127,6 +128,83 @@ def load_scripts(blueprint_path: str) -> Dict[str, Any]:
     return scripts
 
 
+@dataclass
+class ScriptRegistry:
+    """
+    Scripts đã load từ một blueprint (dùng chung trong process).
+    
+    Fields:
+        blueprint_path: Đường dẫn tuyệt đối tới plutus.json
+        mtime: mtime của file lúc load (đổi mtime -> load lại)
+        mint_script: Minting policy script
+        store_script: Spending validator script
+        policy_id: Hash của mint_script (policy ID)
+        store_hash: Hash của store_script
+    """
+    blueprint_path: str
+    mtime: float
+    mint_script: PlutusV3Script
+    store_script: PlutusV3Script
+    policy_id: ScriptHash
+    store_hash: ScriptHash
+    _store_addresses: Dict[Network, Address] = field(default_factory=dict, repr=False)
+    
+    def store_address(self, network: Network) -> Address:
+        """Store address (derived từ store_hash) cho network."""
+        address = self._store_addresses.get(network)
+        if address is None:
+            address = Address(self.store_hash, network=network)
+            self._store_addresses[network] = address
+        return address
+
+
+_script_registries: Dict[str, ScriptRegistry] = {}
+_script_registry_lock = threading.Lock()
+
+
+def load_script_registry(blueprint_path: str) -> ScriptRegistry:
+    """
+    Load scripts từ blueprint một lần cho mỗi process.
+    
+    Kết quả được cache theo đường dẫn và mtime của file: blueprint chỉ
+    được parse lại khi file thay đổi (vd. sau khi `aiken build`).
+    
+    Args:
+        blueprint_path: Đường dẫn tới plutus.json
+        
+    Returns:
+        ScriptRegistry
+    """
+    path = os.path.abspath(blueprint_path)
+    mtime = os.stat(path).st_mtime
+    
+    with _script_registry_lock:
+        registry = _script_registries.get(path)
+        if registry is not None and registry.mtime == mtime:
+            return registry
+        
+        scripts = load_scripts(path)
+        mint_script = PlutusV3Script(bytes.fromhex(scripts['cip68.cip68_mint.mint']['compiled_code']))
+        store_script = PlutusV3Script(bytes.fromhex(scripts['cip68.cip68_store.spend']['compiled_code']))
+        registry = ScriptRegistry(
+            blueprint_path=path,
+            mtime=mtime,
+            mint_script=mint_script,
+            store_script=store_script,
+            policy_id=plutus_script_hash(mint_script),
+            store_hash=plutus_script_hash(store_script),
+        )
+        
+        if str(registry.policy_id) != FIXED_POLICY_ID or str(registry.store_hash) != FIXED_STORE_HASH:
+            print(
+                f"Warning: blueprint hashes ({registry.policy_id}, {registry.store_hash}) "
+                f"differ from FIXED_POLICY_ID / FIXED_STORE_HASH"
+            )
+        
+        _script_registries[path] = registry
+        return registry
+
+
 def load_mint_script(blueprint_path: str) -> PlutusV3Script:
     """
     Load minting policy script từ blueprint.
@@ -136,11 +214,9 @@ def load_mint_script(blueprint_path: str) -> PlutusV3Script:
         blueprint_path: Đường dẫn tới plutus.json
         
     Returns:
-        PlutusV3Script
+        PlutusV3Script (dùng chung qua ScriptRegistry)
     """
-    scripts = load_scripts(blueprint_path)
-    mint_info = scripts['cip68.cip68_mint.mint']
-    return PlutusV3Script(bytes.fromhex(mint_info['compiled_code']))
+    return load_script_registry(blueprint_path).mint_script
 
 
 def load_store_script(blueprint_path: str) -> PlutusV3Script:
@@ -153,11 +229,11 @@ def load_store_script(blueprint_path: str) -> PlutusV3Script:
         blueprint_path: Đường dẫn tới plutus.json
         
     Returns:
-        PlutusV3Script
+        PlutusV3Script (dùng chung qua ScriptRegistry)
     """
-    scripts = load_scripts(blueprint_path)
-    store_info = scripts['cip68.cip68_store.spend']
-    return PlutusV3Script(bytes.fromhex(store_info['compiled_code']))
+    return load_script_registry(blueprint_path).store_script
+
+
 # ==============================================================================
 # FIXED POLICY ID & STORE ADDRESS (non-parameterized contracts)
 # ==============================================================================
@@ -13,10 +13,24 @@ sys.path.insert(0, os.path.join(project_root, 'backend'))
 import uvicorn
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "backend.main:app",
-        host="127.0.0.1",
-        port=8000,
-        reload=True,
-        reload_dirs=[project_root]
-    )
+    workers = int(os.getenv("BACKEND_WORKERS", "1"))
+    if workers > 1:
+        # Nhiều worker: cache dùng chung qua SQLite, follower chỉ chạy ở một worker
+        os.environ.setdefault(
+            "SHARED_CACHE_PATH",
+            os.path.join(project_root, 'backend', 'shared_cache.sqlite3')
+        )
+        uvicorn.run(
+            "backend.main:app",
+            host="127.0.0.1",
+            port=8000,
+            workers=workers,
+        )
+    else:
+        uvicorn.run(
+            "backend.main:app",
+            host="127.0.0.1",
+            port=8000,
+            reload=True,
+            reload_dirs=[project_root]
+        )
@@ -0,0 +1,75 @@
+"""
+Test script for AsyncBlockFrostChainContext
+===========================================
+Test adapter async offline với BlockFrostStandIn (HTTP server cục bộ).
+"""
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import (
+    Address,
+    Network,
+    Transaction,
+    TransactionBody,
+    TransactionInput,
+    TransactionOutput,
+    TransactionWitnessSet,
+    VerificationKeyHash,
+)
+
+from offchain.cip68_async_context import AsyncBlockFrostChainContext
+from offchain.cip68_standin import BlockFrostStandIn, make_utxo_json
+
+
+WALLET = Address(VerificationKeyHash(bytes.fromhex("55" * 28)), network=Network.TESTNET)
+
+
+def test_paginated_utxos_fetched_concurrently():
+    """UTxO nhiều trang: đủ số lượng, các trang sau được fetch song song."""
+    address = str(WALLET)
+    with BlockFrostStandIn(latency=0.02) as standin:
+        standin.utxos[address] = [make_utxo_json(address, i // 10, i % 10) for i in range(245)]
+        context = AsyncBlockFrostChainContext(
+            "standin", standin.base_url, page_size=10, page_concurrency=8
+        )
+        try:
+            utxos = context.utxos(WALLET)
+            assert len(utxos) == 245
+            assert len({u.input for u in utxos}) == 245
+            assert standin.max_in_flight > 1
+
+            # Address không có UTxO -> 404 -> danh sách rỗng
+            other = Address(VerificationKeyHash(bytes.fromhex("66" * 28)), network=Network.TESTNET)
+            assert context.utxos(other) == []
+        finally:
+            context.close()
+
+
+def test_params_submit_and_evaluate():
+    """Protocol params, submit và evaluate qua pooled client."""
+    with BlockFrostStandIn() as standin:
+        standin.evaluation = {"mint:0": {"memory": 1_000, "steps": 2_000}}
+        context = AsyncBlockFrostChainContext("standin", standin.base_url)
+        try:
+            assert context.protocol_param.max_tx_size == 16384
+            assert context.epoch == 100
+            assert context.epoch_end_time == standin.epoch["end_time"]
+
+            body = TransactionBody(
+                inputs=[TransactionInput.from_primitive([b"\x01" * 32, 0])],
+                outputs=[TransactionOutput(WALLET, 2_000_000)],
+                fee=200_000,
+            )
+            tx = Transaction(body, TransactionWitnessSet())
+            assert context.submit_tx_cbor(tx.to_cbor()) == str(tx.id)
+            assert standin.submitted == [tx.to_cbor()]
+
+            result = context.evaluate_tx(tx)
+            assert result["mint:0"].mem == 1_000
+            assert result["mint:0"].steps == 2_000
+        finally:
+            context.close()
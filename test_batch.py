@@ -0,0 +1,311 @@
+"""
+Test script for CIP-68 Batch Operations
+=======================================
+Test packing batch mint / update offline (không cần BlockFrost): chain
+context giả lập một ví và evaluate ex-units theo số output của tx.
+"""
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import (
+    Asset,
+    ExecutionUnits,
+    MultiAsset,
+    RawCBOR,
+    TransactionInput,
+    TransactionOutput,
+    UTxO,
+    Value,
+    PlutusV3Script,
+    Address,
+    Network,
+    plutus_script_hash,
+)
+
+from offchain.cip68_batch import (
+    bind_batch_reservations,
+    build_burn_batch,
+    build_mint_batch,
+    build_update_batch,
+    check_mint_items,
+    pack_batches,
+    reserve_batch_entries,
+    resolve_burn_entries,
+)
+from offchain.cip68_index import ReferenceTokenIndex, decode_cip68_datum, utxo_ref
+from offchain.cip68_reservations import ReservationManager, WalletInputLeases
+from offchain.cip68_utils import (
+    BurnReference,
+    BurnToken,
+    MintToken,
+    UpdateMetadata,
+    create_cip68_asset_names,
+    create_cip68_datum,
+)
+
+from test_index import FakeContext, POLICY_ID, STORE_ADDRESS, make_ref_utxo
+from test_reservations import WALLET, WalletContext
+
+
+MINT_SCRIPT = PlutusV3Script(bytes(range(256)) * 6)
+MINT_POLICY = plutus_script_hash(MINT_SCRIPT)
+STORE_SCRIPT = PlutusV3Script(bytes(range(255, -1, -1)) * 6)
+BATCH_STORE_ADDRESS = Address(plutus_script_hash(STORE_SCRIPT), network=Network.TESTNET)
+WALLET_PKH = WALLET.payment_part.to_primitive()
+
+
+class BatchContext(WalletContext):
+    """Ví nhiều UTxO 500 ADA; evaluate: ex-units mỗi redeemer tỉ lệ với số output."""
+
+    def __init__(self, n_utxos: int, mem_per_output: int = 10_000):
+        super().__init__(n_utxos)
+        for utxo in self.wallet_utxos:
+            utxo.output.amount.coin = 500_000_000
+        self.mem_per_output = mem_per_output
+
+    def evaluate_tx(self, tx):
+        outputs = len(tx.transaction_body.outputs)
+        keys = [f"{key.tag.name.lower()}:{key.index}" for key in tx.transaction_witness_set.redeemer]
+        return {
+            key: ExecutionUnits(self.mem_per_output * outputs, 1_000_000 * outputs)
+            for key in keys
+        }
+
+
+def plan_mint(context: BatchContext, n_items: int):
+    leases = WalletInputLeases()
+    items = [(f"Item{i:04d}", f"Collection item number {i}") for i in range(n_items)]
+    plan = pack_batches(
+        items,
+        lambda chunk: build_mint_batch(
+            context, WALLET, chunk, MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY
+        ),
+        lambda builder: leases.build(builder, WALLET, change_address=WALLET)[0],
+        release=lambda tx_body: leases.release_tx(tx_body.id),
+    )
+    return items, plan
+
+
+def test_batch_mint_packs_pairs_under_size_limit():
+    """Nhiều cặp mỗi tx, không tx nào vượt size budget, mỗi tx một redeemer MintToken."""
+    context = BatchContext(8)
+    items, plan = plan_mint(context, 60)
+
+    assert plan.error is None and not plan.deferred
+    assert [item for group in plan.groups for item in group.items] == items
+    assert 1 < len(plan.groups) < 10
+
+    max_size = context.protocol_param.max_tx_size
+    inputs = set()
+    for group in plan.groups:
+        assert group.size <= 0.9 * max_size
+        names = [name.encode() for name, _ in group.items]
+        minted = group.tx_body.mint[MINT_POLICY]
+        assert len(minted) == 2 * len(names)
+        for name in names:
+            ref_name, user_name = create_cip68_asset_names(name)
+            assert minted[ref_name] == 1 and minted[user_name] == 1
+
+        redeemers = list(group.builder.redeemers().values())
+        assert len(redeemers) == 1
+        assert redeemers[0].data == MintToken(token_name=names[0])
+
+        # Các tx trong batch có inputs rời nhau
+        assert not inputs & set(group.tx_body.inputs)
+        inputs |= set(group.tx_body.inputs)
+
+
+def test_batch_mint_respects_ex_unit_budget():
+    """Ex-units là giới hạn chặt hơn size -> nhóm thu nhỏ theo tỉ lệ đã đo."""
+    context = BatchContext(8, mem_per_output=400_000)
+    _, plan = plan_mint(context, 40)
+
+    max_mem = context.protocol_param.max_tx_ex_mem
+    assert sum(len(group.items) for group in plan.groups) == 40
+    for group in plan.groups:
+        assert group.ex_units.mem <= 0.9 * max_mem
+    # Gần tối ưu: nhóm đầy đủ dùng phần lớn budget
+    assert plan.groups[0].ex_units.mem > 0.6 * max_mem
+    assert plan.stats()["transactions"] == len(plan.groups)
+
+
+def test_batch_mint_defers_items_when_wallet_runs_out():
+    """Ví chỉ đủ cho một tx -> các item còn lại deferred, không lỗi."""
+    context = BatchContext(1)
+    context.wallet_utxos[0].output.amount.coin = 60_000_000
+    _, plan = plan_mint(context, 40)
+
+    assert len(plan.groups) == 1
+    assert plan.deferred and plan.error
+    assert len(plan.groups[0].items) + len(plan.deferred) == 40
+
+
+def test_pack_batches_releases_leases_on_error():
+    """Exception giữa chừng -> lease của các tx đã build được trả lại."""
+    context = BatchContext(8)
+    leases = WalletInputLeases()
+    items = [(f"Item{i:04d}", f"Collection item number {i}") for i in range(60)]
+    calls = []
+
+    def make_builder(chunk):
+        calls.append(len(chunk))
+        if len(calls) > 2:
+            raise RuntimeError("evaluate failed")
+        return build_mint_batch(context, WALLET, chunk, MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY)
+
+    try:
+        pack_batches(
+            items,
+            make_builder,
+            lambda builder: leases.build(builder, WALLET, change_address=WALLET)[0],
+            release=lambda tx_body: leases.release_tx(tx_body.id),
+        )
+        assert False, "expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert leases.manager.reserved_refs() == []
+
+
+def test_check_mint_items_rejects_invalid_names():
+    """Tên trùng, quá dài hoặc đã tồn tại bị loại trước khi build."""
+    index = ReferenceTokenIndex(
+        FakeContext({str(STORE_ADDRESS): [make_ref_utxo("Taken")]}),
+        STORE_ADDRESS, POLICY_ID, refresh_interval=3600,
+    )
+    accepted, rejected = check_mint_items(
+        [("A", "first"), ("A", "again"), ("Taken", "x"), ("X" * 29, "long"), ("B", "second")],
+        index,
+    )
+    assert accepted == [("A", "first"), ("B", "second")]
+    assert set(rejected) == {"A", "Taken", "X" * 29}
+    assert "exists" in rejected["Taken"]
+
+
+def make_store_index(n_tokens: int) -> ReferenceTokenIndex:
+    """Index của store script test: n reference token của MINT_POLICY (owner = WALLET)."""
+    ref_utxos = []
+    for i in range(n_tokens):
+        name = f"Item{i:04d}"
+        datum = create_cip68_datum(
+            policy_id=bytes(MINT_POLICY),
+            asset_name=name.encode(),
+            owner_pkh=WALLET_PKH,
+            metadata=f"desc {name}",
+            version=i % 3 + 1,
+        )
+        ref_name, _ = create_cip68_asset_names(name)
+        ref_utxos.append(UTxO(
+            TransactionInput.from_primitive([bytes([100 + i]) * 32, 0]),
+            TransactionOutput(
+                BATCH_STORE_ADDRESS,
+                Value(2_000_000, MultiAsset({MINT_POLICY: Asset({ref_name: 1})})),
+                datum=RawCBOR(datum.to_cbor()),
+            ),
+        ))
+    return ReferenceTokenIndex(
+        FakeContext({str(BATCH_STORE_ADDRESS): ref_utxos}),
+        BATCH_STORE_ADDRESS, MINT_POLICY, refresh_interval=3600,
+    )
+
+
+def test_batch_update_spends_many_reference_utxos():
+    """Mỗi reference UTxO một redeemer UpdateMetadata, version + 1; reservation theo tx."""
+    index = make_store_index(16)
+    context = BatchContext(8, mem_per_output=50_000)
+    manager = ReservationManager()
+    leases = WalletInputLeases()
+
+    updates = [(f"Item{i:04d}", f"Revealed {i}") for i in range(16)] + [("Missing", "x")]
+    accepted, rejected, missing = reserve_batch_entries(index, updates, WALLET_PKH, manager)
+    assert rejected == {"Missing": "reference token not found"} and missing == ["Missing"]
+
+    plan = pack_batches(
+        accepted,
+        lambda chunk: build_update_batch(
+            context, WALLET, chunk, STORE_SCRIPT, BATCH_STORE_ADDRESS, MINT_POLICY
+        ),
+        lambda builder: leases.build(builder, WALLET, change_address=WALLET)[0],
+        release=lambda tx_body: leases.release_tx(tx_body.id),
+    )
+    bind_batch_reservations(plan, manager)
+
+    assert not plan.deferred and len(plan.groups) > 1
+    max_mem = context.protocol_param.max_tx_ex_mem
+    for group in plan.groups:
+        assert group.ex_units.mem <= 0.9 * max_mem
+        redeemers = list(group.builder.redeemers().values())
+        assert len(redeemers) == len(group.items)
+        assert all(r.data == UpdateMetadata() for r in redeemers)
+
+        datums = {
+            d.asset_name: d for d in (
+                decode_cip68_datum(o.datum) for o in group.tx_body.outputs
+                if o.address == BATCH_STORE_ADDRESS
+            )
+        }
+        for item in group.items:
+            assert datums[item.token_name.encode()].version == item.entry.version + 1
+
+        # Reservation của cả nhóm gắn với tx id -> /api/submit commit một lần
+        reservation = manager.for_tx(group.tx_body.id)
+        assert sorted(reservation.refs) == sorted(item.entry.ref for item in group.items)
+
+    # Token đang nằm trong tx chờ submit -> batch khác bị từ chối
+    _, again, _ = reserve_batch_entries(index, updates[:1], WALLET_PKH, manager)
+    assert "pending" in again["Item0000"]
+
+
+def test_batch_burn_resolves_names_in_one_pass():
+    """Một lần đọc ví cho mọi user token; tên không tồn tại -> missing; UTxO dùng chung -> deferred."""
+    index = make_store_index(12)
+    context = BatchContext(8)
+
+    def user_utxo(tx_byte, names):
+        assets = Asset({create_cip68_asset_names(n)[1]: 1 for n in names})
+        return UTxO(
+            TransactionInput.from_primitive([bytes([tx_byte]) * 32, 0]),
+            TransactionOutput(WALLET, Value(5_000_000, MultiAsset({MINT_POLICY: assets}))),
+        )
+
+    shared = user_utxo(200, [f"Item{i:04d}" for i in range(10)])  # vd. output của một batch mint
+    wallet = [shared, user_utxo(201, ["Item0010"]), user_utxo(202, ["Item0011"])]
+    context.wallet_utxos += wallet
+    manager = ReservationManager()
+    leases = WalletInputLeases()
+
+    names = [f"Item{i:04d}" for i in range(12)] + ["Ghost"]
+    accepted, rejected, missing = resolve_burn_entries(
+        index, context.utxos(WALLET), names, WALLET_PKH, MINT_POLICY, manager,
+        leased=leases.manager.is_reserved,
+    )
+    assert rejected == {"Ghost": "reference token not found"} and missing == ["Ghost"]
+
+    plan = pack_batches(
+        accepted,
+        lambda chunk: build_burn_batch(context, WALLET, chunk, MINT_SCRIPT, STORE_SCRIPT, MINT_POLICY),
+        lambda builder: leases.build(builder, WALLET, change_address=WALLET)[0],
+        release=lambda tx_body: leases.release_tx(tx_body.id),
+        max_items=4,
+        inputs_of=lambda item: [utxo_ref(item.user_utxo.input)],
+    )
+    bind_batch_reservations(plan, manager)
+
+    built = [item for group in plan.groups for item in group.items]
+    assert len(built) + len(plan.deferred) == 12
+    assert len(plan.groups) == 2 and plan.error
+    # Item của UTxO dùng chung không nằm trong nhóm đầu -> chờ change output của tx đó
+    assert all(item.user_utxo is shared for item in plan.deferred)
+    assert not any(manager.is_reserved(item.entry.ref) for item in plan.deferred)
+
+    for group in plan.groups:
+        burned = group.tx_body.mint[MINT_POLICY]
+        for item in group.items:
+            ref_name, user_name = create_cip68_asset_names(item.token_name)
+            assert burned[ref_name] == -1 and burned[user_name] == -1
+        redeemers = [r.data for r in group.builder.redeemers().values()]
+        assert redeemers.count(BurnReference()) == len(group.items)
+        assert redeemers.count(BurnToken(token_name=group.items[0].token_name.encode())) == 1
@@ -0,0 +1,218 @@
+"""
+Test script for CIP-68 Bulk Mint
+================================
+Test bulk mint từ manifest offline: chain context giả lập áp dụng tx vào ví
+khi submit (change output dùng được ngay như CachedChainContext).
+"""
+import json
+import os
+import sys
+import threading
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import (
+    PaymentSigningKey,
+    PaymentVerificationKey,
+    Transaction,
+    TransactionInput,
+    UTxO,
+)
+
+from offchain.cip68_batch import build_mint_batch
+from offchain.cip68_bulk import BulkMinter, MintCheckpoint, read_manifest
+from offchain.cip68_index import ReferenceTokenIndex
+from offchain.cip68_reservations import WalletInputLeases
+from offchain.cip68_utils import CIP68_REFERENCE_PREFIX
+
+from test_batch import MINT_POLICY, MINT_SCRIPT, BatchContext
+from test_index import FakeContext, STORE_ADDRESS
+from test_reservations import WALLET
+
+
+SKEY = PaymentSigningKey.generate()
+VKEY = PaymentVerificationKey.from_signing_key(SKEY)
+
+
+class ChainingContext(BatchContext):
+    """Submit -> inputs rời ví, outputs về ví xuất hiện ngay."""
+
+    def __init__(self, n_utxos: int):
+        super().__init__(n_utxos)
+        self.submitted = []
+
+    def submit_tx_cbor(self, cbor):
+        if isinstance(cbor, str):
+            cbor = bytes.fromhex(cbor)
+        tx = Transaction.from_cbor(cbor)
+        body = tx.transaction_body
+        available = {u.input for u in self.wallet_utxos}
+        if not set(body.inputs) <= available:
+            raise RuntimeError("BadInputsUTxO")
+        self.wallet_utxos = [u for u in self.wallet_utxos if u.input not in body.inputs] + [
+            UTxO(TransactionInput(body.id, i), output)
+            for i, output in enumerate(body.outputs) if output.address == WALLET
+        ]
+        self.submitted.append(tx)
+        return body.id
+
+
+def write_manifest(path, n_items, start=0):
+    with open(path, "w") as f:
+        if path.endswith(".csv"):
+            f.write("token_name,description\n")
+            for i in range(start, n_items):
+                f.write(f"Drop{i:04d},Drop item {i}\n")
+        else:
+            for i in range(start, n_items):
+                f.write(json.dumps({"token_name": f"Drop{i:04d}", "description": f"Drop item {i}"}) + "\n")
+
+
+def make_minter(context, checkpoint, index, **kwargs):
+    return BulkMinter(
+        context, SKEY, VKEY, WALLET, MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY,
+        checkpoint, index=index, leases=WalletInputLeases(), max_items=8, **kwargs
+    )
+
+
+def minted_names(context):
+    names = []
+    for tx in context.submitted:
+        for asset_name in tx.transaction_body.mint[MINT_POLICY]:
+            if asset_name.payload.startswith(CIP68_REFERENCE_PREFIX):
+                names.append(asset_name.payload[len(CIP68_REFERENCE_PREFIX):].decode())
+    return names
+
+
+def new_index():
+    return ReferenceTokenIndex(FakeContext({}), STORE_ADDRESS, MINT_POLICY, refresh_interval=3600)
+
+
+def test_read_manifest_streams_csv_and_jsonl(tmp_path):
+    """CSV và JSONL cho cùng items; đọc dạng iterator."""
+    csv_path, jsonl_path = str(tmp_path / "drop.csv"), str(tmp_path / "drop.jsonl")
+    write_manifest(csv_path, 5)
+    write_manifest(jsonl_path, 5)
+
+    items = read_manifest(csv_path)
+    assert next(items) == ("Drop0000", "Drop item 0")
+    assert list(read_manifest(jsonl_path)) == [("Drop0000", "Drop item 0")] + list(items)
+
+
+def test_bulk_mint_pipelines_and_resumes(tmp_path):
+    """Ví ít UTxO -> build chờ change output; chạy lại sau crash không mint trùng."""
+    manifest = str(tmp_path / "drop.csv")
+    checkpoint_path = str(tmp_path / "drop.checkpoint.jsonl")
+    context = ChainingContext(2)
+    index = new_index()
+
+    # Lần chạy đầu: 24 item đầu của manifest
+    write_manifest(manifest, 24)
+    checkpoint = MintCheckpoint(checkpoint_path)
+    report = make_minter(context, checkpoint, index, queue_size=2).run(read_manifest(manifest))
+    checkpoint.close()
+
+    assert report["minted"] == 24 and not report["failed"] and not report["rejected"]
+    assert report["transactions"] == len(context.submitted) >= 3
+    assert report["tx_per_s"] > 0 and report["items_per_s"] > 0
+
+    # Crash giữa lúc submit: tx đã ký và ghi `begin` nhưng chưa tới node
+    checkpoint = MintCheckpoint(checkpoint_path)
+    builder = build_mint_batch(
+        context, WALLET, [("Drop0024", "x"), ("Drop0025", "y")], MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY
+    )
+    tx_body = builder.build(change_address=WALLET)
+    crashed = Transaction(tx_body, builder.build_witness_set())
+    checkpoint.begin(str(tx_body.id), ["Drop0024", "Drop0025"], crashed.to_cbor_hex())
+    checkpoint.close()
+
+    # Chạy lại với manifest đầy đủ
+    write_manifest(manifest, 40)
+    checkpoint = MintCheckpoint(checkpoint_path)
+    assert checkpoint.stats() == {"done": 24, "unfinished": 1}
+    report = make_minter(context, checkpoint, index).run(read_manifest(manifest))
+    checkpoint.close()
+
+    assert report["resubmitted"] == 1
+    assert report["skipped"] == 26
+    assert report["minted"] == 14
+    names = minted_names(context)
+    assert sorted(names) == [f"Drop{i:04d}" for i in range(40)]
+    assert MintCheckpoint(checkpoint_path).stats() == {"done": 40, "unfinished": 0}
+
+
+class FlakyCheckpoint(MintCheckpoint):
+    """Ghi `begin` lỗi (vd. đĩa đầy) cho `failures` tx đầu tiên."""
+
+    def __init__(self, path, failures):
+        super().__init__(path)
+        self.failures = failures
+
+    def begin(self, tx_id, token_names, tx_cbor):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("No space left on device")
+        super().begin(tx_id, token_names, tx_cbor)
+
+
+def test_submit_stage_errors_do_not_stall_the_pipeline(tmp_path):
+    """Lỗi ngoài lần submit (checkpoint, callback) -> item failed, build không bị treo."""
+    manifest = str(tmp_path / "drop.jsonl")
+    write_manifest(manifest, 40)
+    context = ChainingContext(4)
+    checkpoint = FlakyCheckpoint(str(tmp_path / "drop.checkpoint.jsonl"), failures=2)
+
+    def on_submitted(tx_hash, names):
+        raise RuntimeError("callback bug")
+
+    minter = make_minter(context, checkpoint, new_index(), queue_size=1, on_submitted=on_submitted)
+    reports = []
+    runner = threading.Thread(target=lambda: reports.append(minter.run(read_manifest(manifest))))
+    runner.start()
+    runner.join(30)
+    assert not runner.is_alive()
+
+    (report,) = reports
+    assert len(report["failed"]) == 16 and report["minted"] == 24
+    assert all("No space left" in reason for reason in report["failed"].values())
+
+
+class TimeoutContext(ChainingContext):
+    """Lần submit đầu: tx tới node nhưng client nhận timeout."""
+
+    def __init__(self, n_utxos):
+        super().__init__(n_utxos)
+        self.timeouts = 1
+
+    def submit_tx_cbor(self, cbor):
+        tx_hash = super().submit_tx_cbor(cbor)
+        if self.timeouts:
+            self.timeouts -= 1
+            raise TimeoutError("read timed out")
+        return tx_hash
+
+
+def test_ambiguous_submit_error_is_resubmitted_not_reminted(tmp_path):
+    """Timeout khi submit -> giữ `begin`; chạy lại submit lại CBOR cũ, không mint trùng."""
+    manifest = str(tmp_path / "drop.jsonl")
+    checkpoint_path = str(tmp_path / "drop.checkpoint.jsonl")
+    write_manifest(manifest, 16)
+    context = TimeoutContext(4)
+    index = new_index()
+
+    checkpoint = MintCheckpoint(checkpoint_path)
+    report = make_minter(context, checkpoint, index).run(read_manifest(manifest))
+    checkpoint.close()
+    assert len(report["unconfirmed"]) == 8 and not report["failed"]
+    # Chain follower thấy tx đã lên chain
+    index.apply_transaction(context.submitted[0])
+
+    checkpoint = MintCheckpoint(checkpoint_path)
+    assert checkpoint.stats()["unfinished"] == 1
+    report = make_minter(context, checkpoint, index).run(read_manifest(manifest))
+    checkpoint.close()
+    assert report["minted"] == 0 and report["skipped"] == 16
+    assert sorted(minted_names(context)) == [f"Drop{i:04d}" for i in range(16)]
+    assert MintCheckpoint(checkpoint_path).stats() == {"done": 16, "unfinished": 0}
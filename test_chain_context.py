@@ -0,0 +1,350 @@
+"""
+Test script for CachedChainContext
+==================================
+Test cache offline với một chain context giả lập (không cần BlockFrost).
+"""
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import (
+    Address,
+    ExecutionUnits,
+    Network,
+    Redeemer,
+    RedeemerTag,
+    Transaction,
+    TransactionBody,
+    TransactionInput,
+    TransactionOutput,
+    TransactionWitnessSet,
+    UTxO,
+    VerificationKeyHash,
+)
+
+from offchain.cip68_context import (
+    CachedChainContext,
+    ChainInvalidated,
+    ExUnitsCache,
+    ProtocolParamProvider,
+)
+from offchain.cip68_shared import SharedCache
+from offchain.cip68_utils import BurnReference, MintToken
+
+
+WALLET = Address(VerificationKeyHash(bytes.fromhex("44" * 28)), network=Network.TESTNET)
+
+
+def make_utxo(tx_byte: int, index: int = 0, coin: int = 5_000_000) -> UTxO:
+    tx_in = TransactionInput.from_primitive([bytes([tx_byte]) * 32, index])
+    return UTxO(tx_in, TransactionOutput(WALLET, coin))
+
+
+class FakeContext:
+    """Chain context giả lập: utxos() + submit_tx_cbor()."""
+
+    def __init__(self, utxos):
+        self.wallet_utxos = list(utxos)
+        self.utxo_calls = 0
+        self.submitted = []
+        self.evaluations = 0
+        self.fail_submit = False
+
+    def utxos(self, address):
+        self.utxo_calls += 1
+        return list(self.wallet_utxos)
+
+    def submit_tx_cbor(self, cbor):
+        if self.fail_submit:
+            raise RuntimeError("submit rejected")
+        self.submitted.append(cbor)
+        return Transaction.from_cbor(cbor).id
+
+    def evaluate_tx_cbor(self, cbor):
+        self.evaluations += 1
+        return {"mint:0": ExecutionUnits(1_000, 2_000)}
+
+
+def make_tx(inputs, coin: int = 4_000_000) -> Transaction:
+    body = TransactionBody(
+        inputs=[u.input for u in inputs],
+        outputs=[TransactionOutput(WALLET, coin)],
+        fee=200_000,
+    )
+    return Transaction(body, TransactionWitnessSet())
+
+
+def test_utxo_cache_hits_within_ttl():
+    """Các lần gọi utxos() trong TTL không gọi lại upstream."""
+    upstream = FakeContext([make_utxo(1)])
+    context = CachedChainContext(upstream, utxo_ttl=60)
+
+    for _ in range(5):
+        assert len(context.utxos(WALLET)) == 1
+    assert upstream.utxo_calls == 1
+    assert context.stats["utxo_hits"] == 4
+
+
+def test_submit_marks_inputs_spent_and_adds_outputs():
+    """Sau submit: input đã spend bị loại, change output xuất hiện ngay."""
+    spent, kept = make_utxo(1), make_utxo(2)
+    upstream = FakeContext([spent, kept])
+    context = CachedChainContext(upstream, utxo_ttl=60)
+    context.utxos(WALLET)
+
+    tx = make_tx([spent])
+    context.submit_tx(tx)
+
+    utxos = context.utxos(WALLET)
+    refs = {u.input for u in utxos}
+    assert spent.input not in refs
+    assert kept.input in refs
+    assert TransactionInput(tx.id, 0) in refs
+    assert upstream.utxo_calls == 1
+
+    # Chain vẫn trả về input cũ sau khi cache hết hạn -> vẫn bị loại
+    context.invalidate(WALLET)
+    assert spent.input not in {u.input for u in context.utxos(WALLET)}
+
+
+def test_chained_txs_invalidated_when_upstream_rejected():
+    """Tx nối tiếp spend change chưa confirm; tx cha bị loại -> hủy cả chuỗi phía sau."""
+    funding = make_utxo(1)
+    upstream = FakeContext([funding])
+    context = CachedChainContext(upstream, utxo_ttl=60)
+
+    chain = []
+    for coin in (4_000_000, 3_000_000, 2_000_000):
+        (head,) = context.utxos(WALLET)
+        tx = make_tx([head], coin=coin)
+        context.submit_tx(tx)
+        chain.append(tx)
+    assert context.stats["chained"] == 2
+    assert context.pending_chain()[str(chain[2].id)] == [str(chain[1].id)]
+
+    # Tx thứ 2 bị loại (vd. mempool drop) -> tx thứ 3 bị hủy theo
+    assert context.on_rejected(chain[1].id) == [str(chain[1].id), str(chain[2].id)]
+    assert [u.input for u in context.utxos(WALLET)] == [TransactionInput(chain[0].id, 0)]
+    assert list(context.pending_chain()) == [str(chain[0].id)]
+
+    # Node báo change của tx đầu không tồn tại khi submit tx con -> hủy tx đầu
+    def reject(cbor):
+        raise RuntimeError(f"BadInputsUTxO (fromList [TxIn (TxId {{unTxId = {chain[0].id}}}) 0])")
+    upstream.submit_tx_cbor = reject
+    (head,) = context.utxos(WALLET)
+    try:
+        context.submit_tx(make_tx([head], coin=1_000_000))
+        assert False, "expected ChainInvalidated"
+    except ChainInvalidated as e:
+        assert e.tx_ids == [str(chain[0].id)]
+    assert context.utxos(WALLET) == [funding]
+    assert context.stats["chain_invalidated"] == 3
+
+
+def make_mint_tx(token_name: bytes) -> Transaction:
+    redeemer = Redeemer(MintToken(token_name))
+    redeemer.tag = RedeemerTag.MINT
+    tx = make_tx([make_utxo(3)])
+    tx.transaction_witness_set.redeemer = [redeemer]
+    return tx
+
+
+def test_ex_units_cache_skips_evaluation():
+    """Cùng redeemer shape -> evaluate một lần; submit lỗi -> evaluate lại."""
+    upstream = FakeContext([])
+    context = CachedChainContext(upstream, ex_units_margin=0.1)
+
+    first = context.evaluate_tx(make_mint_tx(b"A"))
+    assert first["mint:0"].mem == 1_000
+    # Builder sửa trực tiếp ex-units nhận được -> không ảnh hưởng cache
+    first["mint:0"].mem *= 10
+
+    cached = context.evaluate_tx(make_mint_tx(b"B"))
+    assert upstream.evaluations == 1
+    assert cached["mint:0"].mem == 1_100
+    assert cached["mint:0"].steps == 2_200
+
+    upstream.fail_submit = True
+    try:
+        context.submit_tx(make_mint_tx(b"B"))
+    except RuntimeError:
+        pass
+    context.evaluate_tx(make_mint_tx(b"C"))
+    assert upstream.evaluations == 2
+
+
+def make_spend_tx(n_inputs: int, redeemer_index: int) -> Transaction:
+    redeemer = Redeemer(BurnReference())
+    redeemer.tag = RedeemerTag.SPEND
+    redeemer.index = redeemer_index
+    tx = make_tx([make_utxo(10 + i) for i in range(n_inputs)])
+    tx.transaction_witness_set.redeemer = [redeemer]
+    return tx
+
+
+def test_ex_units_shape_includes_inputs_and_spend_index():
+    """Spend cùng redeemer nhưng khác số inputs / vị trí input -> shape khác."""
+    cache = ExUnitsCache()
+    cache.put(make_spend_tx(2, 0), {"spend:0": ExecutionUnits(1_000, 2_000)})
+
+    assert cache.get(make_spend_tx(2, 0)) is not None
+    assert cache.get(make_spend_tx(3, 0)) is None
+    assert cache.get(make_spend_tx(2, 1)) is None
+
+
+class FakeParamsContext:
+    """Context giả lập có epoch / protocol_param + api.epoch_latest()."""
+
+    def __init__(self, end_time: float):
+        self.current_epoch = 100
+        self.end_time = end_time
+        self.param_fetches = 0
+        self.api = SimpleNamespace(
+            epoch_latest=lambda: SimpleNamespace(end_time=self.end_time)
+        )
+
+    @property
+    def epoch(self):
+        return self.current_epoch
+
+    @property
+    def protocol_param(self):
+        self.param_fetches += 1
+        return {"epoch": self.current_epoch}
+
+    @property
+    def genesis_param(self):
+        return {}
+
+
+def test_protocol_params_refresh_only_on_new_epoch():
+    """Params được cache trong epoch; background thread refresh khi hết epoch."""
+    upstream = FakeParamsContext(end_time=time.time() + 0.2)
+    provider = ProtocolParamProvider(upstream, retry_interval=0.05)
+    context = CachedChainContext(upstream, params=provider)
+
+    provider.start()
+    try:
+        for _ in range(10):
+            assert context.protocol_param == {"epoch": 100}
+        assert upstream.param_fetches == 1
+
+        # Sang epoch mới -> background thread refresh, caller không chờ
+        upstream.current_epoch = 101
+        upstream.end_time = time.time() + 60
+        deadline = time.time() + 2
+        while context.epoch != 101 and time.time() < deadline:
+            time.sleep(0.02)
+        assert context.protocol_param == {"epoch": 101}
+        assert provider.stats["blocking_fetches"] == 0
+    finally:
+        provider.stop(timeout=1)
+
+
+def test_single_flight_coalesces_concurrent_fetches():
+    """Các lời gọi utxos() đồng thời cho cùng address dùng chung một fetch."""
+    upstream = FakeContext([make_utxo(1)])
+    release = threading.Event()
+    fetch = upstream.utxos
+
+    def slow_utxos(address):
+        release.wait(timeout=2)
+        return fetch(address)
+
+    upstream.utxos = slow_utxos
+    # max_cached_utxos=0: giống store address (không cache, chỉ coalesce)
+    context = CachedChainContext(upstream, max_cached_utxos=0)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(context.utxos(WALLET)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 2
+    while context.single_flight.calls < 8 and time.time() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 8
+    assert upstream.utxo_calls == 1
+    stats = context.single_flight.stats()
+    assert stats["coalesced"] == 7
+    assert stats["coalescing_ratio"] == 0.875
+
+
+def test_chain_tip_cached_until_refreshed():
+    """last_block_slot được cache trong tip_ttl; refresh_tip() lấy slot mới."""
+    class TipContext(FakeContext):
+        slots = iter([100, 120])
+
+        @property
+        def last_block_slot(self):
+            return next(self.slots)
+
+    upstream = TipContext([])
+    context = CachedChainContext(upstream, tip_ttl=60)
+
+    assert context.last_block_slot == 100
+    assert context.last_block_slot == 100
+    assert context.refresh_tip() == 120
+    assert context.last_block_slot == 120
+    assert context.tip_age < 1
+
+
+def test_shared_cache_across_workers(tmp_path):
+    """Hai worker dùng chung một SharedCache: một lần fetch, submit lan sang worker kia."""
+    path = os.path.join(str(tmp_path), "shared.sqlite3")
+    spent, kept = make_utxo(1), make_utxo(2)
+    upstream = FakeContext([spent, kept])
+    worker_a = CachedChainContext(upstream, utxo_ttl=60, shared=SharedCache(path))
+    worker_b = CachedChainContext(upstream, utxo_ttl=60, shared=SharedCache(path))
+
+    assert len(worker_a.utxos(WALLET)) == 2
+    assert len(worker_b.utxos(WALLET)) == 2
+    assert upstream.utxo_calls == 1
+    assert worker_b.stats["shared_hits"] == 1
+
+    # Worker A submit -> worker B không chọn lại input đã spend
+    tx = make_tx([spent])
+    worker_a.submit_tx(tx)
+    refs = {u.input for u in worker_b.utxos(WALLET)}
+    assert spent.input not in refs
+    assert TransactionInput(tx.id, 0) in refs
+    assert upstream.utxo_calls == 1
+
+    # Ex-units evaluate ở worker A được worker B dùng lại
+    worker_a.evaluate_tx(make_mint_tx(b"A"))
+    assert worker_b.evaluate_tx(make_mint_tx(b"B"))["mint:0"].mem == 1_000
+    assert upstream.evaluations == 1
+
+
+def test_shared_rejection_reaches_other_workers(tmp_path):
+    """Worker A hủy tx -> worker B trả lại input và bỏ output pending ngay (không chờ pending_ttl)."""
+    path = os.path.join(str(tmp_path), "shared.sqlite3")
+    funding = make_utxo(1)
+    upstream = FakeContext([funding])
+    worker_a = CachedChainContext(upstream, utxo_ttl=60, shared=SharedCache(path))
+    worker_b = CachedChainContext(upstream, utxo_ttl=60, shared=SharedCache(path))
+
+    tx = make_tx([funding])
+    worker_a.utxos(WALLET)
+    worker_a.submit_tx(tx)
+    assert [u.input for u in worker_b.utxos(WALLET)] == [TransactionInput(tx.id, 0)]
+
+    assert worker_a.on_rejected(tx.id) == [str(tx.id)]
+    assert worker_b.utxos(WALLET) == [funding]
+
+    # invalidate() ở một worker cũng lan sang worker kia
+    upstream.wallet_utxos.append(make_utxo(2))
+    worker_a.invalidate(WALLET)
+    assert len(worker_b.utxos(WALLET)) == 2
@@ -0,0 +1,210 @@
+"""
+Test script for CIP-68 Reference Token Index
+============================================
+Test index offline với một chain context giả lập (không cần BlockFrost).
+"""
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import (
+    Network,
+    Address,
+    TransactionInput,
+    TransactionOutput,
+    UTxO,
+    Value,
+    MultiAsset,
+    Asset,
+    RawCBOR,
+)
+
+from offchain.cip68_utils import (
+    create_cip68_asset_names,
+    create_cip68_datum,
+    get_fixed_policy_id,
+    get_fixed_store_address,
+)
+from offchain.cip68_index import ReferenceTokenIndex
+from offchain.cip68_cache import BloomFilter, DatumCache
+
+
+POLICY_ID = get_fixed_policy_id()
+STORE_ADDRESS = get_fixed_store_address(Network.TESTNET)
+OWNER_PKH = bytes.fromhex("11" * 28)
+
+
+class FakeContext:
+    """Chain context giả lập: chỉ cần utxos()."""
+
+    def __init__(self, utxos_by_address=None):
+        self.utxos_by_address = utxos_by_address or {}
+        self.calls = 0
+
+    def utxos(self, address):
+        self.calls += 1
+        return list(self.utxos_by_address.get(str(address), []))
+
+
+def make_ref_utxo(
+    token_name: str,
+    tx_byte: int = 1,
+    index: int = 0,
+    version: int = 1,
+    owner: bytes = OWNER_PKH,
+) -> UTxO:
+    """Tạo UTxO tại store address chứa reference token + inline datum (RawCBOR như BlockFrost)."""
+    ref_name, _ = create_cip68_asset_names(token_name)
+    datum = create_cip68_datum(
+        policy_id=bytes(POLICY_ID),
+        asset_name=token_name.encode('utf-8'),
+        owner_pkh=owner,
+        metadata=f"desc {token_name}",
+        version=version,
+    )
+    multi = MultiAsset({POLICY_ID: Asset({ref_name: 1})})
+    tx_in = TransactionInput.from_primitive([bytes([tx_byte]) * 32, index])
+    output = TransactionOutput(STORE_ADDRESS, Value(2_000_000, multi), datum=RawCBOR(datum.to_cbor()))
+    return UTxO(tx_in, output)
+
+
+def test_lookup_decodes_datum():
+    """Lookup trả về entry với datum đã decode từ RawCBOR."""
+    context = FakeContext({str(STORE_ADDRESS): [make_ref_utxo("A", 1), make_ref_utxo("B", 2)]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID)
+
+    entry = index.lookup("A")
+    assert entry is not None
+    assert entry.datum.owner == OWNER_PKH
+    assert entry.version == 1
+    assert index.lookup("missing") is None
+    assert len(index) == 2
+
+
+def test_lookup_does_not_rescan_until_stale():
+    """Sau warm-up, lookup không gọi lại context.utxos."""
+    context = FakeContext({str(STORE_ADDRESS): [make_ref_utxo("A", 1)]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID, refresh_interval=3600)
+
+    for _ in range(10):
+        index.lookup("A")
+    assert context.calls == 1
+
+
+def test_refresh_is_incremental():
+    """Refresh chỉ thêm UTxO mới và xóa UTxO đã spend."""
+    utxo_a = make_ref_utxo("A", 1)
+    utxo_b = make_ref_utxo("B", 2)
+    context = FakeContext({str(STORE_ADDRESS): [utxo_a, utxo_b]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID)
+    assert index.refresh() == 2
+
+    entry_a = index.lookup("A")
+    # B được update (UTxO mới), A giữ nguyên
+    utxo_b2 = make_ref_utxo("B", 3, version=2)
+    context.utxos_by_address[str(STORE_ADDRESS)] = [utxo_a, utxo_b2]
+    assert index.refresh() == 1  # entry B được thay thế
+    assert index.lookup("A") is entry_a
+    assert index.lookup("B").version == 2
+
+
+def test_owner_secondary_index():
+    """lookup_owner chỉ trả về token của owner, cập nhật khi token bị spend."""
+    other = bytes.fromhex("33" * 28)
+    utxo_c = make_ref_utxo("C", 3, owner=other)
+    context = FakeContext({str(STORE_ADDRESS): [make_ref_utxo("A", 1), make_ref_utxo("B", 2), utxo_c]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID)
+
+    assert sorted(e.token_name for e in index.lookup_owner(OWNER_PKH)) == [b"A", b"B"]
+    assert [e.token_name for e in index.lookup_owner(other)] == [b"C"]
+
+    index.remove_ref(utxo_c.input)
+    assert index.lookup_owner(other) == []
+
+
+def test_unknown_names_do_not_rescan():
+    """Token không tồn tại: negative cache / Bloom filter, không quét lại store."""
+    context = FakeContext({str(STORE_ADDRESS): [make_ref_utxo("A", 1)]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID, refresh_interval=3600)
+
+    assert index.lookup("missing") is None
+    for i in range(100):
+        assert index.lookup(f"scraper-{i}") is None
+    assert index.lookup("missing") is None
+    assert context.calls == 1
+    assert index.bloom_rejects == 100
+    assert index.negative_cache.hits == 1
+
+    # Token mới được apply vào index -> negative entry bị xóa
+    index.add_utxo(make_ref_utxo("missing", 2))
+    assert index.lookup("missing") is not None
+
+
+def test_bloom_filter_is_not_rebuilt_on_every_sync():
+    """mark_synced / refresh không dựng lại Bloom filter; token mới được thêm trực tiếp."""
+    utxos = [make_ref_utxo(f"T{i}", 1, i) for i in range(8)]
+    context = FakeContext({str(STORE_ADDRESS): utxos})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID, refresh_interval=3600)
+    index.refresh()
+    assert index.bloom_rebuilds == 1
+
+    for i in range(5):
+        index.add_utxo(make_ref_utxo(f"New{i}", 2, i))
+        index.mark_synced()
+    index.refresh()  # store chưa có New* -> bị xóa, 5/8 > ngưỡng
+    assert index.bloom_rebuilds == 2
+    for _ in range(3):
+        index.mark_synced()
+    assert index.bloom_rebuilds == 2
+
+    index.add_utxo(make_ref_utxo("Late", 3))
+    index.mark_synced()
+    assert index.bloom_rebuilds == 2
+    assert index.lookup("Late") is not None and index.lookup("T0") is not None
+
+
+def test_bloom_filter_membership():
+    """Bloom filter: không có false negative, false positive thấp."""
+    bloom = BloomFilter.from_keys((f"token-{i}".encode() for i in range(1000)), capacity=1000)
+    assert all(f"token-{i}".encode() in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}".encode() in bloom for i in range(1000))
+    assert false_positives < 50
+
+
+def test_datum_cache_lru():
+    """DatumCache trả về datum đã decode, đếm hits / misses / evictions."""
+    cache = DatumCache(maxsize=2)
+    cbors = [
+        create_cip68_datum(bytes(POLICY_ID), name, OWNER_PKH, "x", 1).to_cbor()
+        for name in (b"A", b"B", b"C")
+    ]
+
+    assert cache.decode(cbors[0]).asset_name == b"A"
+    assert cache.decode(cbors[0]) is cache.decode(cbors[0])
+    cache.decode(cbors[1])
+    cache.decode(cbors[2])  # A bị evict
+    assert cache.decode(b"not cbor") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 4
+    assert stats["evictions"] == 2
+
+
+def test_metadata_batch_uses_one_lookup_pass():
+    """Metadata của nhiều token: một lần quét store cho cả batch, token thiếu -> None."""
+    from offchain.cip68_operations import get_cip68_metadata_batch
+
+    names = [f"T{i}" for i in range(50)]
+    context = FakeContext({
+        str(STORE_ADDRESS): [make_ref_utxo(name, i + 1) for i, name in enumerate(names)]
+    })
+    results = get_cip68_metadata_batch(context, names + ["missing"])
+
+    assert context.calls == 1
+    assert results["T7"]["metadata"]["description"] == "desc T7"
+    assert results["T7"]["version"] == 1
+    assert results["missing"] is None
@@ -0,0 +1,207 @@
+"""
+Test script for CIP-68 Chain Follower
+=====================================
+Test follower offline với FixtureDataSource (file JSONL dạng BlockFrost).
+"""
+import os
+import sys
+import json
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import Network
+
+from offchain.cip68_utils import (
+    FIXED_POLICY_ID,
+    CIP68_REFERENCE_PREFIX,
+    create_cip68_datum,
+    get_fixed_policy_id,
+    get_fixed_store_address,
+)
+from offchain.cip68_index import ReferenceTokenIndex
+from offchain.cip68_indexer import ChainFollower, FixtureDataSource
+from offchain.cip68_snapshot import IndexSnapshot, SnapshotReplica
+
+
+POLICY_ID = get_fixed_policy_id()
+STORE_ADDRESS = get_fixed_store_address(Network.TESTNET)
+OWNER_PKH = bytes.fromhex("22" * 28)
+
+
+def ref_output(token_name: str, index: int = 0, version: int = 1) -> dict:
+    """Output dạng BlockFrost chứa reference token tại store address."""
+    datum = create_cip68_datum(
+        policy_id=bytes(POLICY_ID),
+        asset_name=token_name.encode('utf-8'),
+        owner_pkh=OWNER_PKH,
+        metadata=f"v{version}",
+        version=version,
+    )
+    unit = FIXED_POLICY_ID + (CIP68_REFERENCE_PREFIX + token_name.encode('utf-8')).hex()
+    return {
+        "output_index": index,
+        "address": str(STORE_ADDRESS),
+        "amount": [
+            {"unit": "lovelace", "quantity": "2000000"},
+            {"unit": unit, "quantity": "1"},
+        ],
+        "inline_datum": datum.to_cbor().hex(),
+    }
+
+
+def block(slot: int, txs: list) -> dict:
+    return {"type": "roll_forward", "point": {"slot": slot, "hash": f"{slot:064x}"}, "transactions": txs}
+
+
+def tx(tx_byte: int, inputs: list, outputs: list) -> dict:
+    return {"hash": f"{tx_byte:02x}" * 32, "inputs": inputs, "outputs": outputs}
+
+
+def spend(tx_byte: int, index: int = 0) -> dict:
+    return {"tx_hash": f"{tx_byte:02x}" * 32, "output_index": index}
+
+
+def write_fixture(tmp_path, events: list) -> str:
+    path = os.path.join(str(tmp_path), "events.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event) + "\n")
+    return path
+
+
+def make_follower(path: str):
+    index = ReferenceTokenIndex(None, STORE_ADDRESS, POLICY_ID)
+    return ChainFollower(FixtureDataSource(path), index), index
+
+
+def test_mint_update_burn(tmp_path):
+    """Follower apply mint -> update -> burn đúng thứ tự."""
+    path = write_fixture(tmp_path, [
+        block(10, [tx(1, [], [ref_output("A"), ref_output("B", 1)])]),
+        block(20, [tx(2, [spend(1, 0)], [ref_output("A", version=2)])]),
+        block(30, [tx(3, [spend(1, 1)], [])]),
+    ])
+    follower, index = make_follower(path)
+
+    assert follower.poll_once() == 3
+    assert index.lookup("A").version == 2
+    assert index.lookup("B") is None
+    assert follower.point.slot == 30
+    assert follower.stats["transactions_applied"] == 3
+
+
+def test_rollback_restores_state(tmp_path):
+    """Rollback hoàn tác update và burn trong các block bị bỏ."""
+    path = write_fixture(tmp_path, [
+        block(10, [tx(1, [], [ref_output("A"), ref_output("B", 1)])]),
+        block(20, [tx(2, [spend(1, 0)], [ref_output("A", version=2)])]),
+        block(30, [tx(3, [spend(1, 1)], [])]),
+        {"type": "roll_backward", "point": {"slot": 10, "hash": f"{10:064x}"}},
+    ])
+    follower, index = make_follower(path)
+    follower.poll_once()
+
+    assert index.lookup("A").version == 1
+    assert index.lookup("B") is not None
+    assert follower.point.slot == 10
+    assert follower.stats["rollbacks"] == 1
+
+
+def test_snapshot_warm_restart(tmp_path):
+    """Restart từ snapshot chỉ catch-up các event sau chain point đã lưu."""
+    events = [
+        block(10, [tx(1, [], [ref_output("A")])]),
+        block(20, [tx(2, [spend(1, 0)], [ref_output("A", version=2)])]),
+    ]
+    path = write_fixture(tmp_path, events)
+    snapshot_path = os.path.join(str(tmp_path), "index.sqlite3")
+
+    follower, _ = make_follower(path)
+    follower.snapshot = IndexSnapshot(snapshot_path)
+    follower.poll_once()
+    follower.save_snapshot()
+
+    # Thêm một block mới rồi "restart"
+    events.append(block(30, [tx(3, [], [ref_output("B")])]))
+    path = write_fixture(tmp_path, events)
+    follower, index = make_follower(path)
+    follower.snapshot = IndexSnapshot(snapshot_path)
+
+    assert follower.restore()
+    assert follower.point.slot == 20
+    assert index.lookup("A").version == 2
+    assert follower.poll_once() == 1
+    assert index.lookup("B") is not None
+
+
+def test_replica_follows_leader_snapshot(tmp_path):
+    """Worker replica đồng bộ index từ snapshot do leader ghi, không cần source."""
+    events = [block(10, [tx(1, [], [ref_output("A"), ref_output("B", 1)])])]
+    snapshot_path = os.path.join(str(tmp_path), "index.sqlite3")
+
+    leader, _ = make_follower(write_fixture(tmp_path, events))
+    leader.snapshot = IndexSnapshot(snapshot_path)
+    leader.poll_once()
+    leader.save_snapshot()
+
+    replica_index = ReferenceTokenIndex(None, STORE_ADDRESS, POLICY_ID)
+    replica = SnapshotReplica(IndexSnapshot(snapshot_path), replica_index)
+    assert replica.sync_once()
+    assert replica_index.lookup("A").version == 1
+    assert not replica.sync_once()  # snapshot chưa đổi
+
+    # Leader apply update + burn rồi ghi snapshot mới
+    events += [block(20, [tx(2, [spend(1, 0)], [ref_output("A", version=2)]),
+                          tx(3, [spend(1, 1)], [])])]
+    leader.source = FixtureDataSource(write_fixture(tmp_path, events))
+    leader.poll_once()
+    leader.save_snapshot()
+
+    assert replica.sync_once()
+    assert replica_index.lookup("A").version == 2
+    assert replica_index.lookup("B") is None
+
+
+def test_snapshot_writes_and_replicates_only_deltas(tmp_path):
+    """Leader chỉ ghi UTxO thay đổi; replica chỉ đọc row có seq mới."""
+    events = [block(10, [tx(1, [], [ref_output("A"), ref_output("B", 1)])])]
+    snapshot_path = os.path.join(str(tmp_path), "index.sqlite3")
+
+    leader, _ = make_follower(write_fixture(tmp_path, events))
+    leader.snapshot = IndexSnapshot(snapshot_path)
+    leader.poll_once()
+    leader.save_snapshot()
+
+    replica_index = ReferenceTokenIndex(None, STORE_ADDRESS, POLICY_ID)
+    replica = SnapshotReplica(IndexSnapshot(snapshot_path), replica_index)
+    assert replica.sync_once()
+
+    # Update A: một output mới + một tombstone, B không bị ghi lại
+    events += [block(20, [tx(2, [spend(1, 0)], [ref_output("A", version=2)])])]
+    leader.source = FixtureDataSource(write_fixture(tmp_path, events))
+    leader.poll_once()
+    assert leader.snapshot.save(leader.index, leader.point) == 2
+    assert leader.snapshot.stats()["seq"] == 2
+
+    assert replica.sync_once()
+    assert replica_index.lookup("A").version == 2
+    assert replica_index.lookup("B") is not None
+    assert replica.stats["full_syncs"] == 1 and replica.stats["syncs"] == 2
+
+    # Tombstone bị dọn -> replica tụt hậu phải load lại toàn bộ
+    leader.snapshot.tombstone_limit = 0
+    events += [block(30, [tx(3, [spend(1, 1)], [])])]
+    leader.source = FixtureDataSource(write_fixture(tmp_path, events))
+    leader.poll_once()
+    leader.save_snapshot()
+    events += [block(40, [tx(4, [], [ref_output("C")])])]
+    leader.source = FixtureDataSource(write_fixture(tmp_path, events))
+    leader.poll_once()
+    leader.save_snapshot()
+
+    assert replica.sync_once()
+    assert replica_index.lookup("B") is None
+    assert replica_index.lookup("C") is not None
+    assert replica.stats["full_syncs"] == 2
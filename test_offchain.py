@@ -26,6 +26,7 @@ from pycardano import (
 
 from offchain.cip68_utils import (
     load_scripts,
+    load_script_registry,
     get_script_address,
     create_cip68_asset_names,
     create_cip68_datum,
@@ -82,6 +83,43 @@ def test_script_hashes():
         return False
 
 
+def test_script_registry():
+    """Test blueprint chỉ được parse một lần (cache theo mtime)."""
+    print("\n=== Test 2b: Script Registry ===")
+    
+    import json
+    import tempfile
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            blueprint_path = os.path.join(tmp_dir, 'plutus.json')
+            validators = [
+                {'title': 'cip68.cip68_mint.mint', 'compiledCode': '01', 'hash': ''},
+                {'title': 'cip68.cip68_store.spend', 'compiledCode': '02', 'hash': ''},
+            ]
+            with open(blueprint_path, 'w') as f:
+                json.dump({'validators': validators}, f)
+            
+            registry = load_script_registry(blueprint_path)
+            if load_script_registry(blueprint_path) is not registry:
+                print("❌ Registry was rebuilt without blueprint change")
+                return False
+            
+            # Đổi mtime -> load lại
+            os.utime(blueprint_path, (0, registry.mtime + 10))
+            if load_script_registry(blueprint_path) is registry:
+                print("❌ Registry was not reloaded after blueprint change")
+                return False
+            
+            print(f"✅ Policy ID: {registry.policy_id}")
+            print(f"✅ Store Address: {registry.store_address(Network.TESTNET)}")
+        
+        return True
+    except Exception as e:
+        print(f"❌ Error in script registry: {e}")
+        return False
+
+
 def test_wallet_creation():
     """Test wallet creation from seed phrase."""
     print("\n=== Test 3: Wallet Creation ===")
@@ -246,6 +284,7 @@ def main():
     tests = [
         ("Load Scripts", test_load_scripts),
         ("Script Hashes", test_script_hashes),
+        ("Script Registry", test_script_registry),
         ("Wallet Creation", test_wallet_creation),
         ("Blockfrost Connection", test_blockfrost_connection),
         ("CIP-68 Utils", test_cip68_utils),
@@ -0,0 +1,126 @@
+"""
+Test script for CIP-68 Reference Scripts
+========================================
+Test build với reference inputs offline: deploy tx khóa script ở address
+riêng, batch tx tham chiếu script thay vì đính kèm, nhỏ hơn và rẻ hơn.
+"""
+import json
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from pycardano import Transaction, UTxO, TransactionInput
+
+from offchain.cip68_batch import build_mint_batch, build_update_batch, reserve_batch_entries
+from offchain.cip68_refscripts import (
+    ReferenceScripts,
+    build_deploy_tx,
+    compare_script_modes,
+    get_reference_scripts,
+    reference_script_address,
+    save_reference_scripts,
+)
+from offchain.cip68_reservations import ReservationManager
+
+from test_batch import (
+    BATCH_STORE_ADDRESS,
+    MINT_POLICY,
+    MINT_SCRIPT,
+    STORE_SCRIPT,
+    WALLET_PKH,
+    BatchContext,
+    make_store_index,
+)
+from test_index import STORE_ADDRESS
+from test_reservations import WALLET
+
+
+def deploy(context):
+    """Build tx deploy và thêm output của nó vào chain giả lập."""
+    lock_address = reference_script_address(WALLET.payment_part, WALLET.network)
+    builder = build_deploy_tx(context, WALLET, [MINT_SCRIPT, STORE_SCRIPT], lock_address)
+    tx = Transaction(builder.build(change_address=WALLET), builder.build_witness_set())
+    context.lock_utxos = [
+        UTxO(TransactionInput(tx.id, i), output)
+        for i, output in enumerate(tx.transaction_body.outputs) if output.address == lock_address
+    ]
+    return tx, lock_address
+
+
+class RefScriptContext(BatchContext):
+    lock_utxos = []
+
+    def utxos(self, address):
+        if self.lock_utxos and address == self.lock_utxos[0].output.address:
+            return list(self.lock_utxos)
+        return super().utxos(address)
+
+
+def test_deploy_locks_scripts_outside_wallet(tmp_path):
+    """Script nằm ở address riêng (coin selection không chọn), file deploy nạp lại được."""
+    context = RefScriptContext(4)
+    tx, lock_address = deploy(context)
+    outputs = tx.transaction_body.outputs
+    assert lock_address != WALLET
+    assert outputs[0].script == MINT_SCRIPT and outputs[1].script == STORE_SCRIPT
+    assert outputs[0].address == outputs[1].address == lock_address
+
+    path = str(tmp_path / "reference_scripts.json")
+    save_reference_scripts(path, ReferenceScripts.from_transaction(tx))
+    assert json.load(open(path))["mint"]["ref"] == f"{tx.id}#0"
+
+    loaded = get_reference_scripts(context, path)
+    assert loaded.utxo_for(MINT_SCRIPT).input == TransactionInput(tx.id, 0)
+    assert loaded.utxo_for(STORE_SCRIPT).input == TransactionInput(tx.id, 1)
+    assert get_reference_scripts(context, str(tmp_path / "missing.json")) is None
+
+    # UTxO đã bị thu hồi -> build với script inline
+    context.lock_utxos = context.lock_utxos[:1]
+    os.utime(path, (0, 0))
+    assert get_reference_scripts(context, path) is None
+
+
+def test_reference_inputs_shrink_mint_and_update_batches():
+    """Script không nằm trong witness set; update nhiều input tham chiếu store script một lần."""
+    context = RefScriptContext(8)
+    tx, _ = deploy(context)
+    refs = ReferenceScripts.from_transaction(tx)
+
+    mint = compare_script_modes(
+        lambda r: build_mint_batch(
+            context, WALLET, [("Item0000", "desc")], MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY, r
+        ),
+        WALLET, refs,
+    )
+    assert mint["size_saved"] > len(MINT_SCRIPT) - 64  # tx vẫn chứa một reference input
+    assert mint["fee_saved"] > 0
+
+    builder = build_mint_batch(
+        context, WALLET, [("Item0000", "desc")], MINT_SCRIPT, STORE_ADDRESS, MINT_POLICY, refs
+    )
+    builder.build(change_address=WALLET)
+    assert not builder.build_witness_set().plutus_v3_script
+    assert refs.mint_utxo in builder.reference_inputs
+
+    index = make_store_index(4)
+    items, _, _ = reserve_batch_entries(
+        index, [(f"Item{i:04d}", "new") for i in range(4)], WALLET_PKH, ReservationManager()
+    )
+    update = compare_script_modes(
+        lambda r: build_update_batch(
+            context, WALLET, items, STORE_SCRIPT, BATCH_STORE_ADDRESS, MINT_POLICY, r
+        ),
+        WALLET, refs,
+    )
+    assert update["size_saved"] > len(STORE_SCRIPT) - 64
+    assert update["fee_saved"] > 0
+
+    builder = build_update_batch(
+        context, WALLET, items, STORE_SCRIPT, BATCH_STORE_ADDRESS, MINT_POLICY, refs
+    )
+    builder.build(change_address=WALLET)
+    assert builder.reference_inputs == {refs.store_utxo}
+    assert not builder.build_witness_set().plutus_v3_script
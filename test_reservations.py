@@ -0,0 +1,192 @@
+"""
+Test script for CIP-68 UTxO Reservations
+========================================
+Test reservation manager offline (không cần BlockFrost).
+"""
+import os
+import sys
+import threading
+import time
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pytest
+
+from offchain.cip68_index import ReferenceTokenIndex
+from pycardano import (
+    Address,
+    ChainContext,
+    Network,
+    TransactionBuilder,
+    TransactionInput,
+    TransactionOutput,
+    UTxO,
+    VerificationKeyHash,
+)
+from pycardano.exception import UTxOSelectionException
+
+from offchain.cip68_async_context import protocol_params_from_blockfrost
+from offchain.cip68_reservations import (
+    ReservationConflict,
+    ReservationManager,
+    WalletInputLeases,
+    reserve_reference_entry,
+)
+from offchain.cip68_shared import SharedCache
+from offchain.cip68_standin import DEFAULT_PROTOCOL_PARAMS
+
+from test_index import FakeContext, POLICY_ID, STORE_ADDRESS, make_ref_utxo
+
+
+def test_conflict_fails_fast_and_release_frees_utxo():
+    """UTxO đang được giữ -> builder thứ hai bị từ chối; release -> dùng lại được."""
+    manager = ReservationManager()
+    first = manager.reserve(["aa#0"], holder="alice")
+
+    with pytest.raises(ReservationConflict):
+        manager.reserve(["aa#0", "bb#0"], holder="bob")
+    assert not manager.is_reserved("bb#0")  # all-or-nothing
+
+    manager.bind(first, "11" * 32)
+    manager.release_tx("11" * 32)
+    assert manager.reserve(["aa#0"]).refs == ["aa#0"]
+    assert manager.stats["conflicts"] == 1
+
+
+def test_reservation_expires_after_ttl():
+    """Người dùng không ký -> reservation hết hạn, UTxO được trả lại."""
+    manager = ReservationManager(ttl=0.05)
+    manager.reserve(["aa#0"])
+    second = manager.reserve(["aa#0"], wait=1.0)
+    assert second.refs == ["aa#0"]
+    assert manager.stats["expired"] == 1
+
+
+def test_waiting_writer_gets_new_reference_utxo():
+    """Writer thứ hai chờ tx đầu submit rồi giữ reference UTxO mới của token."""
+    utxo_v1 = make_ref_utxo("A", 1)
+    context = FakeContext({str(STORE_ADDRESS): [utxo_v1]})
+    index = ReferenceTokenIndex(context, STORE_ADDRESS, POLICY_ID, refresh_interval=3600)
+    manager = ReservationManager()
+
+    entry, first = reserve_reference_entry(index, "A", manager)
+    assert entry.ref == first.refs[0]
+
+    result = {}
+
+    def second_writer():
+        result["entry"], result["reservation"] = reserve_reference_entry(
+            index, "A", manager, wait=2.0
+        )
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    time.sleep(0.05)
+
+    # Tx đầu submit thành công: index thấy UTxO mới, reservation được commit
+    index.remove_ref(utxo_v1.input)
+    index.add_utxo(make_ref_utxo("A", 2, version=2))
+    manager.commit(first)
+    thread.join()
+
+    assert result["entry"].version == 2
+    assert result["reservation"].refs == [result["entry"].ref]
+
+
+WALLET = Address(VerificationKeyHash(bytes.fromhex("55" * 28)), network=Network.TESTNET)
+
+
+class WalletContext(ChainContext):
+    """Chain context tối thiểu cho TransactionBuilder: một ví với N UTxO 10 ADA."""
+
+    def __init__(self, n_utxos: int):
+        self.wallet_utxos = [
+            UTxO(
+                TransactionInput.from_primitive([bytes([i + 1]) * 32, 0]),
+                TransactionOutput(WALLET, 10_000_000),
+            )
+            for i in range(n_utxos)
+        ]
+        self._params = protocol_params_from_blockfrost(DEFAULT_PROTOCOL_PARAMS)
+
+    @property
+    def protocol_param(self):
+        return self._params
+
+    @property
+    def network(self):
+        return Network.TESTNET
+
+    @property
+    def epoch(self):
+        return 100
+
+    @property
+    def last_block_slot(self):
+        return 1_000
+
+    def _utxos(self, address):
+        return list(self.wallet_utxos)
+
+
+def build_payment(context: WalletContext, leases: WalletInputLeases):
+    builder = TransactionBuilder(context)
+    builder.add_input_address(WALLET)
+    builder.add_output(TransactionOutput(WALLET, 3_000_000))
+    return leases.build(builder, WALLET, change_address=WALLET)
+
+
+def test_parallel_builds_get_disjoint_wallet_inputs():
+    """Build song song từ cùng một ví -> inputs rời nhau; release -> dùng lại được."""
+    context = WalletContext(4)
+    leases = WalletInputLeases()
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(build_payment(context, leases)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    inputs = [set(tx_body.inputs) for tx_body, _ in results]
+    assert len(results) == 4
+    assert len(set().union(*inputs)) == sum(len(i) for i in inputs)
+
+    # Mọi UTxO đang được lease -> không còn input cho build thứ năm
+    with pytest.raises(UTxOSelectionException):
+        build_payment(context, leases)
+
+    # Submit lỗi -> inputs được trả lại cho builder khác
+    tx_body, _ = results[0]
+    leases.release_tx(tx_body.id)
+    retried, _ = build_payment(context, leases)
+    assert set(retried.inputs) == inputs[0]
+
+
+def test_reservations_and_leases_are_shared_across_workers(tmp_path):
+    """Hai worker dùng chung file SQLite -> không giữ / lease cùng một UTxO."""
+    path = str(tmp_path / "shared.sqlite3")
+    worker_a = ReservationManager(shared=SharedCache(path))
+    worker_b = ReservationManager(shared=SharedCache(path))
+
+    held = worker_a.reserve(["aa#0"], holder="alice")
+    with pytest.raises(ReservationConflict):
+        worker_b.reserve(["aa#0", "bb#0"], holder="bob")
+    assert worker_b.is_reserved("aa#0") and not worker_b.is_reserved("bb#0")
+    assert worker_b.stats["shared_conflicts"] == 1
+
+    # Worker B chờ, worker A release -> B giữ được UTxO
+    threading.Timer(0.1, worker_a.release, (held,)).start()
+    assert worker_b.reserve(["aa#0"], wait=2.0).refs == ["aa#0"]
+
+    context = WalletContext(4)
+    leases_a = WalletInputLeases(shared=SharedCache(path))
+    leases_b = WalletInputLeases(shared=SharedCache(path))
+    first, _ = build_payment(context, leases_a)
+    second, _ = build_payment(context, leases_b)
+    assert not set(first.inputs) & set(second.inputs)
@@ -0,0 +1,189 @@
+"""
+Test script for SubmissionQueue
+===============================
+Test hàng đợi submit offline: retry lỗi tạm thời, backpressure khi đầy và
+theo dõi trạng thái tới khi confirm (không cần BlockFrost).
+"""
+import os
+import sys
+import threading
+
+# Add project root to path
+project_root = os.path.abspath(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from offchain.cip68_async_context import BlockFrostHTTPError
+from offchain.cip68_submit import (
+    CONFIRMED,
+    DROPPED,
+    FAILED,
+    SUBMITTED,
+    QueueFull,
+    QueueStopped,
+    SubmissionQueue,
+    is_transient,
+)
+
+from test_chain_context import make_tx, make_utxo
+
+
+class FlakyContext:
+    """Submit lỗi theo danh sách `errors` trước khi thành công."""
+
+    def __init__(self, errors=(), gate=None):
+        self.errors = list(errors)
+        self.gate = gate
+        self.calls = 0
+
+    def submit_tx_cbor(self, cbor):
+        self.calls += 1
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.errors:
+            raise self.errors.pop(0)
+        from pycardano import Transaction
+        return Transaction.from_cbor(cbor).id
+
+
+def test_transient_errors_are_retried_with_backoff():
+    """429 / 503 được thử lại; lỗi của node trả về ngay."""
+    context = FlakyContext([BlockFrostHTTPError(429, "rate limited"), BlockFrostHTTPError(503, "busy")])
+    submit_queue = SubmissionQueue(context, backoff=0.01)
+    submit_queue.start()
+    tx = make_tx([make_utxo(1)])
+
+    job = submit_queue.submit(tx)
+    assert job.result(5) == str(tx.id)
+    assert job.attempts == 3 and job.state == SUBMITTED
+    assert submit_queue.stats["retries"] == 2
+
+    failures = []
+    context.errors = [BlockFrostHTTPError(400, "BadInputsUTxO")]
+    job = submit_queue.submit(make_tx([make_utxo(2)]), on_failed=failures.append)
+    try:
+        job.result(5)
+        assert False, "expected submit error"
+    except BlockFrostHTTPError:
+        pass
+    assert job.state == FAILED and job.attempts == 1 and len(failures) == 1
+    assert not is_transient(failures[0])
+    submit_queue.stop(timeout=1)
+
+
+def test_full_queue_applies_backpressure():
+    """Worker bận, hàng đợi đầy -> QueueFull kèm Retry-After; tx trùng không chiếm chỗ."""
+    gate = threading.Event()
+    submit_queue = SubmissionQueue(FlakyContext(gate=gate), max_size=2, concurrency=1)
+    submit_queue.start()
+
+    first = submit_queue.submit(make_tx([make_utxo(1)]))
+    while first.attempts == 0:  # worker đã lấy tx đầu tiên
+        pass
+    submit_queue.submit(make_tx([make_utxo(2)]))
+    submit_queue.submit(make_tx([make_utxo(3)]))
+    assert submit_queue.submit(make_tx([make_utxo(2)])) is submit_queue._jobs[str(make_tx([make_utxo(2)]).id)]
+
+    try:
+        submit_queue.submit(make_tx([make_utxo(4)]))
+        assert False, "expected QueueFull"
+    except QueueFull as e:
+        assert e.retry_after >= 1
+    assert submit_queue.stats["rejected_full"] == 1
+
+    gate.set()
+    first.result(5)
+    assert submit_queue.queue_stats()["duplicates"] == 1
+    submit_queue.stop(timeout=1)
+
+
+def test_submitted_txs_tracked_until_confirmed_or_dropped():
+    """Tx lên chain -> confirmed; quá confirm_timeout -> dropped + on_dropped."""
+    on_chain, dropped = set(), []
+    submit_queue = SubmissionQueue(
+        FlakyContext(), confirm=lambda tx_id: tx_id in on_chain,
+        confirm_timeout=60, on_dropped=dropped.append,
+    )
+    submit_queue.start()
+    confirmed_tx, lost_tx = make_tx([make_utxo(1)]), make_tx([make_utxo(2)])
+    confirmed_job = submit_queue.submit(confirmed_tx)
+    lost_job = submit_queue.submit(lost_tx)
+    confirmed_job.result(5), lost_job.result(5)
+
+    on_chain.add(str(confirmed_tx.id))
+    submit_queue.check_confirmations()
+    assert submit_queue.status(confirmed_tx.id)["state"] == CONFIRMED
+    assert submit_queue.status(lost_tx.id)["state"] == SUBMITTED
+
+    submit_queue.confirm_timeout = 0
+    submit_queue.check_confirmations()
+    assert submit_queue.status(lost_tx.id)["state"] == DROPPED
+    assert dropped == [str(lost_tx.id)]
+    submit_queue.stop(timeout=1)
+
+
+def test_retry_error_after_ambiguous_attempt_is_not_failed():
+    """5xx rồi lỗi ở lần thử lại: tx đã lên chain / lỗi nêu chính tx này -> không failed."""
+    context = FlakyContext()
+    submit_queue = SubmissionQueue(context, backoff=0.01)
+    submit_queue.start()
+
+    # Node báo chính tx này đã có trong mempool
+    tx = make_tx([make_utxo(1)])
+    context.errors = [
+        BlockFrostHTTPError(503, "busy"),
+        BlockFrostHTTPError(400, f"AlreadyInMempool {tx.id}"),
+    ]
+    job = submit_queue.submit(tx)
+    assert job.result(5) == str(tx.id)
+    assert job.state == SUBMITTED and submit_queue.stats["ambiguous"] == 1
+
+    # BadInputs không nêu tx này (inputs bị tx khác spend) -> failed
+    tx = make_tx([make_utxo(2)])
+    context.errors = [BlockFrostHTTPError(503, "busy"), BlockFrostHTTPError(400, "BadInputsUTxO")]
+    job = submit_queue.submit(tx)
+    try:
+        job.result(5)
+        assert False, "expected submit error"
+    except BlockFrostHTTPError:
+        pass
+    assert job.state == FAILED
+
+    # Lỗi khác nhưng tx đã lên chain -> thành công
+    on_chain = set()
+    submit_queue.confirm = lambda tx_id: tx_id in on_chain
+    tx = make_tx([make_utxo(3)])
+    on_chain.add(str(tx.id))
+    context.errors = [BlockFrostHTTPError(502, "bad gateway"), BlockFrostHTTPError(400, "ScriptFailure")]
+    assert submit_queue.submit(tx).result(5) == str(tx.id)
+    assert submit_queue.stats["failed"] == 1
+    submit_queue.stop(timeout=1)
+
+
+def test_stop_fails_queued_jobs_and_duplicates_get_callbacks():
+    """stop() trả lỗi cho tx còn trong hàng đợi; callback của lần gửi trùng được gọi."""
+    gate = threading.Event()
+    submit_queue = SubmissionQueue(FlakyContext(gate=gate), concurrency=1)
+    submit_queue.start()
+
+    first_tx = make_tx([make_utxo(1)])
+    first = submit_queue.submit(first_tx)
+    while first.attempts == 0:  # worker đang submit tx đầu tiên
+        pass
+    submitted, failures = [], []
+    assert submit_queue.submit(first_tx, on_submitted=submitted.append) is first
+    queued = submit_queue.submit(make_tx([make_utxo(2)]))
+    submit_queue.submit(queued.cbor, on_failed=failures.append)
+
+    stopper = threading.Thread(target=submit_queue.stop, kwargs={"timeout": 5})
+    stopper.start()
+    assert isinstance(queued.future.exception(5), QueueStopped)
+    gate.set()
+    stopper.join()
+
+    assert first.result(1) == str(first_tx.id) and submitted == [str(first_tx.id)]
+    try:
+        queued.result(1)
+        assert False, "expected QueueStopped"
+    except QueueStopped:
+        pass
+    assert queued.state == FAILED and len(failures) == 1